@@ -204,6 +204,17 @@ class CriticalFile(models.Model):
         db_table = 'critical_file'
 
 
+class MetricSeries(models.Model):
+    entity_type = models.CharField(max_length=16)
+    entity = models.CharField(max_length=255)
+    metric = models.CharField(max_length=32)
+
+    class Meta:
+        managed = False
+        db_table = 'metric_series'
+        unique_together = (('entity_type', 'entity', 'metric'),)
+
+
 class MonitorHardwaremonitor(models.Model):
     id = models.BigAutoField(primary_key=True)
     timestamp = models.DateTimeField()
@@ -265,17 +276,19 @@ class OpenPorts(models.Model):
 
 
 class ProcessInfo(models.Model):
-    process_name = models.CharField(primary_key=True, max_length=255)  # The composite primary key (process_name, path) found, that is not supported. The first column is selected.
+    process_name = models.CharField(max_length=255)
     path = models.CharField(max_length=255)
-    pid = models.IntegerField()
+    pid = models.IntegerField(primary_key=True)  # The composite primary key (pid, create_time) found, that is not supported. The first column is selected.
+    create_time = models.DateTimeField()
     ppid = models.IntegerField(blank=True, null=True)
     active_connections = models.IntegerField(blank=True, null=True)
     first_seen = models.DateTimeField(blank=True, null=True)
+    exited_at = models.DateTimeField(blank=True, null=True)
 
     class Meta:
         managed = False
         db_table = 'process_info'
-        unique_together = (('process_name', 'path'),)
+        unique_together = (('pid', 'create_time'),)
 
 
 class ProcessResources(models.Model):
@@ -328,6 +341,17 @@ class SystemDetails(models.Model):
         db_table = 'system_details'
 
 
+class SystemMetric(models.Model):
+    id = models.BigAutoField(primary_key=True)
+    series = models.ForeignKey(MetricSeries, models.DO_NOTHING)
+    timestamp = models.DateTimeField()
+    value = models.FloatField(blank=True, null=True)
+
+    class Meta:
+        managed = False
+        db_table = 'system_metrics'
+
+
 class SystemMonitor(models.Model):
     timestamp = models.DateTimeField()
     cpu_usage = models.FloatField(blank=True, null=True)
@@ -342,6 +366,57 @@ class SystemMonitor(models.Model):
         db_table = 'system_monitor'
 
 
+class SystemMonitorRollup(models.Model):
+    """Per-bucket min/max/avg/p95 of the system_monitor columns, see python_files/rollup.py."""
+    bucket = models.DateTimeField(primary_key=True)
+    sample_count = models.IntegerField()
+    cpu_usage_min = models.FloatField(blank=True, null=True)
+    cpu_usage_max = models.FloatField(blank=True, null=True)
+    cpu_usage_avg = models.FloatField(blank=True, null=True)
+    cpu_usage_p95 = models.FloatField(blank=True, null=True)
+    gpu_usage_min = models.FloatField(blank=True, null=True)
+    gpu_usage_max = models.FloatField(blank=True, null=True)
+    gpu_usage_avg = models.FloatField(blank=True, null=True)
+    gpu_usage_p95 = models.FloatField(blank=True, null=True)
+    ram_usage_min = models.FloatField(blank=True, null=True)
+    ram_usage_max = models.FloatField(blank=True, null=True)
+    ram_usage_avg = models.FloatField(blank=True, null=True)
+    ram_usage_p95 = models.FloatField(blank=True, null=True)
+    disk_usage_min = models.FloatField(blank=True, null=True)
+    disk_usage_max = models.FloatField(blank=True, null=True)
+    disk_usage_avg = models.FloatField(blank=True, null=True)
+    disk_usage_p95 = models.FloatField(blank=True, null=True)
+    kb_sent_min = models.FloatField(blank=True, null=True)
+    kb_sent_max = models.FloatField(blank=True, null=True)
+    kb_sent_avg = models.FloatField(blank=True, null=True)
+    kb_sent_p95 = models.FloatField(blank=True, null=True)
+    kb_received_min = models.FloatField(blank=True, null=True)
+    kb_received_max = models.FloatField(blank=True, null=True)
+    kb_received_avg = models.FloatField(blank=True, null=True)
+    kb_received_p95 = models.FloatField(blank=True, null=True)
+
+    class Meta:
+        abstract = True
+
+
+class SystemMonitor1m(SystemMonitorRollup):
+    class Meta:
+        managed = False
+        db_table = 'system_monitor_1m'
+
+
+class SystemMonitor1h(SystemMonitorRollup):
+    class Meta:
+        managed = False
+        db_table = 'system_monitor_1h'
+
+
+class SystemMonitor1d(SystemMonitorRollup):
+    class Meta:
+        managed = False
+        db_table = 'system_monitor_1d'
+
+
 class UserActivity(models.Model):
     event_type = models.CharField(max_length=50, blank=True, null=True)
     message = models.TextField(blank=True, null=True)
@@ -11,6 +11,7 @@ class ProcessInfoSerializer(serializers.ModelSerializer):
             "process_name",
             "path",
             "pid",
+            "create_time",
             "ppid",
             "active_connections",
             "first_seen",
@@ -1,3 +1,288 @@
-from django.test import TestCase
+import os
+import json
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
 
-# Create your tests here.
+import numpy as np
+from django.test import SimpleTestCase, RequestFactory
+
+from . import views
+from .utils.downsample import lttb_indices, downsample_rows
+from .utils import history, process_tree
+from .utils.process_store import ProcessStore, parse_window
+from .utils.open_files import OpenFileIndex
+from .utils.history import encode_cursor, decode_cursor
+
+class LttbIndicesTests(SimpleTestCase):
+    def test_short_series_are_returned_whole(self):
+        x = np.arange(10, dtype=np.float64)
+        np.testing.assert_array_equal(lttb_indices(x, x, 10), np.arange(10))
+        np.testing.assert_array_equal(lttb_indices(x, x, 2), np.arange(10))
+
+    def test_keeps_endpoints_and_increasing_indices(self):
+        x = np.arange(1000, dtype=np.float64)
+        y = np.sin(x / 20)
+        indices = lttb_indices(x, y, 50)
+        self.assertEqual(len(indices), 50)
+        self.assertEqual((indices[0], indices[-1]), (0, 999))
+        self.assertTrue(np.all(np.diff(indices) > 0))
+
+    def test_one_point_per_bucket(self):
+        x = np.arange(101, dtype=np.float64)
+        indices = lttb_indices(x, np.random.default_rng(0).random(101), 12)
+        bounds = np.linspace(1, 100, 11).astype(np.intp)
+        for index, start, end in zip(indices[1:-1], bounds[:-1], bounds[1:]):
+            self.assertTrue(start <= index < end)
+
+    def test_spikes_survive(self):
+        x = np.arange(1000, dtype=np.float64)
+        y = np.zeros(1000)
+        y[[137, 501, 862]] = [50, -40, 90]
+        indices = lttb_indices(x, y, 20)
+        self.assertTrue({137, 501, 862} <= set(indices.tolist()))
+
+class DownsampleRowsTests(SimpleTestCase):
+    def setUp(self):
+        start = datetime(2024, 5, 1)
+        self.rows = [{"timestamp": start + timedelta(seconds=i), "cpu_usage": 1.0, "ram_usage": 2.0}
+                     for i in range(1000)]
+
+    def test_small_results_are_untouched(self):
+        rows = self.rows[:10]
+        self.assertIs(downsample_rows(rows, ["cpu_usage"], 100), rows)
+        self.assertIs(downsample_rows(self.rows, ["cpu_usage"], None), self.rows)
+
+    def test_a_spike_in_any_field_keeps_its_row(self):
+        self.rows[300]["cpu_usage"] = 100.0
+        self.rows[700]["ram_usage"] = 100.0
+        self.rows[500]["ram_usage"] = None
+        kept = downsample_rows(self.rows, ["cpu_usage", "ram_usage"], 40)
+        self.assertLessEqual(len(kept), 40)
+        self.assertIn(self.rows[300], kept)
+        self.assertIn(self.rows[700], kept)
+        self.assertEqual(kept, sorted(kept, key=lambda row: row["timestamp"]))
+
+    def test_tight_budget_over_many_fields_is_still_capped(self):
+        fields = ["cpu_usage", "ram_usage", "gpu_usage", "disk_usage"]
+        for i, row in enumerate(self.rows):
+            row.update(cpu_usage=i % 7, ram_usage=i % 11, gpu_usage=i % 13, disk_usage=i % 17)
+        for max_points in (3, 5, 11):
+            kept = downsample_rows(self.rows, fields, max_points)
+            self.assertLessEqual(len(kept), max_points)
+            self.assertEqual((kept[0], kept[-1]), (self.rows[0], self.rows[-1]))
+
+class HistoricalDataTests(SimpleTestCase):
+    """/historical/ against an in-memory system_monitor table."""
+
+    def setUp(self):
+        start = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        # Two rows per timestamp, so pages have to break ties on id
+        self.table = [(i, start + timedelta(seconds=i // 2), 1.0, 2.0, 3.0, 4.0, 5.0, 6.0) for i in range(1, 26)]
+        for module in (views, history):  # iter_history() pages through history.history_page
+            patcher = mock.patch.object(module, "history_page", side_effect=self.history_page)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def history_page(self, cursor=None, limit=1000, start=None, end=None):
+        rows = sorted(self.table, key=lambda row: (row[1], row[0]), reverse=True)
+        if cursor is not None:
+            rows = [row for row in rows if (row[1], row[0]) < cursor]
+        return rows[:limit]
+
+    def get(self, **params):
+        return views.get_historical_data(RequestFactory().get("/historical/", params))
+
+    def body(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_no_parameters_return_the_legacy_list(self):
+        rows = json.loads(self.body(self.get()))
+        self.assertIsInstance(rows, list)
+        self.assertEqual([row["id"] for row in rows], list(range(25, 0, -1)))
+        self.assertEqual(rows[0]["timestamp"], "2024-05-01T00:00:12Z")
+
+    def test_pages_cover_every_row_once(self):
+        ids, cursor, pages = [], None, 0
+        while True:
+            params = {"limit": 10} if cursor is None else {"limit": 10, "cursor": cursor}
+            response = self.get(**params)
+            self.assertEqual(set(response.data), {"results", "next_cursor"})
+            ids += [row["id"] for row in response.data["results"]]
+            cursor, pages = response.data["next_cursor"], pages + 1
+            if cursor is None:
+                break
+        self.assertEqual(ids, list(range(25, 0, -1)))
+        self.assertEqual(pages, 3)
+
+    def test_next_cursor_points_at_the_last_row(self):
+        last = self.get(limit=4).data["results"][-1]
+        cursor = decode_cursor(self.get(limit=4).data["next_cursor"])
+        self.assertEqual(cursor, (datetime.fromisoformat(last["timestamp"]), last["id"]))
+
+    def test_invalid_cursor_is_rejected(self):
+        self.assertEqual(self.get(cursor="not a cursor").status_code, 400)
+
+    def test_ndjson_streams_every_row_after_the_cursor(self):
+        cursor = encode_cursor(self.table[9][1], self.table[9][0])
+        response = self.get(stream="ndjson", cursor=cursor)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = self.body(response).splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], list(range(9, 0, -1)))
+
+    def test_downsampled_history_has_the_paged_shape(self):
+        with mock.patch.object(views, "get_history", return_value=("raw", [])):
+            response = self.get(max_points=100, duration="day")
+        self.assertEqual(response.data, {"results": [], "next_cursor": None})
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        timestamp = datetime(2024, 5, 1, 10, 0, 0, 123456, tzinfo=timezone.utc)
+        self.assertEqual(decode_cursor(encode_cursor(timestamp, 42)), (timestamp, 42))
+
+    def test_garbage_raises_value_error(self):
+        for cursor in ("", "!!!", encode_cursor(datetime(2024, 5, 1), "x")):
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+class ProcessTreeTests(SimpleTestCase):
+    """ProcessTree over a fake /proc directory."""
+
+    def setUp(self):
+        self.proc_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.proc_root)
+        self.tree = process_tree.ProcessTree(self.proc_root)
+
+    def spawn(self, pid, ppid, name, start=100):
+        os.makedirs(os.path.join(self.proc_root, str(pid)), exist_ok=True)
+        with open(os.path.join(self.proc_root, str(pid), "stat"), "w") as f:
+            f.write(f"{pid} ({name}) S {ppid} " + " ".join(["0"] * 17) + f" {start} 0\n")
+
+    def kill(self, pid):
+        shutil.rmtree(os.path.join(self.proc_root, str(pid)))
+
+    def test_nested_tree(self):
+        self.spawn(1, 0, "systemd")
+        self.spawn(50, 1, "bash")
+        self.spawn(60, 50, "tmux: server (1)")
+        self.tree.refresh()
+        [root] = self.tree.as_nested()
+        self.assertEqual(root["name"], "systemd")
+        self.assertEqual(root["children"][0]["children"][0]["name"], "tmux: server (1)")
+
+    def test_refresh_reads_only_new_pids(self):
+        self.spawn(1, 0, "systemd")
+        self.spawn(50, 1, "bash")
+        self.assertEqual(self.tree.refresh(), ({1, 50}, set()))
+        self.spawn(70, 50, "vim")
+        with mock.patch.object(process_tree, "read_stat", wraps=process_tree.read_stat) as read_stat:
+            self.assertEqual(self.tree.refresh(), ({70}, set()))
+        self.assertEqual([call.args[0] for call in read_stat.call_args_list], [70])
+
+    def test_dead_parent_is_dropped_and_children_reparented(self):
+        self.spawn(1, 0, "systemd")
+        self.spawn(50, 1, "bash")
+        self.spawn(70, 50, "vim")
+        self.tree.refresh()
+        self.kill(50)
+        self.spawn(70, 1, "vim")  # What the kernel does to orphans
+        self.assertEqual(self.tree.refresh(), (set(), {50}))
+        self.assertEqual(self.tree.processes[70][0], 1)
+        self.assertEqual(self.tree.children, {0: {1}, 1: {70}})
+
+    def test_concurrent_refreshes_see_each_pid_once(self):
+        for pid in range(2, 200):
+            self.spawn(pid, 1, f"worker-{pid}")
+        added = []
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for result in pool.map(lambda _: self.tree.refresh(), range(8)):
+                added.extend(result[0])
+        self.assertEqual(sorted(added), list(range(2, 200)))
+
+class OpenFileIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.proc_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.proc_root)
+        for pid, name, target in [(40, "code", "/srv/app/main.py"), (41, "rsync", "/srv/app/old.py (deleted)"),
+                                  (42, "firefox", "anon_inode:[eventfd]")]:
+            os.makedirs(os.path.join(self.proc_root, str(pid), "fd"))
+            with open(os.path.join(self.proc_root, str(pid), "comm"), "w") as f:
+                f.write(name + "\n")
+            os.symlink(target, os.path.join(self.proc_root, str(pid), "fd", "3"))
+        os.makedirs(os.path.join(self.proc_root, "43"))  # Exited between listing and reading its fds
+
+    def test_attribution(self):
+        index = OpenFileIndex(proc_root=self.proc_root)
+        self.assertEqual(index.process_name("/srv/app/main.py"), "code")
+        self.assertEqual(index.process_name("/srv/app/old.py"), "rsync")
+        self.assertEqual(index.paths, {"/srv/app/main.py": 40, "/srv/app/old.py": 41})
+
+def counters(cpu_seconds, rss=1024, read_bytes=0, write_bytes=0, ctx_switches=0, name="python"):
+    return (name, cpu_seconds, rss, read_bytes, write_bytes, ctx_switches)
+
+class ProcessStoreTests(SimpleTestCase):
+    def test_rates_are_counter_deltas_over_the_elapsed_time(self):
+        store = ProcessStore(capacity=4, ring_size=8)
+        store.record(100.0, {(10, 1.0): counters(1.0, read_bytes=0, ctx_switches=10)})
+        store.record(102.0, {(10, 1.0): counters(2.0, read_bytes=4096, ctx_switches=30)})
+        self.assertEqual(store.top("cpu", 5, 60), [{"pid": 10, "name": "python", "value": 50.0, "latest": 50.0, "samples": 1}])
+        self.assertEqual(store.top("io_read", 5, 60)[0]["value"], 2048.0)
+        self.assertEqual(store.top("ctx_switches", 5, 60)[0]["value"], 10.0)
+        self.assertEqual(store.top("rss", 5, 60)[0]["samples"], 2)  # A gauge, valid from the first sample
+
+    def test_top_is_ordered_and_limited_to_n(self):
+        store = ProcessStore(capacity=8, ring_size=8)
+        store.record(0.0, {(pid, 1.0): counters(0.0) for pid in range(5)})
+        store.record(1.0, {(pid, 1.0): counters(pid / 10) for pid in range(5)})
+        self.assertEqual([process["pid"] for process in store.top("cpu", 3, 60)], [4, 3, 2])
+
+    def test_window_spans_the_ring_wrap(self):
+        store = ProcessStore(capacity=2, ring_size=4)
+        for second in range(7):  # Positions 0..3, then 0..2 again
+            store.record(float(second), {(10, 1.0): counters(second * second / 100, rss=second)})
+        self.assertEqual(store.position, 2)
+        process = store.top("rss", 1, 2)[0]  # Samples at 4, 5 and 6 s, the first in the ring's last slot
+        self.assertEqual((process["value"], process["samples"], process["latest"]), (5.0, 3, 6.0))
+
+    def test_exited_process_gives_back_its_slot(self):
+        store = ProcessStore(capacity=1, ring_size=4)
+        store.record(0.0, {(10, 1.0): counters(0.0)})
+        store.record(1.0, {(10, 1.0): counters(0.5), (11, 2.0): counters(0.0, name="bash")})  # No slot for 11
+        self.assertEqual([process["pid"] for process in store.top("rss", 5, 60)], [10])
+        store.record(2.0, {(11, 2.0): counters(0.2, name="bash")})
+        self.assertEqual(store.top("rss", 5, 60), [{"pid": 11, "name": "bash", "value": 1024.0, "latest": 1024.0, "samples": 1}])
+
+    def test_unreadable_counters_are_left_out_of_the_mean(self):
+        store = ProcessStore(capacity=2, ring_size=4)
+        store.record(0.0, {(10, 1.0): counters(0.0, read_bytes=np.nan)})  # Another user's IO needs root
+        store.record(1.0, {(10, 1.0): counters(0.1, read_bytes=np.nan)})
+        self.assertEqual(store.top("io_read", 5, 60), [])
+        self.assertEqual(ProcessStore().top("cpu", 5, 60), [])  # Nothing sampled yet
+
+    def test_parse_window(self):
+        self.assertEqual([parse_window(window) for window in ("30s", "5m", "1h")], [30, 300, 3600])
+        for window in ("", "5", "1d", "-5m", None):
+            with self.assertRaises(ValueError):
+                parse_window(window)
+
+class TopProcessesViewTests(SimpleTestCase):
+    def setUp(self):
+        self.store = mock.Mock(top=mock.Mock(return_value=[]))
+        patcher = mock.patch.object(views, "get_process_store", return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, **params):
+        return views.get_top_processes(RequestFactory().get("/processes/top/", params))
+
+    def test_parameters_reach_the_store(self):
+        response = self.get(metric="rss", n="5000", window="5m")
+        self.assertEqual(json.loads(response.content), {"metric": "rss", "window": 300, "processes": []})
+        self.store.top.assert_called_once_with("rss", 1000, 300)
+
+    def test_bad_parameters_are_rejected(self):
+        for params in ({"metric": "threads"}, {"window": "10"}, {"n": "ten"}):
+            self.assertEqual(self.get(**params).status_code, 400, params)
+        self.store.top.assert_not_called()
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import delete_file,get_temperatures, kill_process, get_user_activity_events, SystemDetailsListView, sse_file_activity, sse_window_activity, sse_stream_hardware, process_count, get_metrics, get_historical_data, get_system_monitor_data, ProcessInfoListView, SoftwareInfoListView, InitialHardwareConfigListView, HardwareChangeTrackingListView, ProcessResourceListView, critical_files, sse_process_activity
+from .views import delete_file,get_temperatures, kill_process, get_user_activity_events, SystemDetailsListView, sse_file_activity, sse_window_activity, sse_stream_hardware, process_count, get_metrics, get_historical_data, get_system_monitor_data, get_system_metrics, get_metric_series, ProcessInfoListView, SoftwareInfoListView, InitialHardwareConfigListView, HardwareChangeTrackingListView, ProcessResourceListView, critical_files, sse_process_activity, get_top_processes, get_process_tree
 
 urlpatterns = [
     path('metrics/', get_metrics, name='get_metrics'),
@@ -9,9 +9,13 @@ urlpatterns = [
     path("process-info/", ProcessInfoListView.as_view(), name="process-info"),
     path("software-info/", SoftwareInfoListView.as_view(), name="software-info"),
     path('system-info/', get_system_monitor_data, name='system-info'),
+    path('system-metrics/', get_system_metrics, name='system-metrics'),
+    path('system-metrics/series/', get_metric_series, name='system-metric-series'),
     path("hardware-info/", InitialHardwareConfigListView.as_view(), name="hardware-info"),
     path("hardware-change-tracking/", HardwareChangeTrackingListView.as_view(), name="hardware-change-tracking"),
     path("process-resources/", ProcessResourceListView.as_view(), name="process-resources"),
+    path("process-resources/top/", get_top_processes, name="process-resources-top"),
+    path("process-tree/", get_process_tree, name="process-tree"),
     path('process-count/', process_count, name='process-count'),
     path("sse_stream_hardware/", sse_stream_hardware, name="sse_stream"),
     # path("sse_stream_activity/", sse_view, name="sse_stream_activity"),
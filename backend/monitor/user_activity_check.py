@@ -11,6 +11,7 @@ import re
 from collections import defaultdict
 from Xlib import X, display
 import Xlib
+from .utils.open_files import OpenFileIndex
 # from PyQt6.QtCore import pyqtSignal, QThread
 disp = display.Display()
 root = disp.screen().root
@@ -46,8 +47,8 @@ class ActivityMonitor(threading.Thread):
                                      'RDD Process', 'pingsender', 'kworker', 'sh', 'sleep','kworker', 'gnome-shell']  # Exclude monitoring processes
         self.aggregation_buffer = {}  # Buffer to hold aggregated messages
         self.aggregation_interval = 5  # Aggregate for 5 seconds
-        self.main_processes = {"bash", "python3", "systemd"}
         self.process_count = defaultdict(int)
+        self.open_files = OpenFileIndex()  # Attributes file events to the process holding the file open
         
     def run(self):
         self.start_monitoring()
@@ -104,17 +105,7 @@ class ActivityMonitor(threading.Thread):
 
     def get_process_name_from_path(self, path):
         """Get the process name associated with a file path."""
-        try:
-            for process in psutil.process_iter(['pid', 'name', 'open_files']):
-                try:
-                    for file in process.info['open_files']:
-                        if file.path in path:
-                            return process.info['name']
-                except Exception:
-                    pass  # Handle exceptions like permission issues
-        except Exception:
-            pass
-        return "System"  # Default to "System" if no process is found
+        return self.open_files.process_name(path) or "System"  # Default to "System" if no process is found
 
     def monitor_applications(self):
         while True:
@@ -155,19 +146,6 @@ class ActivityMonitor(threading.Thread):
             except Exception as e:
                 print(f"{Fore.RED}Error monitoring applications: {str(e)}{Style.RESET_ALL}")
 
-    def is_child_process(self, pid):
-        """Check if a process is a child of another running process."""
-        try:
-            proc = psutil.Process(pid)
-            while proc.ppid() != 0:  # Traverse up the parent tree
-                parent = psutil.Process(proc.ppid())
-                if parent.name().lower() in self.main_processes:
-                    return True  # It's a child of a main process
-                proc = parent
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            pass
-        return False
-    
     def should_ignore_file(self, file_path):
         """Check if the file should be ignored based on known temp files, extensions, or paths."""
         filename = os.path.basename(file_path)
@@ -0,0 +1,76 @@
+import numpy as np
+
+MIN_POINTS = 3  # LTTB always keeps the first and last point plus at least one bucket
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: indices of the n_out points of (x, y) that best keep its shape.
+
+    x must be increasing. The first and last points are always kept; every
+    bucket in between contributes the point forming the largest triangle
+    with the previously kept point and the average of the next bucket, so
+    spikes survive where averaging would flatten them. Areas are computed
+    with NumPy one bucket at a time.
+    """
+    n = len(x)
+    if n_out >= n or n_out < MIN_POINTS:
+        return np.arange(n)
+
+    bounds = np.linspace(1, n - 1, n_out - 1).astype(np.intp)
+    starts, ends = bounds[:-1], bounds[1:]
+    counts = ends - starts
+    # Bucket averages; the bucket after the last one is the final point
+    average_x = np.append(np.add.reduceat(x[:n - 1], starts) / counts, x[n - 1])
+    average_y = np.append(np.add.reduceat(y[:n - 1], starts) / counts, y[n - 1])
+
+    selected = np.empty(n_out, dtype=np.intp)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for bucket, (start, end) in enumerate(zip(starts, ends)):
+        next_x, next_y = average_x[bucket + 1], average_y[bucket + 1]
+        areas = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[bucket + 1] = a
+    return selected
+
+def downsample_rows(rows, fields, max_points, time_field="timestamp"):
+    """Reduces rows (dicts ordered by time_field) to about max_points with LTTB.
+
+    Each field in fields gets an equal share of the budget and the union of
+    the kept rows is returned, so a spike in any one metric keeps its row.
+    Missing values (None) are left out of that field's series.
+    """
+    if max_points is None or len(rows) <= max_points:
+        return rows
+    x = np.array([row[time_field].timestamp() for row in rows], dtype=np.float64)
+    columns = {}
+    for field in fields:
+        values = np.array([row[field] for row in rows], dtype=np.float64)  # None becomes nan
+        valid = np.flatnonzero(~np.isnan(values))
+        if len(valid):
+            columns[field] = (valid, values[valid])
+    if not columns:
+        return [rows[i] for i in lttb_indices(x, np.zeros(len(rows)), max_points)]
+
+    budget = max(max_points // len(columns), MIN_POINTS)
+    keep = set()
+    for valid, values in columns.values():
+        keep.update(valid[lttb_indices(x[valid], values, budget)].tolist())
+    keep = sorted(keep)
+    if len(keep) > max_points:
+        # Fewer than MIN_POINTS per field: thin the union evenly, still keeping the first and last row
+        keep = [keep[i] for i in np.linspace(0, len(keep) - 1, max_points).round().astype(np.intp)]
+    return [rows[i] for i in keep]
+
+def downsample_points(points, max_points):
+    """Reduces (timestamp, value) pairs ordered by time to at most max_points with LTTB.
+
+    Points without a value are left out once the series has to be reduced.
+    """
+    if max_points is None or len(points) <= max_points:
+        return points
+    points = [point for point in points if point[1] is not None]
+    if len(points) <= max_points:
+        return points
+    x = np.array([timestamp.timestamp() for timestamp, _ in points], dtype=np.float64)
+    y = np.array([value for _, value in points], dtype=np.float64)
+    return [points[i] for i in lttb_indices(x, y, max_points)]
@@ -0,0 +1,118 @@
+import base64
+import binascii
+from datetime import datetime, timedelta
+
+from django.db.models import Q
+
+from ..models import SystemMonitor, SystemMonitor1m, SystemMonitor1h, SystemMonitor1d
+
+MAX_HISTORY_POINTS = 1500  # Upper bound on the points returned for one window
+METRIC_FIELDS = ("cpu_usage", "gpu_usage", "ram_usage", "disk_usage", "kb_sent", "kb_received")
+
+# (name, model, bucket length), finest first; None is the raw 1 Hz system_monitor table
+RESOLUTIONS = [
+    ("raw", None, timedelta(seconds=1)),
+    ("1m", SystemMonitor1m, timedelta(minutes=1)),
+    ("1h", SystemMonitor1h, timedelta(hours=1)),
+    ("1d", SystemMonitor1d, timedelta(days=1)),
+]
+
+def pick_resolution(start, end, max_points=MAX_HISTORY_POINTS):
+    """Returns the index in RESOLUTIONS of the finest resolution that keeps start..end within max_points."""
+    window = end - start
+    for index, (_, _, step) in enumerate(RESOLUTIONS):
+        if window / step <= max_points:
+            return index
+    return len(RESOLUTIONS) - 1
+
+def _fetch(index, start, end):
+    """Rows of one resolution in [start, end], shaped like system_monitor rows."""
+    _, model, _ = RESOLUTIONS[index]
+    if model is None:
+        return list(SystemMonitor.objects.filter(timestamp__gte=start, timestamp__lte=end)
+                    .order_by("timestamp").values("timestamp", *METRIC_FIELDS))
+    rows = []
+    rollup_fields = [f"{metric}_{aggregate}" for metric in METRIC_FIELDS for aggregate in ("avg", "min", "max", "p95")]
+    for row in (model.objects.filter(bucket__gte=start, bucket__lte=end)
+                .order_by("bucket").values("bucket", "sample_count", *rollup_fields)):
+        point = {"timestamp": row.pop("bucket")}
+        for metric in METRIC_FIELDS:
+            point[metric] = row[f"{metric}_avg"]
+        point.update(row)
+        rows.append(point)
+    return rows
+
+def get_history(start, end, max_points=MAX_HISTORY_POINTS):
+    """Returns (resolution name, rows) for start..end at the finest resolution within max_points.
+
+    Rollup buckets are written once they close, so the still-open tail of
+    the window is filled from the next finer resolution, down to the raw rows.
+    Rollup points carry the avg under the plain column name plus
+    <column>_min/_max/_avg/_p95 and sample_count.
+    """
+    index = pick_resolution(start, end, max_points)
+    rows = _fetch(index, start, end)
+    covered_until = rows[-1]["timestamp"] + RESOLUTIONS[index][2] if rows else start
+    for finer in range(index - 1, -1, -1):
+        if covered_until > end:
+            break
+        # Only the coarser level's open bucket can be missing, which bounds the tail
+        tail = _fetch(finer, max(covered_until, end - RESOLUTIONS[finer + 1][2]), end)
+        if tail:
+            rows.extend(tail)
+            covered_until = tail[-1]["timestamp"] + RESOLUTIONS[finer][2]
+    return RESOLUTIONS[index][0], rows
+
+# --- Raw history pages ---
+HISTORY_FIELDS = ("id", "timestamp") + METRIC_FIELDS
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
+def encode_cursor(timestamp, row_id):
+    """Opaque keyset cursor pointing just past (timestamp, id)."""
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{row_id}".encode()).decode()
+
+def decode_cursor(cursor):
+    """Returns (timestamp, id) from encode_cursor() output or raises ValueError."""
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        timestamp = datetime.fromisoformat(timestamp)
+        return timestamp, int(row_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError("invalid cursor")
+
+def history_page(cursor=None, limit=DEFAULT_PAGE_SIZE, start=None, end=None):
+    """Returns up to limit raw system_monitor rows as tuples of HISTORY_FIELDS, newest first.
+
+    Pages are found with a keyset condition on (timestamp, id) instead of
+    OFFSET, so every page is an index range scan no matter how deep it is.
+    """
+    records = SystemMonitor.objects.order_by("-timestamp", "-id")
+    if start is not None:
+        records = records.filter(timestamp__gte=start)
+    if end is not None:
+        records = records.filter(timestamp__lte=end)
+    if cursor is not None:
+        timestamp, row_id = cursor
+        records = records.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=row_id))
+    return list(records.values_list(*HISTORY_FIELDS)[:limit])
+
+def iter_history(cursor=None, start=None, end=None, page_size=DEFAULT_PAGE_SIZE):
+    """Yields raw rows page by page, newest first.
+
+    The MySQL driver buffers a whole result set in memory, so streaming
+    the table through one query would not bound memory; chained keyset
+    pages do.
+    """
+    while True:
+        rows = history_page(cursor, page_size, start, end)
+        yield from rows
+        if len(rows) < page_size:
+            return
+        cursor = (rows[-1][1], rows[-1][0])
+
+def history_row_to_dict(row):
+    """JSON-ready dict of a HISTORY_FIELDS tuple, with an ISO 8601 timestamp."""
+    point = dict(zip(HISTORY_FIELDS, row))
+    point["timestamp"] = point["timestamp"].isoformat().replace("+00:00", "Z")
+    return point
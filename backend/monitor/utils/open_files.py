@@ -0,0 +1,77 @@
+import os
+import time
+import threading
+
+PROC_ROOT = "/proc"
+OPEN_FILES_REFRESH_INTERVAL = 2.0  # Minimum seconds between two walks of /proc/*/fd
+MAX_WALK_SHARE = 0.1  # Fraction of one core the walks may use; slow walks stretch the interval
+DELETED_SUFFIX = " (deleted)"  # readlink() of an fd whose file was unlinked
+
+def read_process_name(pid, proc_root=PROC_ROOT):
+    try:
+        with open(f"{proc_root}/{pid}/comm") as f:
+            return f.read().rstrip("\n")
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+
+def iter_process_fds(proc_root=PROC_ROOT):
+    """Yields (pid, fd, link target) for every readable file descriptor of every process, in one pass over /proc."""
+    with os.scandir(proc_root) as entries:
+        pids = [int(entry.name) for entry in entries if entry.name.isdigit()]
+    for pid in pids:
+        try:
+            with os.scandir(os.path.join(proc_root, str(pid), "fd")) as fds:
+                for fd in fds:
+                    try:
+                        yield pid, int(fd.name), os.readlink(fd.path)
+                    except OSError:
+                        continue  # Closed between listing and readlink
+        except (PermissionError, FileNotFoundError, ProcessLookupError, NotADirectoryError):
+            continue  # Another user's process, or exited
+
+class OpenFileIndex:
+    """Reverse index from open file paths to the pid holding them open.
+
+    One /proc/*/fd walk builds a path -> pid dict that serves every lookup
+    until it is older than the refresh interval, so a burst of file events
+    costs one walk plus a dict lookup each. The interval grows when a walk
+    is slow, keeping walks under MAX_WALK_SHARE of a core.
+    """
+
+    def __init__(self, refresh_interval=OPEN_FILES_REFRESH_INTERVAL, proc_root=PROC_ROOT):
+        self.refresh_interval = refresh_interval
+        self.proc_root = proc_root
+        self.lock = threading.Lock()
+        self.paths = {}  # Path -> pid
+        self.names = {}  # Pid -> name, cleared on every refresh since pids get reused
+        self.next_refresh = 0.0  # time.monotonic() after which the index is stale
+
+    def refresh(self):
+        started = time.monotonic()
+        paths = {}
+        for pid, _, target in iter_process_fds(self.proc_root):
+            if target.startswith("/"):  # Sockets, pipes and anon inodes are not paths
+                if target.endswith(DELETED_SUFFIX):
+                    target = target[:-len(DELETED_SUFFIX)]
+                paths[target] = pid
+        elapsed = time.monotonic() - started
+        self.paths = paths
+        self.names = {}
+        self.next_refresh = time.monotonic() + max(self.refresh_interval, elapsed / MAX_WALK_SHARE)
+
+    def lookup(self, path):
+        """The pid holding path open as of the last walk (refreshed first if stale), or None."""
+        with self.lock:
+            if time.monotonic() >= self.next_refresh:
+                self.refresh()
+            return self.paths.get(path)
+
+    def process_name(self, path):
+        """Name of the process holding path open, or None."""
+        pid = self.lookup(path)
+        if pid is None:
+            return None
+        with self.lock:
+            if pid not in self.names:
+                self.names[pid] = read_process_name(pid, self.proc_root)
+            return self.names[pid]
@@ -0,0 +1,147 @@
+import re
+import time
+import logging
+import threading
+
+import numpy as np
+import psutil
+
+METRICS = ("cpu", "rss", "io_read", "io_write", "ctx_switches")  # cpu in %, rss in bytes, the rest per second
+SAMPLE_INTERVAL = 2.0  # Seconds between samples of the process table
+RING_SIZE = 300  # Samples kept per process (10 minutes at SAMPLE_INTERVAL)
+MAX_PROCESSES = 1024  # Processes tracked at once; fixes the memory of the store
+WINDOW_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+def parse_window(window):
+    """Turns '30s', '5m' or '1h' into seconds; raises ValueError otherwise."""
+    match = re.fullmatch(r"(\d+)([smh])", window or "")
+    if not match:
+        raise ValueError("window must look like 30s, 5m or 1h")
+    return int(match.group(1)) * WINDOW_UNITS[match.group(2)]
+
+class ProcessStore:
+    """Fixed-size ring buffers of per-process CPU, RSS, IO rates and context switch rates.
+
+    All processes share one ring position per sample, so each metric is a
+    single (MAX_PROCESSES, RING_SIZE) float32 array with a matching validity
+    mask, and top-N over a window is a row sum over at most two contiguous
+    slices. A process gets a slot when first seen and gives it back when it
+    exits; memory never grows.
+    """
+
+    def __init__(self, capacity=MAX_PROCESSES, ring_size=RING_SIZE):
+        self.lock = threading.Lock()
+        self.values = np.zeros((len(METRICS), capacity, ring_size), dtype=np.float32)
+        self.valid = np.zeros((len(METRICS), capacity, ring_size), dtype=np.uint8)  # 0 where a reading is missing
+        self.times = np.full(ring_size, np.nan)  # Sample time of each ring position
+        self.position = -1
+        self.slots = {}  # (pid, create_time) -> slot
+        self.free_slots = list(range(capacity - 1, -1, -1))
+        self.names = [None] * capacity
+        self.pids = np.zeros(capacity, dtype=np.int64)
+        self.previous = np.full((capacity, 4), np.nan)  # Last cpu seconds, read bytes, write bytes, ctx switches
+        self.previous_time = None
+
+    def record(self, timestamp, processes):
+        """Stores one sample of {(pid, create_time): (name, cpu_seconds, rss, read_bytes, write_bytes, ctx_switches)}."""
+        with self.lock:
+            elapsed = timestamp - self.previous_time if self.previous_time is not None else None
+            self.previous_time = timestamp
+            self.position = (self.position + 1) % len(self.times)
+            position = self.position
+            self.times[position] = timestamp
+            self.values[:, :, position] = 0
+            self.valid[:, :, position] = 0
+
+            for key in set(self.slots) - set(processes):
+                slot = self.slots.pop(key)
+                self.values[:, slot, :] = 0  # top() sums values without the mask
+                self.valid[:, slot, :] = 0
+                self.previous[slot] = np.nan
+                self.names[slot] = None
+                self.free_slots.append(slot)
+
+            for key, (name, cpu_seconds, rss, read_bytes, write_bytes, ctx_switches) in processes.items():
+                slot = self.slots.get(key)
+                if slot is None:
+                    if not self.free_slots:
+                        continue  # Full; the process is picked up once a slot frees
+                    slot = self.slots[key] = self.free_slots.pop()
+                    self.names[slot] = name
+                    self.pids[slot] = key[0]
+                counters = np.array([cpu_seconds, read_bytes, write_bytes, ctx_switches], dtype=np.float64)
+                rates = (counters - self.previous[slot]) / elapsed if elapsed else np.full(4, np.nan)
+                self.previous[slot] = counters
+                row = np.array([rates[0] * 100, rss, rates[1], rates[2], rates[3]])
+                present = ~np.isnan(row)
+                self.values[:, slot, position] = np.where(present, row, 0)
+                self.valid[:, slot, position] = present
+
+    def top(self, metric, n, window):
+        """The n processes with the highest mean of metric over the last window seconds, highest first."""
+        index = METRICS.index(metric)
+        with self.lock:
+            if self.position < 0:
+                return []
+            position = self.position
+            # Positions are written in time order, so the window is the last k of them
+            k = int(np.sum(self.times >= self.times[position] - window))
+            start = position - k + 1
+            window_slices = [slice(start, position + 1)] if start >= 0 else [slice(start % len(self.times), None), slice(0, position + 1)]
+            values, valid = self.values[index], self.valid[index]
+            sums = sum(values[:, part].sum(axis=1, dtype=np.float64) for part in window_slices)
+            counts = sum(valid[:, part].sum(axis=1, dtype=np.int32) for part in window_slices)
+            means = np.where(counts > 0, sums / np.maximum(counts, 1), -np.inf)
+            n = min(n, int(np.count_nonzero(counts)))
+            if n <= 0:
+                return []
+            best = np.argpartition(-means, n - 1)[:n]
+            best = best[np.argsort(-means[best])]
+            return [{
+                "pid": int(self.pids[slot]),
+                "name": self.names[slot],
+                "value": float(means[slot]),
+                "latest": float(values[slot, position]) if valid[slot, position] else None,
+                "samples": int(counts[slot]),
+            } for slot in best]
+
+def sample_processes():
+    """One reading of every process's cumulative counters, keyed by (pid, create_time)."""
+    processes = {}
+    for proc in psutil.process_iter(['name', 'create_time', 'cpu_times', 'memory_info', 'io_counters', 'num_ctx_switches']):
+        info = proc.info
+        if info['create_time'] is None or info['cpu_times'] is None:
+            continue
+        io = info['io_counters']
+        ctx = info['num_ctx_switches']
+        processes[(proc.pid, info['create_time'])] = (
+            info['name'],
+            info['cpu_times'].user + info['cpu_times'].system,
+            info['memory_info'].rss if info['memory_info'] else np.nan,
+            io.read_bytes if io else np.nan,  # Other users' IO counters need root
+            io.write_bytes if io else np.nan,
+            ctx.voluntary + ctx.involuntary if ctx else np.nan,
+        )
+    return processes
+
+def run_sampler(store, interval=SAMPLE_INTERVAL):
+    while True:
+        started = time.monotonic()
+        try:
+            store.record(time.time(), sample_processes())
+        except Exception as e:
+            logging.error(f"Error sampling processes: {e}")
+        time.sleep(max(interval - (time.monotonic() - started), 0))
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_process_store():
+    """The process-wide store, starting its sampler thread on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ProcessStore()
+            sampler = threading.Thread(target=run_sampler, args=(_store,), name="process-store", daemon=True)
+            sampler.start()
+        return _store
@@ -0,0 +1,96 @@
+import os
+import threading
+
+import psutil
+
+PROC_ROOT = "/proc"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+BOOT_TIME = psutil.boot_time()
+
+def read_stat(pid, proc_root=PROC_ROOT):
+    """Returns (ppid, name, create_time) from /proc/<pid>/stat, or None if the process is gone."""
+    try:
+        with open(f"{proc_root}/{pid}/stat") as f:
+            stat = f.read()
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+    # The name is in parentheses and may itself contain spaces or parentheses
+    name = stat[stat.index("(") + 1:stat.rindex(")")]
+    fields = stat[stat.rindex(")") + 2:].split()
+    return int(fields[1]), name, BOOT_TIME + int(fields[19]) / CLOCK_TICKS
+
+class ProcessTree:
+    """pid -> (ppid, name, create_time) index of the running processes with a children map.
+
+    refresh() lists /proc and reads /proc/<pid>/stat only for the pids that
+    are new since the last call; dead pids are dropped and their children,
+    which the kernel re-parented, re-read. A process that exec'd another
+    program keeps its old name until reload(), and a pid reused between two
+    refreshes keeps the old entry. The index is shared by request threads:
+    refreshes run one at a time and readers get a consistent copy.
+    """
+
+    def __init__(self, proc_root=PROC_ROOT):
+        self.proc_root = proc_root
+        self.lock = threading.Lock()  # Guards processes and children
+        self.refresh_lock = threading.Lock()  # One refresh() at a time
+        self.processes = {}  # pid -> (ppid, name, create_time)
+        self.children = {}  # pid -> set of child pids
+
+    def _add(self, pid, entry):
+        self._remove(pid)
+        self.processes[pid] = entry
+        self.children.setdefault(entry[0], set()).add(pid)
+
+    def _remove(self, pid):
+        entry = self.processes.pop(pid, None)
+        if entry is not None:
+            siblings = self.children.get(entry[0])
+            if siblings is not None:
+                siblings.discard(pid)
+                if not siblings:
+                    del self.children[entry[0]]
+
+    def remove(self, pid):
+        """Forgets an exited process and re-reads its children, which the kernel re-parented."""
+        with self.lock:
+            children = list(self.children.get(pid, ()))
+            self._remove(pid)
+        for child in children:
+            self.reload(child)
+
+    def reload(self, pid):
+        """Re-reads pid from /proc, e.g. after it exec'd another program; returns its new entry or None."""
+        entry = read_stat(pid, self.proc_root)
+        with self.lock:
+            if entry is not None:
+                self._add(pid, entry)
+            else:
+                self._remove(pid)
+        return entry
+
+    def refresh(self):
+        """Brings the index up to date with /proc; returns (added pids, removed pids)."""
+        with self.refresh_lock:
+            pids = {int(name) for name in os.listdir(self.proc_root) if name.isdigit()}
+            with self.lock:
+                known = set(self.processes)
+            removed = known - pids
+            for pid in removed:
+                self.remove(pid)
+            added = {pid for pid in pids - known if self.reload(pid) is not None}
+            return added, removed
+
+    def as_nested(self):
+        """The whole tree as nested {pid, ppid, name, create_time, children} dicts, one per root."""
+        with self.lock:
+            processes = dict(self.processes)
+            children = {pid: sorted(kids) for pid, kids in self.children.items()}
+
+        def node(pid):
+            ppid, name, create_time = processes[pid]
+            return {"pid": pid, "ppid": ppid, "name": name, "create_time": create_time,
+                    "children": [node(child) for child in children.get(pid, ()) if child in processes]}
+
+        roots = sorted(pid for pid, (ppid, _, _) in processes.items() if ppid not in processes)
+        return [node(pid) for pid in roots]
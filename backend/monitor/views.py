@@ -2,7 +2,7 @@ from rest_framework.decorators import api_view
 from rest_framework import generics
 from rest_framework.response import Response
 from rest_framework.generics import ListAPIView
-from .models import UserActivity, SystemMonitor, SystemDetails, ProcessInfo, InstalledSoftware, InitialHardwareConfig, HardwareChangeTracking, ProcessResources, CriticalFile
+from .models import UserActivity, SystemMonitor, MetricSeries, SystemMetric, SystemDetails, ProcessInfo, InstalledSoftware, InitialHardwareConfig, HardwareChangeTracking, ProcessResources, CriticalFile
 from .serializers import UserActivitySerializer, SystemDetailsSerializer, ProcessInfoSerializer, ProcessResourcesSerializer, SystemMonitorSerializer, SoftwareMonitorSerializer, InitialHardwareConfigSerializer, HardwareChangeTrackingSerializer, CriticalFileSerializer
 import psutil
 import subprocess
@@ -12,6 +12,7 @@ import json
 import time
 from django.utils.timezone import now, timedelta, make_aware, is_aware
 from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
 from datetime import datetime
 import threading
 import Xlib
@@ -23,6 +24,12 @@ from queue import Queue
 from django.views.decorators.http import require_GET
 from django.views.decorators.csrf import csrf_exempt
 from .user_activity_check import ActivityMonitor
+from .utils.history import (get_history, METRIC_FIELDS, history_page, iter_history, history_row_to_dict,
+                            encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+from .utils.downsample import downsample_rows, downsample_points, MIN_POINTS
+from .utils.process_store import get_process_store, parse_window, METRICS as PROCESS_METRICS
+from .utils.process_tree import ProcessTree
+from django.db.models import Min, Max
 
 process_queue = Queue()
 file_queue = Queue()
@@ -46,7 +53,7 @@ ignored_processes = {"gnome-shell", "systemd", "snapd"}
 
 
 class ProcessInfoListView(ListAPIView):
-    queryset = ProcessInfo.objects.all()
+    queryset = ProcessInfo.objects.filter(exited_at__isnull=True)  # Running processes only
     serializer_class = ProcessInfoSerializer
 
 class SoftwareInfoListView(ListAPIView):
@@ -125,44 +132,116 @@ def get_metrics(request):
         return Response({'error': 'No records found'}, status=404)
     
 
-def get_system_monitor_data(request):
-    duration_map = {
-        "live": timedelta(minutes=1),
-        "day": timedelta(days=1),
-        "week": timedelta(weeks=1),
-        "month": timedelta(weeks=4),
-        "year": timedelta(weeks=52),
-    }
+DURATION_MAP = {
+    "live": timedelta(minutes=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    "month": timedelta(weeks=4),
+    "year": timedelta(weeks=52),
+}
+SERIES_MAX_POINTS = 2000  # Points per series returned by /system-metrics/ when ?max_points= is absent
 
+def get_system_monitor_data(request):
     duration = request.GET.get("duration", "live")  # Default to 1 min
-    time_threshold = now() - duration_map.get(duration, timedelta(minutes=1))
-
-    # print(SystemMonitor.objects.first().timestamp)  # Check one entry
-    # print(time_threshold)
-
-    # print(now())
+    end = now()
+    time_threshold = end - DURATION_MAP.get(duration, timedelta(minutes=1))
 
     if not is_aware(time_threshold):
         time_threshold = make_aware(time_threshold)
 
-    # Query filtered data
-    data = SystemMonitor.objects.filter(timestamp__gte=time_threshold).values(
-        "timestamp", "cpu_usage", "gpu_usage", "ram_usage", "disk_usage", "kb_sent", "kb_received"
-    )
-    
-    # datetime.datetime(2025, 3, 21, 13, 40, 11, tzinfo=datetime.timezone.utc)
+    try:
+        max_points = get_max_points(request)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
 
+    # Raw rows for short windows, 1m/1h/1d rollups for longer ones
+    resolution, datalist = get_history(time_threshold, end)
+    datalist = downsample_rows(datalist, METRIC_FIELDS, max_points)
 
-    # print(data)
-    
-    datalist = list(data)
-    # for entry in datalist:
-    #     entry['timestamp'] = entry['timestamp'].isoformat()
+    response = JsonResponse(datalist, safe=False)
+    response["X-Resolution"] = resolution
+    return response
 
-    return JsonResponse(datalist, safe=False)
+def get_max_points(request):
+    """Reads the optional ?max_points= chart budget; returns None when absent or raises ValueError."""
+    max_points = request.GET.get("max_points")
+    if max_points is None:
+        return None
+    try:
+        max_points = int(max_points)
+    except ValueError:
+        raise ValueError("max_points must be an integer")
+    if max_points < MIN_POINTS:
+        raise ValueError(f"max_points must be at least {MIN_POINTS}")
+    return max_points
+
+def get_time_range(request):
+    """Reads ?start=&end= (ISO 8601) or ?duration= from a request; returns (start, end) or raises ValueError."""
+    start = request.GET.get("start")
+    end = request.GET.get("end")
+    if start:
+        start = parse_datetime(start)
+        end = parse_datetime(end) if end else now()
+        if start is None or end is None:
+            raise ValueError("start and end must be ISO 8601 datetimes")
+    else:
+        end = now()
+        start = end - DURATION_MAP.get(request.GET.get("duration", "live"), timedelta(minutes=1))
+    if not is_aware(start):
+        start = make_aware(start)
+    if not is_aware(end):
+        end = make_aware(end)
+    return start, end
+
+def get_metric_series(request):
+    """List the per-entity series in system_metrics, optionally for one ?entity_type= (cpu, mount, disk, nic)."""
+    series = MetricSeries.objects.all().order_by("entity_type", "entity", "metric")
+    entity_type = request.GET.get("entity_type")
+    if entity_type:
+        series = series.filter(entity_type=entity_type)
+    return JsonResponse(list(series.values("id", "entity_type", "entity", "metric")), safe=False)
+
+def get_system_metrics(request):
+    """Return per-entity samples for ?entity_type= and optional ?entity=a,b / ?metric=a,b over a time range.
+
+    The range is ?start=&end= (ISO 8601) or ?duration= as for /system-info/.
+    Each series is returned with its points as [timestamp, value] pairs,
+    reduced with LTTB to at most ?max_points= (default SERIES_MAX_POINTS).
+    """
+    entity_type = request.GET.get("entity_type")
+    if not entity_type:
+        return JsonResponse({"error": "entity_type is required"}, status=400)
+    try:
+        start, end = get_time_range(request)
+        max_points = get_max_points(request) or SERIES_MAX_POINTS
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    series = MetricSeries.objects.filter(entity_type=entity_type)
+    entities = request.GET.get("entity")
+    if entities:
+        series = series.filter(entity__in=entities.split(","))
+    metrics = request.GET.get("metric")
+    if metrics:
+        series = series.filter(metric__in=metrics.split(","))
+    series_by_id = {
+        series_id: {"entity_type": entity_type, "entity": entity, "metric": metric, "points": []}
+        for series_id, entity, metric in series.values_list("id", "entity", "metric")
+    }
+
+    # Served by the (series_id, timestamp) index, one range scan per series
+    points = SystemMetric.objects.filter(
+        series_id__in=series_by_id, timestamp__gte=start, timestamp__lte=end
+    ).order_by("series_id", "timestamp").values_list("series_id", "timestamp", "value")
+    for series_id, timestamp, value in points.iterator():
+        series_by_id[series_id]["points"].append((timestamp, value))
+    for item in series_by_id.values():
+        item["points"] = [[timestamp.isoformat(), value] for timestamp, value in downsample_points(item["points"], max_points)]
+
+    return JsonResponse({"start": start.isoformat(), "end": end.isoformat(), "series": list(series_by_id.values())})
 
 def process_count(request):
-    count = ProcessInfo.objects.count()
+    count = ProcessInfo.objects.filter(exited_at__isnull=True).count()
     return JsonResponse({"process_count": count})
 
 def get_timestamp():
@@ -360,12 +439,63 @@ def get_usb_devices():
     return formatted_devices
 
 
+HISTORY_PARAMS = ("cursor", "limit", "stream", "max_points", "start", "end", "duration")
+
 @api_view(['GET'])
 def get_historical_data(request):
-    """Fetch historical system metrics from database."""
-    records = SystemMonitor.objects.all().order_by('-timestamp')
-    serializer = SystemMonitorSerializer(records, many=True)
-    return Response(serializer.data)
+    """Fetch historical system metrics from database, newest first.
+
+    Without parameters every row is returned as a JSON array, as this
+    endpoint always did, streamed so memory stays bounded.
+
+    Any other request gets {"results": [...], "next_cursor": ...}: one page
+    of ?limit= rows, continued by passing next_cursor back as ?cursor=.
+    With ?max_points= the whole history (or the given range) is instead read
+    from the rollups and reduced with LTTB, and next_cursor is null.
+    ?stream=ndjson (one JSON object per line) or ?stream=json (a JSON array)
+    streams every row from ?cursor= on. ?start=/?end= or ?duration= narrow
+    the range in every mode.
+    """
+    if not any(param in request.GET for param in HISTORY_PARAMS):
+        return StreamingHttpResponse(stream_json_array(iter_history()), content_type="application/json")
+
+    try:
+        max_points = get_max_points(request)
+        cursor = decode_cursor(request.GET["cursor"]) if "cursor" in request.GET else None
+        limit = min(max(int(request.GET.get("limit", DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        start, end = get_time_range(request) if "start" in request.GET or "duration" in request.GET else (None, None)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    if max_points is not None:
+        if start is None:
+            span = SystemMonitor.objects.aggregate(start=Min("timestamp"), end=Max("timestamp"))
+            if span["start"] is None:
+                return Response({"results": [], "next_cursor": None})
+            start, end = span["start"], span["end"]
+        _, rows = get_history(start, end)
+        rows = downsample_rows(rows, METRIC_FIELDS, max_points)
+        return Response({"results": rows[::-1], "next_cursor": None})
+
+    stream = request.GET.get("stream")
+    if stream == "ndjson":
+        lines = (json.dumps(history_row_to_dict(row)) + "\n" for row in iter_history(cursor, start, end))
+        return StreamingHttpResponse(lines, content_type="application/x-ndjson")
+    if stream == "json":
+        return StreamingHttpResponse(stream_json_array(iter_history(cursor, start, end)), content_type="application/json")
+
+    rows = history_page(cursor, limit, start, end)
+    next_cursor = encode_cursor(rows[-1][1], rows[-1][0]) if len(rows) == limit else None
+    return Response({"results": [history_row_to_dict(row) for row in rows], "next_cursor": next_cursor})
+
+def stream_json_array(rows):
+    """Yields a JSON array of history rows a chunk at a time."""
+    yield "["
+    separator = ""
+    for row in rows:
+        yield separator + json.dumps(history_row_to_dict(row))
+        separator = ","
+    yield "]"
 
 @api_view(['GET', 'POST'])
 def critical_files(request):
@@ -403,6 +533,29 @@ def get_process_resources(request):
     serializer = ProcessResourcesSerializer(records, many=True)
     return Response(serializer.data)
 
+process_tree = ProcessTree()  # Shared across requests so each one only reads the processes started since the last
+
+def get_process_tree(request):
+    """The whole process tree as nested {pid, ppid, name, create_time, children} nodes."""
+    process_tree.refresh()
+    return JsonResponse({"processes": process_tree.as_nested()})
+
+def get_top_processes(request):
+    """Top ?n= processes by ?metric= (cpu, rss, io_read, io_write, ctx_switches) averaged over ?window=.
+
+    Answered from the in-memory ring buffers in utils/process_store.py,
+    which the first request starts filling.
+    """
+    metric = request.GET.get("metric", "cpu")
+    if metric not in PROCESS_METRICS:
+        return JsonResponse({"error": f"metric must be one of {', '.join(PROCESS_METRICS)}"}, status=400)
+    try:
+        n = min(max(int(request.GET.get("n", 20)), 1), 1000)
+        window = parse_window(request.GET.get("window", "1m"))
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    return JsonResponse({"metric": metric, "window": window, "processes": get_process_store().top(metric, n, window)})
+
 @api_view(['POST'])
 def kill_process(request, pid):
     """Kill a process by its PID."""
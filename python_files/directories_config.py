@@ -27,7 +27,12 @@ DEFAULT_LOG_PATHS = {
 
 }
 
+# Written by rsyslog from syslog facilities; without rsyslog these records are only in the journal
+RSYSLOG_LOG_FILES = {"auth.log", "kern.log", "cron.log"}
+
 CONFIG_FILE = "/etc/rsyslog.d/50-default.conf"
+SYSLOG_PATH = "/var/log/syslog"
+JOURNAL_PATH = "journal"  # Read natively from journald by the ingest package
 
 # Function to establish a database connection
 def connect_db():
@@ -78,11 +83,16 @@ def parse_rsyslog_config(config_file, default_paths):
                     if file_name in log_files:
                         log_files[file_name] = log_path
         for file_name in commented_files:
-            log_files[file_name] = "/var/log/syslog"
+            # The ingest package reads from the journal only the facilities no configured text log holds,
+            # so falling back to it does not duplicate what auth.log and kern.log already have
+            log_files[file_name] = SYSLOG_PATH if os.path.exists(SYSLOG_PATH) else JOURNAL_PATH
         return log_files
     except FileNotFoundError:
-        print(f"Error: The file '{config_file}' was not found.")
-        return default_paths
+        # Without rsyslog the syslog facilities only live in the journal; dpkg, boot and dmesg still write their own files
+        print(f"'{config_file}' was not found, reading syslog facilities from the journal.")
+        log_files = {file_name: path for file_name, path in default_paths.items() if file_name not in RSYSLOG_LOG_FILES}
+        log_files["journal"] = JOURNAL_PATH
+        return log_files
 
 # Function to monitor and update database in case of changes
 def monitor_changes():
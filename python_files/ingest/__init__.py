@@ -0,0 +1,20 @@
+"""Log ingestion: parse system logs and the journal, keep the lines matching each
+file's patterns and store them in anomalous_logs.
+
+Sources (sources.py) read new data from a checkpoint, parsers (parsers.py) turn
+it into entries, a Pipeline (pipeline.py) matches and deduplicates them for one
+database and a MySQLSink (sink.py) stores them. IngestRunner (runner.py) runs
+several pipelines in one process.
+"""
+from .parsers import PARSING_FUNCTIONS, register_parser
+from .sources import FileSource, JournalSource, make_source
+from .sink import MySQLSink, LogBatchWriter
+from .pipeline import Pipeline
+from .runner import IngestRunner, run
+
+__all__ = [
+    "PARSING_FUNCTIONS", "register_parser",
+    "FileSource", "JournalSource", "make_source",
+    "MySQLSink", "LogBatchWriter",
+    "Pipeline", "IngestRunner", "run",
+]
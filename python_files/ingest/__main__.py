@@ -0,0 +1,36 @@
+"""Command line entry point: python -m ingest --database Threat_Erase --database Threat_Erase_DB:desc"""
+import argparse
+import logging
+
+from .benchmark import BENCHMARKS
+from .config import DEFAULT_DATABASE, DEFAULT_DESCRIPTION_COLUMN, LOG_WORKERS
+from .pipeline import Pipeline
+from .runner import run
+
+def parse_database(value):
+    """Splits a DATABASE[:DESCRIPTION_COLUMN] argument."""
+    database, _, column = value.partition(':')
+    return database, column or DEFAULT_DESCRIPTION_COLUMN
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ingest", description="Ingest anomalous log entries into one or more databases.")
+    parser.add_argument("--database", action="append", type=parse_database, metavar="NAME[:COLUMN]",
+                        help="database to feed, optionally with its description column (repeatable, "
+                             f"default {DEFAULT_DATABASE}:{DEFAULT_DESCRIPTION_COLUMN})")
+    parser.add_argument("--workers", type=int, default=LOG_WORKERS, help="log files processed in parallel")
+    parser.add_argument("--log-level", default="INFO", help="logging level")
+    parser.add_argument("--benchmark", choices=sorted(BENCHMARKS), help="run a micro-benchmark instead of ingesting")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.benchmark:
+        BENCHMARKS[args.benchmark]()
+        return
+    databases = args.database or [(DEFAULT_DATABASE, DEFAULT_DESCRIPTION_COLUMN)]
+    pipelines = [Pipeline.for_database(database, column, pool_size=args.workers + 1) for database, column in databases]
+    for pipeline in pipelines:
+        pipeline.sink.ensure_schema()  # tables.py only sets up Threat_Erase, not Threat_Erase_DB
+    run(pipelines, max_workers=args.workers)
+
+if __name__ == "__main__":
+    main()
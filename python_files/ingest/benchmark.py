@@ -0,0 +1,148 @@
+"""Micro-benchmarks for the ingestion hot paths: python -m ingest --benchmark NAME"""
+import time
+import hashlib
+import logging
+import tempfile
+
+import mysql.connector
+
+from .config import DEFAULT_DATABASE, database_config
+from .dedup import LOG_ID_SCHEMES
+from .parsers import PARSING_FUNCTIONS
+from .sources import iter_new_lines, new_checkpoint
+
+TAILING_FILE_SIZES = (1, 16, 128)  # MB of log already on disk before each tailing run
+TAILING_APPEND_SIZES = (4, 64, 1024)  # KB appended between two passes
+TAILING_CYCLES = 20  # Passes timed per size combination
+PARSER_LINES = 200000  # Lines fed to each parser
+PARSER_SAMPLES = {  # Log file name -> representative lines, cycled through
+    "kern.log": ["2024-05-01T10:00:00.123456+00:00 host kernel: [12345.678901] usb 1-1: new high-speed USB device number 4",
+                 "2024-05-01T10:00:01.000000+00:00 host kernel: [12346.000001] audit: type=1400 apparmor=\"DENIED\" pid=[4321]"],
+    "auth.log": ["2024-05-01T10:00:00.123456+00:00 host sshd[2211]: Failed password for root from 10.0.0.5 port 22 ssh2",
+                 "May  1 10:00:00 host sudo[3310]: alice : TTY=pts/0 ; PWD=/home/alice ; COMMAND=/usr/bin/apt update"],
+    "cron.log": ["2024-05-01T10:00:00.123456+00:00 host CRON[5120]: (root) CMD (run-parts /etc/cron.hourly)",
+                 "May  1 10:00:00 host cron[812]: (CRON) INFO (Running @reboot jobs)"],
+    "dmesg": ["[    2.345678] EXT4-fs (sda1): mounted filesystem with ordered data mode",
+              "[ 1234.000001] Out of memory: Killed process 4321 (chrome)"],
+    "dpkg.log": ["2024-05-01 10:00:00 install openssh-server:amd64 <none> 1:9.6p1-3",
+                 "2024-05-01 10:00:01 status half-configured openssh-server:amd64 1:9.6p1-3"],
+    "boot.log": ["[  OK  ] Started Network Manager.",
+                 "[FAILED] Failed to start Load Kernel Modules."],
+}
+LOG_ID_ROWS = 200000  # Ids hashed, and rows inserted into each scratch table
+LOG_ID_DATABASE_SUFFIX = "_log_id_bench"  # The insert benchmark works on a scratch database
+LOG_ID_COLUMNS = {  # How each scheme's id is stored
+    "sha256-hex": "CHAR(64)",
+    "sha256": "BINARY(16)",
+    "blake2b": "BINARY(16)",
+}
+SAMPLE_LINE = b"2024-05-01T10:00:00.000000+00:00 host kernel: [12345.678901] usb 1-1: new high-speed USB device\n"
+
+def _fill(file, size):
+    """Appends about size bytes of SAMPLE_LINE to file."""
+    file.write(SAMPLE_LINE * (size // len(SAMPLE_LINE) + 1))
+    file.flush()
+
+def benchmark_tailing(file_sizes=TAILING_FILE_SIZES, append_sizes=TAILING_APPEND_SIZES, cycles=TAILING_CYCLES):
+    """Reports the cost of one tailing pass by file size and bytes appended since the previous pass.
+
+    Each pass resumes from its checkpoint, so the cost should follow the
+    appended bytes and stay flat as the file grows.
+    """
+    print(f"{'file MB':>8} {'append KB':>10} {'ms/pass':>9} {'MB/s':>8}")
+    for file_size in file_sizes:
+        for append_size in append_sizes:
+            with tempfile.NamedTemporaryFile(suffix=".log") as file:
+                _fill(file, file_size * 1024 * 1024)
+                checkpoint = new_checkpoint()
+                for _ in iter_new_lines(file.name, checkpoint):
+                    pass  # Start the timed passes from the end of the existing data
+                elapsed = 0.0
+                bytes_read = 0
+                for _ in range(cycles):
+                    _fill(file, append_size * 1024)
+                    offset = checkpoint['offset']
+                    started = time.perf_counter()
+                    for _ in iter_new_lines(file.name, checkpoint):
+                        pass
+                    elapsed += time.perf_counter() - started
+                    bytes_read += checkpoint['offset'] - offset
+            print(f"{file_size:>8} {append_size:>10} {elapsed / cycles * 1000:>9.3f} "
+                  f"{bytes_read / elapsed / 1024 / 1024:>8.1f}")
+
+def benchmark_parsers(lines=PARSER_LINES, samples=PARSER_SAMPLES):
+    """Reports how many lines per second each registered parser turns into entries."""
+    print(f"{'parser':>10} {'lines/s':>10} {'parsed':>8}")
+    for file_name, sample in samples.items():
+        parsing_function = PARSING_FUNCTIONS[file_name]
+        batch = [sample[i % len(sample)] + "\n" for i in range(lines)]
+        parsing_function(batch[0], file_name)  # Read the boot id and boot time outside the timing
+        started = time.perf_counter()
+        parsed = sum(1 for line in batch if parsing_function(line, file_name) is not None)
+        elapsed = time.perf_counter() - started
+        print(f"{file_name:>10} {lines / elapsed:>10.0f} {parsed / lines:>8.0%}")
+
+def _sha256_hex_log_id(data):
+    return hashlib.sha256(data).hexdigest()  # The 64-character key log ids had before BINARY(16)
+
+def _insert_log_ids(cursor, ids_by_scheme):
+    """Inserts every scheme's ids into its own keyed table; returns {scheme: (rows/s, index bytes)}."""
+    results = {}
+    for scheme, ids in ids_by_scheme.items():
+        table = "log_ids_" + scheme.replace("-", "_")
+        cursor.execute(f"CREATE TABLE {table} (log_id {LOG_ID_COLUMNS[scheme]} NOT NULL PRIMARY KEY, "
+                       "seq INT NOT NULL, KEY seq (seq)) ENGINE=InnoDB")
+        started = time.perf_counter()
+        for start in range(0, len(ids), 1000):
+            cursor.executemany(f"INSERT INTO {table} (log_id, seq) VALUES (%s, %s)",
+                               [(log_id, start + i) for i, log_id in enumerate(ids[start:start + 1000])])
+            cursor.execute("COMMIT")
+        elapsed = time.perf_counter() - started
+        cursor.execute(f"ANALYZE TABLE {table}")
+        cursor.fetchall()
+        cursor.execute("SELECT data_length + index_length FROM information_schema.tables "
+                       "WHERE table_schema = DATABASE() AND table_name = %s", (table,))
+        results[scheme] = (len(ids) / elapsed, cursor.fetchone()[0])
+    return results
+
+def benchmark_log_ids(rows=LOG_ID_ROWS, database=DEFAULT_DATABASE):
+    """Compares the old hex SHA-256 log ids with the BINARY(16) schemes.
+
+    Hashing runs everywhere; the insert rate and on-disk size of a table keyed
+    by each id type are measured in a scratch database when MySQL is reachable.
+    """
+    payloads = [f"2024-05-01 10:00:00{i}kern.logusb 1-1: new high-speed USB device number {i}".encode()
+                for i in range(rows)]
+    schemes = {"sha256-hex": _sha256_hex_log_id, **LOG_ID_SCHEMES}
+    ids_by_scheme = {}
+    print(f"{'scheme':>10} {'ids/s':>10} {'key bytes':>9}")
+    for scheme, log_id in schemes.items():
+        started = time.perf_counter()
+        ids_by_scheme[scheme] = [log_id(payload) for payload in payloads]
+        elapsed = time.perf_counter() - started
+        print(f"{scheme:>10} {rows / elapsed:>10.0f} {len(ids_by_scheme[scheme][0]):>9}")
+
+    scratch = database + LOG_ID_DATABASE_SUFFIX
+    config = {key: value for key, value in database_config(database).items() if key != "database"}
+    try:
+        connection = mysql.connector.connect(**config)
+    except mysql.connector.Error as e:
+        logging.warning(f"Skipping the insert benchmark, MySQL is unavailable: {e}")
+        return
+    with connection, connection.cursor(buffered=True) as cursor:
+        cursor.execute(f"DROP DATABASE IF EXISTS {scratch}")
+        cursor.execute(f"CREATE DATABASE {scratch}")
+        cursor.execute(f"USE {scratch}")
+        try:
+            results = _insert_log_ids(cursor, ids_by_scheme)
+        finally:
+            cursor.execute(f"DROP DATABASE IF EXISTS {scratch}")
+    print(f"{'scheme':>10} {'rows/s':>10} {'table MB':>9}")
+    for scheme, (rate, size) in results.items():
+        print(f"{scheme:>10} {rate:>10.0f} {size / 1024 / 1024:>9.1f}")
+
+BENCHMARKS = {
+    "log-ids": benchmark_log_ids,
+    "parsers": benchmark_parsers,
+    "tailing": benchmark_tailing,
+}
@@ -0,0 +1,40 @@
+import os
+
+# --- Database Configuration ---
+DEFAULT_DATABASE = os.environ.get('MYSQL_DB', 'Threat_Erase')
+DEFAULT_DESCRIPTION_COLUMN = 'description'  # Threat_Erase_DB names this column `desc`
+
+def database_config(database):
+    """Returns the mysql.connector settings for one of the ingestion databases."""
+    return {
+        'host': os.environ.get('MYSQL_HOST', 'localhost'),
+        'user': os.environ.get('MYSQL_USER', 'admin'),
+        'password': os.environ.get('MYSQL_PASSWORD', 'password'),
+        'database': database
+    }
+
+# --- Table Names ---
+LOG_TABLE_NAME = 'anomalous_logs'
+KEYWORD_TABLE_NAME = 'patterns'
+FILE_PATHS_TABLE_NAME = 'file_paths'
+LAST_PROCESSED_TABLE_NAME = 'last_processed'
+LOG_SETTINGS_TABLE_NAME = 'log_settings'
+
+# --- Tunables ---
+FILE_PATHS_REFRESH_INTERVAL = 60  # Refresh log file paths every 60 seconds
+SEEN_LOGS_EXPIRATION_TIME = 86400  # Remove log IDs from seen_logs after 24 hours (in seconds)
+LOG_ID_SIZE = 16  # Bytes in a log id, stored as BINARY(16)
+LOG_ID_SCHEME = os.environ.get('LOG_ID_SCHEME', 'blake2b')  # Key of LOG_ID_SCHEMES for databases whose log_settings name none
+DEDUP_BUCKETS = 24  # Time buckets the dedup window is split into, one expires at a time
+DEDUP_MAX_ENTRIES = int(os.environ.get('DEDUP_MAX_ENTRIES', 500000))  # Memory ceiling for remembered log ids, per pipeline
+READ_CHUNK_SIZE = 1024 * 1024  # Bytes read from a log file per read() call
+ROTATED_SUFFIX = '.1'  # Name logrotate gives the previous generation of a log
+BATCH_MAX_ROWS = 500  # Flush buffered log entries once this many rows are pending...
+BATCH_MAX_AGE = 5  # ...or once the oldest pending row is this many seconds old
+EVENT_COALESCE_DELAY = 0.05  # Seconds to wait after the first event so a burst is handled in one pass
+FULL_SCAN_INTERVAL = 300  # Process every log file at least this often in case an event was missed
+LOG_WORKERS = int(os.environ.get('LOG_WORKERS', 4))  # Log files processed in parallel, across all pipelines
+MAX_BYTES_PER_PASS = 8 * 1024 * 1024  # Bytes read from one file before yielding the worker to other files
+JOURNAL_PATH = 'journal'  # file_paths entry that stands for the live systemd journal
+JOURNAL_EXPORT_SUFFIX = '.export'  # Files in `journalctl -o export` format are read as journal records
+JOURNAL_MAX_ENTRIES_PER_PASS = 20000  # Journal records read before yielding the worker to other files
@@ -0,0 +1,81 @@
+"""Log ids and the in-memory cache that drops duplicate entries before they reach MySQL."""
+import time
+import hashlib
+import threading
+from collections import deque
+
+from .config import LOG_ID_SIZE, LOG_ID_SCHEME, SEEN_LOGS_EXPIRATION_TIME, DEDUP_BUCKETS, DEDUP_MAX_ENTRIES
+
+def _blake2b_log_id(data):
+    return hashlib.blake2b(data, digest_size=LOG_ID_SIZE).digest()
+
+def _sha256_log_id(data):
+    # Matches the ids of rows migrated from the old 64-character hex SHA-256 keys
+    return hashlib.sha256(data).digest()[:LOG_ID_SIZE]
+
+LOG_ID_SCHEMES = {
+    "blake2b": _blake2b_log_id,
+    "sha256": _sha256_log_id,
+}
+
+def generate_log_id(timestamp, pid, file_name, description, scheme=LOG_ID_SCHEME):
+    """Generates a LOG_ID_SIZE-byte binary ID for a log entry using the given key of LOG_ID_SCHEMES."""
+    log_string = f"{timestamp}{pid}{file_name}{description}".encode('utf-8')
+    return LOG_ID_SCHEMES[scheme](log_string)
+
+class LogDedupCache:
+    """Remembers recently ingested log ids so duplicates are dropped before reaching MySQL.
+
+    Ids live in a ring of time buckets covering SEEN_LOGS_EXPIRATION_TIME.
+    Expiry drops the oldest bucket as a whole instead of scanning every id,
+    and once max_entries ids are held the oldest buckets are dropped early,
+    which caps memory use.
+    """
+
+    def __init__(self, window=SEEN_LOGS_EXPIRATION_TIME, bucket_count=DEDUP_BUCKETS, max_entries=DEDUP_MAX_ENTRIES):
+        self.bucket_span = window / bucket_count
+        self.bucket_count = bucket_count
+        self.max_entries = max_entries
+        self.buckets = deque([set()])
+        self.bucket_started = time.monotonic()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def _drop_oldest(self):
+        self.size -= len(self.buckets.popleft())
+
+    def _rotate(self, now):
+        elapsed_buckets = int((now - self.bucket_started) // self.bucket_span)
+        if elapsed_buckets <= 0:
+            return
+        for _ in range(min(elapsed_buckets, self.bucket_count)):
+            self.buckets.append(set())
+            if len(self.buckets) > self.bucket_count:
+                self._drop_oldest()
+        self.bucket_started += elapsed_buckets * self.bucket_span
+
+    def add(self, log_id):
+        """Records log_id; returns False if it was already seen within the window."""
+        with self.lock:
+            self._rotate(time.monotonic())
+            for bucket in self.buckets:
+                if log_id in bucket:
+                    return False
+            self.buckets[-1].add(log_id)
+            self.size += 1
+            while self.size > self.max_entries and len(self.buckets) > 1:
+                self._drop_oldest()
+            if self.size > self.max_entries:
+                self.buckets[-1].clear()
+                self.size = 0
+            return True
+
+    def discard(self, log_ids):
+        """Forgets log ids whose batch was rolled back, so they are accepted again on retry."""
+        with self.lock:
+            for log_id in log_ids:
+                for bucket in self.buckets:
+                    if log_id in bucket:
+                        bucket.remove(log_id)
+                        self.size -= 1
+                        break
@@ -0,0 +1,24 @@
+import re
+
+class KeywordMatcher:
+    """Matches descriptions against every keyword of a file with one compiled regex.
+
+    All keywords are folded into a single case-insensitive alternation, so a
+    description is scanned once regardless of how many patterns are loaded.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = frozenset(keywords)
+        self.patterns_by_keyword = {}
+        for keyword in keywords:
+            self.patterns_by_keyword.setdefault(keyword.lower(), keyword)
+        # Longest first, so overlapping keywords report the most specific pattern
+        alternatives = sorted(self.patterns_by_keyword, key=len, reverse=True)
+        self.regex = re.compile("|".join(map(re.escape, alternatives))) if alternatives else None
+
+    def match(self, description):
+        """Returns the pattern found in the description, or None."""
+        if self.regex is None:
+            return None
+        match = self.regex.search(description.lower())
+        return self.patterns_by_keyword[match.group(0)] if match else None
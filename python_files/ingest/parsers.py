@@ -0,0 +1,364 @@
+"""Line parsers that turn raw log lines and journal records into log entries.
+
+Every entry is a dict with timestamp, pid, file_name, description, priority
+and original_timestamp. Parsers are looked up by log file name in
+PARSING_FUNCTIONS; new formats are added with @register_parser.
+"""
+import re
+import logging
+import datetime
+import functools
+import uuid
+
+# --- Utility Functions ---
+FACILITY_MAPPING = {
+    "kernel": 0, "user": 1, "mail": 2, "daemon": 3, "auth": 4,
+    "syslog": 5, "lpr": 6, "news": 7, "uucp": 8, "cron": 9,
+    "authpriv": 10, "ftp": 11, "ntp": 12, "audit": 13, "alert": 14,
+    "clock": 15, "local0": 16, "local1": 17, "local2": 18, "local3": 19,
+    "local4": 20, "local5": 21, "local6": 22, "local7": 23
+}
+SEVERITY_MAPPING = {
+    "emergency": 0, "alert": 1, "critical": 2, "error": 3, "warning": 4,
+    "notice": 5, "informational": 6, "debug": 7
+}
+SEVERITY_ITEMS = tuple(SEVERITY_MAPPING.items())  # Checked in order, first hit wins
+FACILITY_REGEX = re.compile(r'\<([0-9]+)\>')
+
+def calculate_priority(message):
+    facility = 1  # Default to user-level messages
+    severity = 6  # Default to informational
+
+    lowered = message.lower()
+    for keyword, value in SEVERITY_ITEMS:
+        if keyword in lowered:
+            severity = value
+            break
+
+    facility_match = FACILITY_REGEX.search(message)
+    if facility_match:
+        facility = int(facility_match.group(1))
+
+    return facility * 8 + severity
+
+def convert_iso_timestamp(timestamp_str):
+    """Convert an ISO 8601 timestamp (e.g. "2025-02-25T16:30:01.123456+05:30") to 'YYYY-MM-DD HH:MM:SS'."""
+    try:
+        return datetime.datetime.strptime(timestamp_str[:26], "%Y-%m-%dT%H:%M:%S.%f").strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+
+def convert_syslog_timestamp(timestamp_str):
+    """Convert a syslog timestamp (e.g. "Feb 25 16:30:01") to 'YYYY-MM-DD HH:MM:SS' in the current year."""
+    try:
+        dt_obj = datetime.datetime.strptime(timestamp_str, "%b %d %H:%M:%S")
+    except ValueError:
+        return None
+    return dt_obj.replace(year=datetime.datetime.now().year).strftime("%Y-%m-%d %H:%M:%S")
+
+def convert_dpkg_timestamp(timestamp_str):
+    """Convert a dpkg.log timestamp (already 'YYYY-MM-DD HH:MM:SS') after validating it."""
+    try:
+        return datetime.datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+
+def convert_timestamp(timestamp_str):
+    """Convert various timestamp formats to 'YYYY-MM-DD HH:MM:SS'."""
+    return (convert_iso_timestamp(timestamp_str)
+            or convert_syslog_timestamp(timestamp_str)
+            or convert_dpkg_timestamp(timestamp_str))
+
+@functools.lru_cache(maxsize=None)
+def get_boot_id():
+    """Gets the current boot ID from /proc/sys/kernel/random/boot_id (read once per process)."""
+    try:
+        with open("/proc/sys/kernel/random/boot_id", "r") as f:
+            boot_id = f.read().strip()
+        return boot_id
+    except FileNotFoundError:
+        logging.warning("Boot ID file not found.  Returning 'unknown'.")
+        return "unknown"
+
+@functools.lru_cache(maxsize=None)
+def get_boot_time():
+    """Gets the boot time from /proc/stat (read once per process)."""
+    try:
+        with open("/proc/stat", "r") as f:
+            for line in f:
+                if line.startswith("btime"):
+                    return int(line.split()[1])
+    except FileNotFoundError:
+        logging.error("Cannot find /proc/stat to get boot time.")
+        return None
+    except Exception as e:
+        logging.error(f"Error reading /proc/stat: {e}")
+        return None
+
+@functools.lru_cache(maxsize=None)
+def get_boot_timestamp():
+    """Gets the boot time formatted as 'YYYY-MM-DD HH:MM:SS', or None if it is unknown."""
+    boot_time = get_boot_time()
+    if boot_time is None:
+        return None
+    return datetime.datetime.fromtimestamp(boot_time).strftime("%Y-%m-%d %H:%M:%S")
+
+# --- Parsing Functions ---
+# Every regex is compiled once here instead of on each call to re.match.
+ISO_PREFIX = r'^([\d\-T:+\.\+]+)\s+([\w\-\.]+)\s+'
+SYSLOG_LINE_REGEX = re.compile(r'^(\w+\s+\d+\s+\d+:\d+:\d+)\s+[\S]+\s+(\S+)(?:\[(\d+)\])?: (.*)$')
+KERN_LINE_REGEX = re.compile(ISO_PREFIX + r'kernel:\s+(.*)$')
+AUTH_LINE_REGEX = re.compile(ISO_PREFIX + r'([\w\[\]:]+):\s+(.*)$')
+BOOT_LINE_REGEX = re.compile(r'^\[ *(OK|FAILED) *\] (Started|Failed to start|Reached) (.+?)\.?$')
+CRON_LINE_REGEX = re.compile(ISO_PREFIX + r'CRON\[(\d+)\]:\s+(.*)$')
+DMESG_LINE_REGEX = re.compile(r'^\[(\d+\.\d+)\] (.*)$')
+DPKG_LINE_REGEX = re.compile(r'^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})\s+(\w+)\s+(.*)$')
+BRACKETED_PID_REGEX = re.compile(r'\[([0-9]+)\]')
+CRON_USER_REGEX = re.compile(r'\((\w+)\)')
+
+PARSING_FUNCTIONS = {}  # Log file name -> parser, filled in by @register_parser
+
+def register_parser(*file_names):
+    """Registers the decorated function as the line parser for the given log file names."""
+    def decorator(parsing_function):
+        for file_name in file_names:
+            PARSING_FUNCTIONS[file_name] = parsing_function
+        return parsing_function
+    return decorator
+
+def _syslog_entry(match, file_name):
+    """Builds an entry from a SYSLOG_LINE_REGEX match, shared by the auth and cron parsers."""
+    timestamp = match.group(1)
+    pid = match.group(3) if match.group(3) else "N/A"
+    message = match.group(4)
+    formatted_timestamp = convert_syslog_timestamp(timestamp)
+    if not formatted_timestamp:
+        logging.warning(f"Failed to convert syslog timestamp: {timestamp}")
+        return None
+    return {
+        "timestamp": formatted_timestamp,
+        "pid": pid,
+        "file_name": file_name,
+        "description": f"{message} [boot_id:{get_boot_id()}]",
+        "priority": calculate_priority(message),
+        "original_timestamp": timestamp  # Store the extracted timestamp
+    }
+
+def _boot_time_entry(line, file_name):
+    """Builds an entry stamped with the boot time for a line that carries no usable timestamp."""
+    stripped = line.strip()
+    if not stripped:
+        return None
+    boot_timestamp = get_boot_timestamp()
+    if boot_timestamp is None:
+        logging.warning(f"Could not get boot time. Skipping {file_name} entry.")
+        return None
+    return {
+        "timestamp": boot_timestamp,
+        "pid": "N/A",
+        "file_name": file_name,
+        "description": f"{stripped} [boot_id:{get_boot_id()}]",
+        "priority": calculate_priority(line),
+        "original_timestamp": None
+    }
+
+@register_parser("kern.log")
+def parse_kern_log_line(line, file_name):
+    match = KERN_LINE_REGEX.match(line)
+    if match:
+        timestamp = match.group(1)
+        message = match.group(3)
+        pid_match = BRACKETED_PID_REGEX.search(message)
+        pid = pid_match.group(1) if pid_match else "N/A"
+        formatted_timestamp = convert_iso_timestamp(timestamp)
+        if formatted_timestamp:
+            return {
+                "timestamp": formatted_timestamp,
+                "pid": pid,
+                "file_name": file_name,
+                "description": f"{message} [boot_id:{get_boot_id()}]",
+                "priority": calculate_priority(message),
+                "original_timestamp": timestamp  # Store the extracted timestamp
+            }
+        else:
+            logging.warning(f"Failed to convert ISO timestamp: {timestamp}")
+            return None  # Skip if timestamp conversion fails
+    return None
+
+@register_parser("auth.log")
+def parse_auth_log_line(line, file_name):
+    # Try the ISO timestamp format first
+    match = AUTH_LINE_REGEX.match(line)
+    if match:
+        timestamp = match.group(1)
+        process = match.group(3)
+        message = match.group(4)
+        pid_match = BRACKETED_PID_REGEX.search(process)  # Extract PID from process string
+        pid = pid_match.group(1) if pid_match else "N/A"
+        formatted_timestamp = convert_iso_timestamp(timestamp)
+        if formatted_timestamp:
+            return {
+                "timestamp": formatted_timestamp,
+                "pid": pid,
+                "file_name": file_name,
+                "description": f"{message} [boot_id:{get_boot_id()}]",
+                "priority": calculate_priority(message),
+                "original_timestamp": timestamp  # Store the extracted timestamp
+            }
+        else:
+            logging.warning(f"Failed to convert ISO timestamp: {timestamp}")
+            return None  # Skip if timestamp conversion fails
+
+    # Try the traditional syslog format
+    match = SYSLOG_LINE_REGEX.match(line)
+    if match:
+        return _syslog_entry(match, file_name)
+
+    return None
+
+@register_parser("boot.log")
+def parse_boot_log_line(line, file_name):
+    # Try to match systemd boot log format
+    match = BOOT_LINE_REGEX.match(line)
+    if match:
+        status, action, description = match.groups()
+        # Since boot.log does not provide a timestamp or PID, use boot time
+        boot_timestamp = get_boot_timestamp()
+        if boot_timestamp is not None:
+            return {
+                "timestamp": boot_timestamp,
+                "pid": "N/A",
+                "file_name": file_name,
+                "description": f"{status} {action} {description} [boot_id:{get_boot_id()}]",
+                "priority": calculate_priority(description if description else ""),
+                "original_timestamp": None  # Indicate no timestamp was found
+            }
+        else:
+            logging.warning("Could not get boot time. Skipping boot.log entry.")
+            return None
+
+    # If no match is found, still store the boot time
+    return _boot_time_entry(line, file_name)
+
+@register_parser("cron.log")
+def parse_cron_log_line(line, file_name):
+    # More flexible cron log parsing
+    match = CRON_LINE_REGEX.match(line)
+    if match:
+        timestamp = match.group(1)
+        pid = match.group(3)
+        message = match.group(4)
+        user_match = CRON_USER_REGEX.search(message)
+        user = user_match.group(1) if user_match else "unknown"
+        command = message.split(')')[1].strip() if user_match else message
+        formatted_timestamp = convert_iso_timestamp(timestamp)
+        if formatted_timestamp:
+            return {
+                "timestamp": formatted_timestamp,
+                "pid": pid,
+                "file_name": file_name,
+                "description": f"({user}) {command} [boot_id:{get_boot_id()}]",
+                "priority": calculate_priority(message),
+                "original_timestamp": timestamp  # Store the extracted timestamp
+            }
+
+    # Try a more general syslog format as fallback
+    match = SYSLOG_LINE_REGEX.match(line)
+    if match:
+        return _syslog_entry(match, file_name)
+
+    return None
+
+@register_parser("dmesg")
+def parse_dmesg_log_line(line, file_name):
+    match = DMESG_LINE_REGEX.match(line)
+    if match:
+        timestamp_sec, description = match.groups()
+        boot_time = get_boot_time()
+
+        if boot_time is not None:
+            # Calculate the absolute timestamp by adding the relative timestamp to the boot time
+            absolute_timestamp = datetime.datetime.fromtimestamp(boot_time + float(timestamp_sec)).strftime("%Y-%m-%d %H:%M:%S")
+
+            return {
+                "timestamp": absolute_timestamp,
+                "pid": "N/A",
+                "file_name": file_name,
+                "description": f"{description} [boot_id:{get_boot_id()}]",
+                "priority": calculate_priority(description),
+                "original_timestamp": timestamp_sec  # Store the extracted timestamp
+            }
+        else:
+            logging.warning("Could not get boot time. Skipping dmesg entry.")
+            return None
+
+    # If no relative time is found, store only the boot time
+    return _boot_time_entry(line, file_name)
+
+@register_parser("dpkg.log")
+def parse_dpkg_log_line(line, file_name):
+    match = DPKG_LINE_REGEX.match(line)
+    if match:
+        timestamp = match.group(1)
+        action = match.group(2)
+        message = match.group(3)
+        pid_match = BRACKETED_PID_REGEX.search(message)
+        pid = pid_match.group(1) if pid_match else "N/A"
+        formatted_timestamp = convert_dpkg_timestamp(timestamp)
+        if formatted_timestamp:
+            return {
+                "timestamp": formatted_timestamp,
+                "pid": pid,
+                "file_name": file_name,
+                "description": f"{action} {message} [boot_id:{get_boot_id()}]",
+                "priority": calculate_priority(message),
+                "original_timestamp": timestamp  # Store the extracted timestamp
+            }
+    return None
+
+# --- Journal Records ---
+# Text log a journal record would have gone to under rsyslog's default rules
+# (/etc/rsyslog.d/50-default.conf, with cron.log enabled as in DEFAULT_LOG_PATHS),
+# so it is matched against that file's patterns and stored under its name
+JOURNAL_FACILITY_FILES = {0: "kern.log", 2: "mail.log", 4: "auth.log", 9: "cron.log", 10: "auth.log"}
+JOURNAL_DEFAULT_FILE = "syslog"
+JOURNAL_FILE_NAMES = frozenset(JOURNAL_FACILITY_FILES.values()) | {JOURNAL_DEFAULT_FILE}
+
+def journal_file_name(fields):
+    """The legacy log file name for a journal record, from its transport and syslog facility."""
+    if fields.get('_TRANSPORT') == 'kernel':
+        return JOURNAL_FACILITY_FILES[0]
+    try:
+        facility = int(fields.get('SYSLOG_FACILITY'))
+    except (TypeError, ValueError):
+        return JOURNAL_DEFAULT_FILE  # Native journal messages and service output have no facility
+    return JOURNAL_FACILITY_FILES.get(facility, JOURNAL_DEFAULT_FILE)
+
+def journal_fields_to_log_entry(fields):
+    """Builds a log entry from structured journal fields, without any regex parsing.
+
+    Accepts both the converted values python-systemd returns and the raw
+    strings of an export file. file_name is the text log the record
+    belongs to, see journal_file_name().
+    """
+    message = fields.get('MESSAGE')
+    if message is None:
+        return None
+    if isinstance(message, bytes):
+        message = message.decode('utf-8', errors='ignore')
+    realtime = fields.get('__REALTIME_TIMESTAMP')
+    if realtime is None:
+        return None
+    if not isinstance(realtime, datetime.datetime):
+        realtime = datetime.datetime.fromtimestamp(int(realtime) / 1000000)
+    boot_id = fields.get('_BOOT_ID')
+    boot_id = str(uuid.UUID(str(boot_id))) if boot_id else get_boot_id()
+    identifier = fields.get('SYSLOG_IDENTIFIER') or fields.get('_COMM') or "unknown"
+    return {
+        "timestamp": realtime.strftime("%Y-%m-%d %H:%M:%S"),
+        "pid": str(fields.get('_PID') or fields.get('SYSLOG_PID') or "N/A"),
+        "file_name": journal_file_name(fields),
+        "description": f"{identifier}: {message} [boot_id:{boot_id}]",
+        "priority": int(fields.get('SYSLOG_FACILITY', 1)) * 8 + int(fields.get('PRIORITY', 6)),
+        "original_timestamp": realtime.isoformat()
+    }
@@ -0,0 +1,168 @@
+"""A pipeline ties the configured log sources of one database to its sink."""
+import os
+import time
+import logging
+import threading
+import mysql.connector
+
+from .config import LOG_WORKERS, JOURNAL_PATH
+from .dedup import LogDedupCache, generate_log_id
+from .matcher import KeywordMatcher
+from .sink import MySQLSink, LogBatchWriter
+from .sources import make_source, is_journal_source
+
+class Pipeline:
+    """Reads the sources listed in a database's file_paths table and stores matching entries there.
+
+    Keyword matchers, the dedup cache and the per-file metrics belong to the
+    pipeline, so several databases can be fed from one process without
+    their patterns or seen log ids mixing.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.name = sink.database
+        self.log_files = {}  # File name -> path, refreshed from the file_paths table
+        self.log_files_lock = threading.Lock()
+        self.sources = {}  # Path -> source, built on first use
+        self.sources_lock = threading.Lock()
+        self.keyword_matchers = {}  # Compiled KeywordMatcher per tuple of file names, rebuilt when their patterns change
+        self.keyword_matchers_lock = threading.Lock()
+        self.seen_logs = LogDedupCache()  # Log ids ingested in the last SEEN_LOGS_EXPIRATION_TIME seconds
+        self.file_metrics = {}  # Per-file totals and last pass timing, see record_file_metrics()
+        self.file_metrics_lock = threading.Lock()
+
+    @classmethod
+    def for_database(cls, database, description_column='description', pool_size=LOG_WORKERS + 1):
+        return cls(MySQLSink(database, description_column, pool_size))
+
+    def paths(self):
+        with self.log_files_lock:
+            return set(self.log_files.values())
+
+    def watches(self, file_path):
+        with self.log_files_lock:
+            return file_path in self.log_files.values()
+
+    def refresh_file_paths(self):
+        """Reloads the configured paths; returns the paths that were added, or None if the query failed."""
+        try:
+            with self.sink.connection() as db_conn:
+                if not db_conn:
+                    return None
+                with db_conn.cursor() as cursor:
+                    file_paths = self.sink.fetch_file_paths(cursor)
+        except mysql.connector.Error as e:
+            logging.error(f"MySQL error fetching file paths for {self.name}: {e}")
+            return None
+        if file_paths is None:
+            return None
+        with self.log_files_lock:
+            previous_paths = set(self.log_files.values())
+            self.log_files = {os.path.basename(path): path for path in file_paths}
+            current_paths = set(self.log_files.values())
+        logging.info(f"Updated log file paths for {self.name}: {self.log_files}")
+        return current_paths - previous_paths
+
+    def get_source(self, file_path):
+        with self.sources_lock:
+            if file_path not in self.sources:
+                self.sources[file_path] = make_source(file_path)
+            source = self.sources[file_path]
+        if file_path == JOURNAL_PATH and source is not None:
+            # The live journal also holds every facility rsyslog copies into the configured text logs
+            with self.log_files_lock:
+                source.skipped_file_names = frozenset(name for name, path in self.log_files.items()
+                                                      if not is_journal_source(path))
+        return source
+
+    def get_keyword_matcher(self, cursor, file_names):
+        """Returns the cached matcher for the patterns of file_names, rebuilding it only when they changed."""
+        keywords = set()
+        for file_name in file_names:
+            file_keywords = self.sink.fetch_keywords(cursor, file_name)
+            if file_keywords is None:
+                keywords = None
+                break
+            keywords.update(file_keywords)
+        with self.keyword_matchers_lock:
+            matcher = self.keyword_matchers.get(file_names)
+            if keywords is None:
+                # Keep matching with the last known patterns while the database is unavailable
+                return matcher or KeywordMatcher([])
+            if matcher is None or matcher.keywords != frozenset(keywords):
+                logging.info(f"Compiling {len(keywords)} patterns for {'/'.join(file_names)} in {self.name}")
+                matcher = KeywordMatcher(keywords)
+                self.keyword_matchers[file_names] = matcher
+            return matcher
+
+    def process(self, file_path):
+        """Processes what was appended to a source since the last run and inserts relevant entries into the database.
+
+        Reads at most one pass budget per call and returns True if more data is
+        waiting, so a busy log can be requeued behind the other files.
+        """
+        source = self.get_source(file_path)
+        if source is None:
+            return False
+
+        file_name = source.file_name
+        logging.debug(f"Processing log file: {file_name} for {self.name}")
+        started = time.monotonic()
+        line_count = match_count = 0
+        try:
+            with self.sink.connection() as db_conn:
+                if not db_conn:
+                    return False
+                with db_conn.cursor(buffered=True) as cursor:
+                    # Fetch keywords and the read checkpoint from the database for the current file
+                    matchers = {entry_file_name: self.get_keyword_matcher(cursor, pattern_files)
+                                for entry_file_name, pattern_files in source.pattern_sets().items()}
+                    checkpoint = self.sink.get_checkpoint(cursor, file_name)
+                    log_id_scheme = self.sink.get_log_id_scheme(cursor)
+                if checkpoint is None or log_id_scheme is None:
+                    return False  # Never fall back to a full re-read or the wrong ids because of a transient DB error
+                start_offset = checkpoint['offset']
+
+                writer = LogBatchWriter(self.sink, db_conn, file_name)
+                try:
+                    for log_entry in source.read_entries(checkpoint):
+                        line_count += 1
+                        matcher = matchers.get(log_entry['file_name']) if log_entry else None
+                        if matcher is not None:
+                            matched_pattern = matcher.match(log_entry['description'])
+                            if matched_pattern is not None:
+                                match_count += 1
+                                log_id = generate_log_id(log_entry['timestamp'], log_entry['pid'], log_entry['file_name'],
+                                                         log_entry['description'], log_id_scheme)
+                                if self.seen_logs.add(log_id):
+                                    writer.add(log_entry, log_id, matched_pattern)
+                        if writer.should_flush() and not writer.flush(checkpoint):
+                            return False  # Retry from the last committed checkpoint next cycle
+
+                    # Store the final checkpoint even when no entries matched
+                    if not writer.flush(checkpoint):
+                        return False
+                finally:
+                    # Whatever was not committed is re-read from the checkpoint, so its ids must not count as seen
+                    self.seen_logs.discard(row[0] for row in writer.rows)
+        except mysql.connector.Error as e:
+            logging.error(f"MySQL error processing {file_name} for {self.name}: {e}")
+            return False  # Retry from the last committed checkpoint next cycle
+
+        self.record_file_metrics(file_path, time.monotonic() - started, checkpoint['offset'] - start_offset, line_count, match_count)
+        return source.has_more(checkpoint)
+
+    def record_file_metrics(self, file_path, duration, byte_count, line_count, match_count):
+        """Stores and logs the timing of one processing pass over a log file."""
+        with self.file_metrics_lock:
+            metrics = self.file_metrics.setdefault(file_path, {"passes": 0, "seconds": 0.0, "bytes": 0, "lines": 0, "matches": 0})
+            metrics["passes"] += 1
+            metrics["seconds"] += duration
+            metrics["bytes"] += max(byte_count, 0)
+            metrics["lines"] += line_count
+            metrics["matches"] += match_count
+            metrics["last_pass_seconds"] = duration
+        if line_count:
+            logging.info(f"{self.name}/{os.path.basename(file_path)}: {line_count} lines, {max(byte_count, 0)} bytes, "
+                         f"{match_count} matches in {duration * 1000:.1f} ms")
@@ -0,0 +1,169 @@
+"""Runs any number of pipelines in one process on a shared worker pool and inotify observer."""
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+from .config import (LOG_WORKERS, FILE_PATHS_REFRESH_INTERVAL, FULL_SCAN_INTERVAL, EVENT_COALESCE_DELAY,
+                     JOURNAL_PATH)
+from .sources import journal, watch_journal
+
+class LogFileDispatcher:
+    """Processes log files on a bounded thread pool, keeping each file's passes in order.
+
+    Work items are (pipeline, file_path) pairs. A pair is never processed by
+    two workers at once: a change reported while it is running is remembered
+    and handled by one follow-up pass. A file that still has data after its
+    pass budget is resubmitted to the back of the queue, so one noisy log
+    cannot starve the others.
+    """
+
+    def __init__(self, max_workers=LOG_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self.lock = threading.Lock()
+        self.running = set()
+        self.rerun = set()
+
+    def submit(self, pipeline, file_path):
+        """Schedules a pass over file_path unless one is already queued or running."""
+        key = (pipeline, file_path)
+        with self.lock:
+            if key in self.running:
+                self.rerun.add(key)
+                return
+            self.running.add(key)
+        self.executor.submit(self._run, key)
+
+    def _run(self, key):
+        pipeline, file_path = key
+        try:
+            has_more = pipeline.process(file_path)
+        except Exception as e:
+            logging.error(f"Error processing {file_path} for {pipeline.name}: {e}")
+            has_more = False
+        with self.lock:
+            if has_more or key in self.rerun:
+                self.rerun.discard(key)
+                resubmit = True
+            else:
+                self.running.discard(key)
+                resubmit = False
+        if resubmit:
+            self.executor.submit(self._run, key)
+
+class LogFileEventHandler(FileSystemEventHandler):
+    """Turns inotify events in the watched directories into pending log files.
+
+    A modification of a watched file, a file being created at a watched path
+    (logrotate's new generation) and a watched file being renamed away
+    (logrotate moving it to '.1') all queue that path for every pipeline
+    that reads it.
+    """
+
+    def __init__(self, runner):
+        super().__init__()
+        self.runner = runner
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.runner.mark_changed([event.src_path])
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.runner.mark_changed([event.src_path])
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.runner.mark_changed([event.src_path, event.dest_path])
+
+class IngestRunner:
+    """Feeds change notifications for all pipelines into one LogFileDispatcher."""
+
+    def __init__(self, pipelines, max_workers=LOG_WORKERS):
+        self.pipelines = list(pipelines)
+        self.dispatcher = LogFileDispatcher(max_workers)
+        self.observer = Observer()
+        self.watched_paths = set()
+        self.pending = set()  # (pipeline, file_path) pairs with changes that still have to be processed
+        self.pending_lock = threading.Lock()
+        self.changed = threading.Event()  # Set whenever pending gains a pair
+
+    def mark_changed(self, file_paths, pipelines=None):
+        """Queues file paths for every pipeline (of the given ones) that reads them and wakes up the main loop."""
+        pairs = {(pipeline, path) for pipeline in (pipelines or self.pipelines)
+                 for path in file_paths if pipeline.watches(path)}
+        if not pairs:
+            return
+        with self.pending_lock:
+            self.pending.update(pairs)
+        self.changed.set()
+
+    def watch_log_files(self, file_paths):
+        """Replaces the observer's watches with one non-recursive watch per log directory."""
+        self.observer.unschedule_all()
+        handler = LogFileEventHandler(self)
+        for directory in sorted({os.path.dirname(path) for path in file_paths if path != JOURNAL_PATH}):
+            try:
+                self.observer.schedule(handler, path=directory, recursive=False)
+            except OSError as e:
+                logging.error(f"Cannot watch {directory}: {e}")
+        logging.info(f"Watching log directories for: {sorted(file_paths)}")
+
+    def monitor_log_file_paths(self):
+        """Refreshes every pipeline's paths from its database, updating the inotify watches."""
+        while True:
+            for pipeline in self.pipelines:
+                try:
+                    added_paths = pipeline.refresh_file_paths()
+                    # Catch up on anything written before the watches existed
+                    if added_paths:
+                        self.mark_changed(added_paths, [pipeline])
+                except Exception as e:
+                    logging.error(f"Error monitoring log file paths for {pipeline.name}: {e}")
+
+            current_paths = set().union(*(pipeline.paths() for pipeline in self.pipelines))
+            if current_paths != self.watched_paths:
+                self.watch_log_files(current_paths)
+                self.watched_paths = current_paths
+
+            time.sleep(FILE_PATHS_REFRESH_INTERVAL)
+
+    def run(self):
+        """Starts the watchers and hands changed files to the worker pool forever."""
+        logging.info(f"Starting log processing for: {[pipeline.name for pipeline in self.pipelines]}")
+        self.observer.start()
+
+        # Start monitoring log file paths in a separate thread
+        file_paths_thread = threading.Thread(target=self.monitor_log_file_paths)
+        file_paths_thread.daemon = True
+        file_paths_thread.start()
+
+        # journald does not write plain files, so it is followed with its own wait loop
+        if journal is not None:
+            journal_thread = threading.Thread(target=watch_journal,
+                                              args=(lambda: self.mark_changed([JOURNAL_PATH]), FULL_SCAN_INTERVAL))
+            journal_thread.daemon = True
+            journal_thread.start()
+
+        while True:
+            # Sleep until inotify reports a change, with a periodic full pass as a safety net
+            if not self.changed.wait(timeout=FULL_SCAN_INTERVAL):
+                for pipeline in self.pipelines:
+                    self.mark_changed(pipeline.paths(), [pipeline])
+            time.sleep(EVENT_COALESCE_DELAY)  # Let a burst of writes settle into one pass
+
+            with self.pending_lock:
+                self.changed.clear()
+                pending = sorted(self.pending, key=lambda pair: (pair[0].name, pair[1]))
+                self.pending.clear()
+
+            # Hand each changed log file to the worker pool
+            for pipeline, file_path in pending:
+                self.dispatcher.submit(pipeline, file_path)
+
+def run(pipelines, max_workers=LOG_WORKERS):
+    """Runs the given pipelines until the process is stopped."""
+    IngestRunner(pipelines, max_workers).run()
@@ -0,0 +1,205 @@
+"""MySQL sink: keywords, file paths and checkpoints in, anomalous log rows out."""
+import time
+import logging
+import threading
+import mysql.connector
+from mysql.connector import pooling
+from contextlib import contextmanager
+
+from .config import (database_config, LOG_TABLE_NAME, KEYWORD_TABLE_NAME, FILE_PATHS_TABLE_NAME,
+                     LAST_PROCESSED_TABLE_NAME, LOG_SETTINGS_TABLE_NAME, LOG_ID_SCHEME, LOG_WORKERS,
+                     BATCH_MAX_ROWS, BATCH_MAX_AGE)
+from .sources import new_checkpoint
+from schema import setup_log_tables
+
+class MySQLSink:
+    """One ingestion database and the name of its description column.
+
+    Threat_Erase stores descriptions in `description` and Threat_Erase_DB in
+    `desc`; everything else about the two schemas is the same.
+    """
+
+    def __init__(self, database, description_column='description', pool_size=LOG_WORKERS + 1):
+        self.database = database
+        self.description_column = description_column
+        self.pool_size = min(pool_size, 32)
+        self.pool = None
+        self.pool_lock = threading.Lock()
+        self.log_id_scheme = None  # Read from log_settings on first use, see get_log_id_scheme()
+
+    def get_pool(self):
+        """Returns the connection pool shared by the worker threads, creating it on first use."""
+        with self.pool_lock:
+            if self.pool is None:
+                self.pool = pooling.MySQLConnectionPool(pool_name=f"ingest_{self.database}", pool_size=self.pool_size,
+                                                        **database_config(self.database))
+            return self.pool
+
+    @contextmanager
+    def connection(self):
+        """Get a connection from the pool, or None if the database is unavailable.
+
+        Errors raised inside the block are left to the caller; the connection
+        goes back to the pool either way.
+        """
+        conn = None
+        try:
+            conn = self.get_pool().get_connection()
+        except mysql.connector.Error as e:
+            logging.error(f"Error connecting to MySQL database {self.database}: {e}")
+        try:
+            yield conn
+        finally:
+            if conn:
+                conn.close()  # Hands the connection back to the pool
+
+    def ensure_schema(self):
+        """Creates and migrates this database's log tables (see schema.py); returns False if it is unavailable."""
+        try:
+            with self.connection() as db_conn:
+                if not db_conn:
+                    return False
+                with db_conn.cursor(buffered=True) as cursor:
+                    version = setup_log_tables(cursor, self.description_column)
+                db_conn.commit()
+        except mysql.connector.Error as e:
+            logging.error(f"Error setting up the log tables of {self.database}: {e}")
+            return False
+        logging.info(f"Log tables of {self.database} at schema version {version}")
+        return True
+
+    def fetch_file_paths(self, cursor):
+        """Fetches log file paths from the database."""
+        try:
+            cursor.execute(f"SELECT paths FROM {FILE_PATHS_TABLE_NAME}")
+            file_paths = [row[0] for row in cursor.fetchall()]
+            logging.info(f"Fetched log file paths from {self.database}: {file_paths}")
+            return file_paths
+        except mysql.connector.Error as e:
+            logging.error(f"Error fetching file paths from {self.database}: {e}")
+            return None
+
+    def fetch_keywords(self, cursor, file_name):
+        """Fetches keywords from the database for a specific file, or None if the query failed."""
+        try:
+            cursor.execute(f"SELECT pattern FROM {KEYWORD_TABLE_NAME} WHERE file_name = %s", (file_name,))
+            return [row[0] for row in cursor.fetchall()]
+        except mysql.connector.Error as e:
+            logging.error(f"Error fetching keywords from {KEYWORD_TABLE_NAME}: {e}")
+            return None
+
+    def get_log_id_scheme(self, cursor):
+        """The LOG_ID_SCHEMES key this database's log ids are made with, or None if the query failed.
+
+        Databases upgraded from hex ids are pinned to sha256 by their
+        migration; all others use LOG_ID_SCHEME.
+        """
+        if self.log_id_scheme is None:
+            try:
+                cursor.execute(f"SELECT value FROM {LOG_SETTINGS_TABLE_NAME} WHERE name = 'log_id_scheme'")
+                result = cursor.fetchone()
+            except mysql.connector.Error as e:
+                logging.error(f"Error fetching the log id scheme of {self.database}: {e}")
+                return None
+            self.log_id_scheme = result[0] if result else LOG_ID_SCHEME
+            logging.info(f"Log ids in {self.database} use {self.log_id_scheme}")
+        return self.log_id_scheme
+
+    def get_checkpoint(self, cursor, file_name):
+        """Retrieves the (inode, device, byte offset, partial line) or journal cursor checkpoint for a given file."""
+        try:
+            cursor.execute(f"SELECT inode, device, byte_offset, partial_line, journal_cursor FROM {LAST_PROCESSED_TABLE_NAME} WHERE file_name = %s", (file_name,))
+            result = cursor.fetchone()
+        except mysql.connector.Error as e:
+            logging.error(f"Error fetching checkpoint for {file_name}: {e}")
+            return None
+        if not result:
+            return new_checkpoint()
+        inode, device, byte_offset, partial_line, journal_cursor = result
+        return {
+            "inode": inode,
+            "device": device,
+            "offset": byte_offset or 0,
+            "partial": bytes(partial_line or b""),
+            "cursor": journal_cursor,
+        }
+
+    def insert_log_entries(self, cursor, rows):
+        """Inserts (log_id, timestamp, pid, priority, description, file_name, matched_pattern) rows in one multi-row statement.
+
+        Errors are left to the caller so the surrounding transaction can be rolled back.
+        """
+        column = self.description_column
+        cursor.executemany(f'''
+            INSERT INTO {LOG_TABLE_NAME} (log_id, timestamp, pid, priority, `{column}`, file_name, matched_pattern)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE timestamp = VALUES(timestamp), priority = VALUES(priority), `{column}` = VALUES(`{column}`),
+                matched_pattern = VALUES(matched_pattern)
+        ''', rows)
+
+    def update_last_processed(self, cursor, file_name, last_log_id, checkpoint):
+        """Updates the last processed log_id and read checkpoint for a given file.
+
+        Errors are left to the caller so the surrounding transaction can be rolled back.
+        """
+        cursor.execute(f'''
+            INSERT INTO {LAST_PROCESSED_TABLE_NAME} (file_name, last_log_id, inode, device, byte_offset, partial_line, journal_cursor)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE last_log_id = COALESCE(VALUES(last_log_id), last_log_id),
+                inode = VALUES(inode), device = VALUES(device),
+                byte_offset = VALUES(byte_offset), partial_line = VALUES(partial_line),
+                journal_cursor = VALUES(journal_cursor)
+        ''', (file_name, last_log_id, checkpoint['inode'], checkpoint['device'], checkpoint['offset'], checkpoint['partial'],
+              checkpoint['cursor']))
+
+class LogBatchWriter:
+    """Buffers anomalous log rows for one file and writes them together with its checkpoint.
+
+    Each flush is a single transaction holding the multi-row insert and the
+    checkpoint that covers exactly those rows, so after a crash the file is
+    re-read from the last committed checkpoint and nothing is lost or stored twice.
+    """
+
+    def __init__(self, sink, db_conn, file_name, max_rows=BATCH_MAX_ROWS, max_age=BATCH_MAX_AGE):
+        self.sink = sink
+        self.db_conn = db_conn
+        self.file_name = file_name
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.rows = []
+        self.last_log_id = None
+        self.batch_started = time.monotonic()
+
+    def add(self, log_entry, log_id, matched_pattern):
+        """Buffers a matching log entry together with the pattern that fired."""
+        if not self.rows:
+            self.batch_started = time.monotonic()
+        self.rows.append((log_id, log_entry['timestamp'], log_entry['pid'], log_entry['priority'],
+                          log_entry['description'], log_entry['file_name'], matched_pattern))
+        self.last_log_id = log_id
+
+    def should_flush(self):
+        """Returns True once the buffer reached its row-count or age threshold."""
+        if len(self.rows) >= self.max_rows:
+            return True
+        return bool(self.rows) and time.monotonic() - self.batch_started >= self.max_age
+
+    def flush(self, checkpoint):
+        """Commits the buffered rows and the checkpoint; returns False if the batch was rolled back."""
+        try:
+            with self.db_conn.cursor() as cursor:
+                if self.rows:
+                    self.sink.insert_log_entries(cursor, self.rows)
+                self.sink.update_last_processed(cursor, self.file_name, self.last_log_id, checkpoint)
+            self.db_conn.commit()
+        except mysql.connector.Error as e:
+            logging.error(f"Error writing batch of {len(self.rows)} entries for {self.file_name}, rolling back: {e}")
+            try:
+                self.db_conn.rollback()
+            except mysql.connector.Error:
+                pass
+            return False
+        logging.debug(f"Flushed {len(self.rows)} entries for {self.file_name} at byte {checkpoint['offset']}")
+        self.rows = []
+        self.last_log_id = None
+        return True
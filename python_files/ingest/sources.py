@@ -0,0 +1,276 @@
+"""Log sources: where entries come from and how far each source has been read.
+
+A source turns the data appended since a checkpoint into parsed log entries.
+Checkpoints are plain dicts (see new_checkpoint) stored per file name in the
+last_processed table by the sink.
+"""
+import os
+import logging
+
+from .config import (READ_CHUNK_SIZE, ROTATED_SUFFIX, MAX_BYTES_PER_PASS, JOURNAL_PATH,
+                     JOURNAL_EXPORT_SUFFIX, JOURNAL_MAX_ENTRIES_PER_PASS)
+from .parsers import PARSING_FUNCTIONS, JOURNAL_FILE_NAMES, journal_file_name, journal_fields_to_log_entry
+
+try:
+    from systemd import journal
+except ImportError:  # python-systemd is optional, only needed to read the live journal
+    journal = None
+
+# --- Incremental Reading ---
+def new_checkpoint():
+    """Returns a checkpoint that starts at the beginning of a not yet seen file."""
+    return {"inode": None, "device": None, "offset": 0, "partial": b"", "cursor": None}
+
+def _is_same_file(stat_result, checkpoint):
+    return stat_result.st_ino == checkpoint['inode'] and stat_result.st_dev == checkpoint['device']
+
+def _read_lines(file, checkpoint, max_bytes=None):
+    """Yields complete lines from the checkpoint offset, advancing the checkpoint.
+
+    The checkpoint is updated before each line is yielded, so at any point it
+    describes exactly the bytes the caller has consumed. A trailing line without
+    a newline is kept in checkpoint['partial'] until the rest of it is written.
+    Stops early once max_bytes have been read; returns True if EOF was reached.
+    """
+    file.seek(checkpoint['offset'])
+    pending = checkpoint['partial']
+    bytes_read = 0
+    while max_bytes is None or bytes_read < max_bytes:
+        chunk = file.read(READ_CHUNK_SIZE)
+        if not chunk:
+            return True
+        bytes_read += len(chunk)
+        data = pending + chunk
+        data_start = checkpoint['offset'] - len(pending)  # File position of data[0]
+        start = 0
+        while True:
+            end = data.find(b'\n', start)
+            if end == -1:
+                break
+            line = data[start:end + 1]
+            start = end + 1
+            checkpoint['offset'] = data_start + start
+            checkpoint['partial'] = b""
+            yield line.decode('utf-8', errors='ignore')
+        pending = data[start:]
+        checkpoint['offset'] = data_start + len(data)
+        checkpoint['partial'] = pending
+    return False
+
+def iter_new_lines(file_path, checkpoint, max_bytes=None):
+    """Yields the lines appended to file_path since checkpoint, following logrotate.
+
+    Handles the three ways a log moves under us: a rename to file_path + '.1'
+    (the rest of the old generation is drained first), a new inode without a
+    recognisable predecessor, and copytruncate (same inode, smaller size).
+    At most about max_bytes are read from each generation per call.
+    """
+    try:
+        file = open(file_path, 'rb')
+    except FileNotFoundError:
+        logging.warning(f"Log file not found: {file_path}")
+        return
+
+    with file:
+        current = os.fstat(file.fileno())
+        if checkpoint['inode'] is None:
+            checkpoint.update(inode=current.st_ino, device=current.st_dev)
+        elif not _is_same_file(current, checkpoint):
+            rotated_path = file_path + ROTATED_SUFFIX
+            try:
+                rotated = os.stat(rotated_path)
+            except FileNotFoundError:
+                rotated = None
+            if rotated and _is_same_file(rotated, checkpoint) and rotated.st_size >= checkpoint['offset']:
+                logging.info(f"{file_path} was rotated, draining {rotated_path} from byte {checkpoint['offset']}")
+                with open(rotated_path, 'rb') as rotated_file:
+                    drained = yield from _read_lines(rotated_file, checkpoint, max_bytes)
+                if not drained:
+                    return  # Finish the old generation on the next pass
+            else:
+                logging.info(f"{file_path} was replaced, reading the new file from the start")
+            leftover = checkpoint['partial']
+            checkpoint.update(inode=current.st_ino, device=current.st_dev, offset=0, partial=b"")
+            if leftover:
+                # The old generation is finished, so its unterminated last line is complete.
+                yield leftover.decode('utf-8', errors='ignore')
+        elif current.st_size < checkpoint['offset']:
+            logging.info(f"{file_path} was truncated, reading from the start")
+            checkpoint.update(offset=0, partial=b"")
+
+        yield from _read_lines(file, checkpoint, max_bytes)
+
+def has_unread_data(file_path, checkpoint):
+    """Returns True if file_path holds bytes (or a new generation) beyond the checkpoint."""
+    try:
+        current = os.stat(file_path)
+    except FileNotFoundError:
+        return False
+    return not _is_same_file(current, checkpoint) or current.st_size > checkpoint['offset']
+
+# --- Journal Reading ---
+def is_journal_source(file_path):
+    """Returns True for the live journal and for journal export files (journalctl -o export)."""
+    return file_path == JOURNAL_PATH or file_path.endswith(JOURNAL_EXPORT_SUFFIX)
+
+def iter_journal_export(file):
+    """Yields (fields, end offset) for each entry in a binary journal export stream.
+
+    The end offset is the file position after the entry's terminating blank
+    line. A last entry without one may still be being written and is not
+    yielded.
+    """
+    fields = {}
+    while True:
+        line = file.readline()
+        if not line:
+            break
+        if line == b'\n':
+            if fields:
+                yield fields, file.tell()
+            fields = {}
+            continue
+        line = line.rstrip(b'\n')
+        if b'=' in line:
+            key, value = line.split(b'=', 1)
+            fields[key.decode()] = value.decode('utf-8', errors='ignore')
+        else:
+            # Binary-safe field: name, newline, little-endian 64-bit size, data, newline
+            size = int.from_bytes(file.read(8), 'little')
+            fields[line.decode()] = file.read(size)
+            file.read(1)
+
+def _find_cursor_end(file, cursor):
+    """Reads file up to the export entry with cursor; returns the offset after it, or None if there is none."""
+    for fields, end_offset in iter_journal_export(file):
+        if fields.get('__CURSOR') == cursor:
+            return end_offset
+    return None
+
+def iter_journal_entries(file_path, checkpoint, max_entries, status):
+    """Yields (cursor, fields) for journal records after checkpoint['cursor'].
+
+    Reads the live journal when file_path is JOURNAL_PATH and an export file
+    otherwise. An export file is resumed at checkpoint['offset'], which is
+    advanced before each record is yielded; the cursor is only searched for
+    when the file was replaced or truncated. Sets status['more'] if
+    max_entries was reached first.
+    """
+    count = 0
+    if file_path == JOURNAL_PATH:
+        if journal is None:
+            logging.error("python-systemd is not installed, cannot read the journal.")
+            return
+        with journal.Reader() as reader:
+            if checkpoint['cursor']:
+                reader.seek_cursor(checkpoint['cursor'])
+                entry = reader.get_next()
+                if entry and not reader.test_cursor(checkpoint['cursor']):
+                    yield entry['__CURSOR'], entry  # Cursor entry is gone, resume at the nearest one
+                    count += 1
+            else:
+                reader.this_boot()  # First run, do not import the whole journal history
+            while count < max_entries:
+                entry = reader.get_next()
+                if not entry:
+                    return
+                yield entry['__CURSOR'], entry
+                count += 1
+        status['more'] = True
+        return
+
+    try:
+        file = open(file_path, 'rb')
+    except FileNotFoundError:
+        logging.warning(f"Journal export not found: {file_path}")
+        return
+    with file:
+        current = os.fstat(file.fileno())
+        if _is_same_file(current, checkpoint) and current.st_size >= checkpoint['offset']:
+            file.seek(checkpoint['offset'])
+        else:
+            # A new file, or a checkpoint stored before export offsets were: resume after the cursor if it is there
+            checkpoint.update(inode=current.st_ino, device=current.st_dev, offset=0, partial=b"")
+            if checkpoint['cursor']:
+                end_offset = _find_cursor_end(file, checkpoint['cursor'])
+                if end_offset is None:
+                    logging.info(f"Cursor not found in {file_path}, reading it from the start")
+                    end_offset = 0
+                checkpoint['offset'] = end_offset
+                file.seek(end_offset)
+        for fields, end_offset in iter_journal_export(file):
+            if count >= max_entries:
+                status['more'] = True
+                return
+            checkpoint['offset'] = end_offset
+            yield fields.get('__CURSOR'), fields
+            count += 1
+
+# --- Sources ---
+class FileSource:
+    """A plain text log read line by line from its byte offset checkpoint."""
+
+    def __init__(self, file_path, parsing_function):
+        self.path = file_path
+        self.file_name = os.path.basename(file_path)
+        self.parsing_function = parsing_function
+
+    def read_entries(self, checkpoint):
+        """Yields a parsed entry (or None) per new line, advancing the checkpoint in place."""
+        for line in iter_new_lines(self.path, checkpoint, MAX_BYTES_PER_PASS):
+            yield self.parsing_function(line, self.file_name)
+
+    def has_more(self, checkpoint):
+        return has_unread_data(self.path, checkpoint)
+
+    def pattern_sets(self):
+        """{entry file_name: file names whose patterns apply to it} for the entries this source yields."""
+        return {self.file_name: (self.file_name,)}
+
+class JournalSource:
+    """The live journal or a journal export file, read record by record from its cursor."""
+
+    def __init__(self, file_path):
+        self.path = file_path
+        self.file_name = os.path.basename(file_path)
+        self.more = False
+        self.skipped_file_names = frozenset()  # Text logs whose records are read from the text file instead
+
+    def read_entries(self, checkpoint):
+        """Yields an entry per new journal record, advancing checkpoint['cursor'] in place.
+
+        Records that map to one of skipped_file_names are passed over, so a
+        facility rsyslog also writes to a text log is not stored twice.
+        """
+        status = {"more": False}
+        for cursor, fields in iter_journal_entries(self.path, checkpoint, JOURNAL_MAX_ENTRIES_PER_PASS, status):
+            checkpoint['cursor'] = cursor
+            if journal_file_name(fields) not in self.skipped_file_names:
+                yield journal_fields_to_log_entry(fields)
+        self.more = status['more']
+
+    def has_more(self, checkpoint):
+        return self.more
+
+    def pattern_sets(self):
+        """Entries carry the text log name they map to; its patterns apply, plus any stored for the journal itself."""
+        return {file_name: (file_name, self.file_name) for file_name in JOURNAL_FILE_NAMES}
+
+def make_source(file_path):
+    """Returns the source for a configured path, or None if no parser handles it."""
+    if is_journal_source(file_path):
+        return JournalSource(file_path)
+    parsing_function = PARSING_FUNCTIONS.get(os.path.basename(file_path))
+    if not parsing_function:
+        logging.warning(f"No parsing function defined for {os.path.basename(file_path)}. Skipping.")
+        return None
+    return FileSource(file_path, parsing_function)
+
+def watch_journal(on_append, timeout):
+    """Calls on_append() whenever journald appends to the live journal; never returns."""
+    with journal.Reader() as reader:
+        reader.seek_tail()
+        reader.get_previous()
+        while True:
+            if reader.wait(timeout) == journal.APPEND:
+                on_append()
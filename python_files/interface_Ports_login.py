@@ -4,6 +4,7 @@ from datetime import datetime
 import time
 from tabulate import tabulate # type: ignore
 from db_config import db_config
+from socket_index import SocketIndex
 import threading
 
 def connect_to_database():
@@ -104,16 +105,8 @@ def print_and_log_initial_interface_details(interface_details):
         print()  # Add a newline for better readability
 
 def get_open_ports_with_processes():
-    # Get all connections
-    connections = psutil.net_connections(kind='inet')
-    
-    # Filter to get only ports in LISTEN state
-    open_ports = [(conn.laddr.port, conn.pid) for conn in connections if conn.status == psutil.CONN_LISTEN]
-    
-    # Remove duplicates and sort the ports
-    open_ports = sorted(set(open_ports))
-    
-    return open_ports
+    # One pass over /proc/net and /proc/*/fd gives every listening port with its owner
+    return SocketIndex.build().listening_ports()
 
 def get_process_details(pid):
     try:
@@ -0,0 +1,250 @@
+import os
+import sys
+import errno
+import time
+import socket
+import struct
+import logging
+import threading
+import subprocess
+
+import psutil
+
+# linux/netlink.h, linux/connector.h and linux/cn_proc.h
+NETLINK_CONNECTOR = 11
+CN_IDX_PROC = 1
+CN_VAL_PROC = 1
+NLMSG_DONE = 3
+PROC_CN_MCAST_LISTEN = 1
+PROC_CN_MCAST_IGNORE = 2
+PROC_EVENT_FORK = 0x00000001
+PROC_EVENT_EXEC = 0x00000002
+PROC_EVENT_EXIT = 0x80000000
+
+NLMSG_HEADER = struct.Struct("=IHHII")  # len, type, flags, seq, pid
+CN_MSG_HEADER = struct.Struct("=IIIIHH")  # idx, val, seq, ack, len, flags
+PROC_EVENT_HEADER = struct.Struct("=IIQ")  # what, cpu, timestamp_ns
+FORK_EVENT = struct.Struct("=IIII")  # parent pid, parent tgid, child pid, child tgid
+EXEC_EXIT_EVENT = struct.Struct("=II")  # pid, tgid (exit carries exit code and signal after these)
+
+RECEIVE_BUFFER = 4 * 1024 * 1024  # Socket buffer, so bursts of short processes are not dropped
+BENCHMARK_PROCESSES = 1000  # Short processes spawned by "proc_connector.py [COUNT]"
+MIN_PROGRAM_LIFETIME = 1.0  # Seconds a program must run before ShortLivedFilter reports it, about what a scan would catch
+
+class ProcConnector:
+    """Process fork/exec/exit notifications from the kernel's netlink process connector.
+
+    Every event is delivered, including processes that live for a few
+    microseconds, at no cost while nothing happens. Subscribing needs root
+    (CAP_NET_ADMIN); the constructor raises OSError otherwise.
+    """
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_CONNECTOR)
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+            self.sock.bind((os.getpid(), CN_IDX_PROC))
+            self._send_op(PROC_CN_MCAST_LISTEN)
+        except OSError:
+            self.sock.close()
+            raise
+
+    def _send_op(self, op):
+        payload = struct.pack("=I", op)
+        cn_msg = CN_MSG_HEADER.pack(CN_IDX_PROC, CN_VAL_PROC, 0, 0, len(payload), 0) + payload
+        self.sock.send(NLMSG_HEADER.pack(NLMSG_HEADER.size + len(cn_msg), NLMSG_DONE, 0, 0, os.getpid()) + cn_msg)
+
+    def events(self):
+        """Yields ('fork', pid, ppid), ('exec', pid, None) and ('exit', pid, None) for processes (not threads).
+
+        ('overrun', None, None) means the kernel dropped events because we fell behind.
+        """
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except OSError as e:
+                if e.errno == errno.ENOBUFS:
+                    logging.warning("Process connector overrun; some events were lost")
+                    yield "overrun", None, None
+                    continue
+                raise
+            offset = 0
+            while offset + NLMSG_HEADER.size <= len(data):
+                length = NLMSG_HEADER.unpack_from(data, offset)[0]
+                event_offset = offset + NLMSG_HEADER.size + CN_MSG_HEADER.size
+                what = PROC_EVENT_HEADER.unpack_from(data, event_offset)[0]
+                body = event_offset + PROC_EVENT_HEADER.size
+                if what == PROC_EVENT_FORK:
+                    _, parent_tgid, child_pid, child_tgid = FORK_EVENT.unpack_from(data, body)
+                    if child_pid == child_tgid:  # Threads share their process's tgid
+                        yield "fork", child_tgid, parent_tgid
+                elif what in (PROC_EVENT_EXEC, PROC_EVENT_EXIT):
+                    pid, tgid = EXEC_EXIT_EVENT.unpack_from(data, body)
+                    if pid == tgid:
+                        yield ("exec" if what == PROC_EVENT_EXEC else "exit"), tgid, None
+                offset += (length + 3) & ~3  # NLMSG_ALIGN
+
+    def close(self):
+        try:
+            self._send_op(PROC_CN_MCAST_IGNORE)
+        except OSError:
+            pass
+        self.sock.close()
+
+def open_proc_connector():
+    """Returns a ProcConnector, or None when the connector is unavailable (not root, not Linux)."""
+    try:
+        return ProcConnector()
+    except (OSError, AttributeError) as e:
+        logging.info(f"Process connector unavailable, falling back to scanning /proc: {e}")
+        return None
+
+def read_process_name(pid):
+    """The process's name as psutil reports it, or None if it already exited."""
+    try:
+        with open(f"/proc/{pid}/comm") as f:
+            return f.read().rstrip("\n")
+    except (FileNotFoundError, ProcessLookupError):
+        return None
+
+def running_processes():
+    return {proc.pid: proc.info['name'] for proc in psutil.process_iter(['name'])}
+
+def watch_with_connector(connector, on_start, on_exit, stop_event=None, on_fork=None):
+    """Calls on_start(pid, name) after every exec and on_exit(pid, name) when that program ends.
+
+    A program ends when its process exits or execs another one; processes
+    that were running when the watch started count as programs too. Every
+    other exit, of a forked child that never exec'd or of a process whose
+    name could not be read from /proc, is reported with name None.
+    on_fork(pid, ppid), if given, is called for every new process. After an
+    overrun the running processes are re-read and the difference is
+    reported as starts and exits.
+    """
+    names = running_processes()  # pid -> name at its last exec, None for a forked child
+    for kind, pid, ppid in connector.events():
+        if stop_event is not None and stop_event.is_set():
+            return
+        if kind == "fork":
+            names[pid] = None
+            if on_fork is not None:
+                on_fork(pid, ppid)
+        elif kind == "exec":
+            if names.get(pid) is not None:
+                on_exit(pid, names[pid])  # The previous program image of this pid is gone
+            names[pid] = read_process_name(pid)
+            on_start(pid, names[pid])
+        elif kind == "exit":
+            on_exit(pid, names.pop(pid, None))
+        elif kind == "overrun":
+            current = running_processes()
+            for gone in names.keys() - current.keys():
+                on_exit(gone, names.pop(gone))
+            for new in current.keys() - names.keys():
+                names[new] = current[new]
+                on_start(new, current[new])
+
+class ShortLivedFilter:
+    """Holds program starts back until they have run for min_lifetime seconds.
+
+    The connector sees every exec, including the ls and grep a shell runs;
+    a program that exits before min_lifetime is reported neither as started
+    nor as exited. Pass start() and exit() to watch_with_connector() and
+    call flush() periodically (run() does) to report the programs that
+    lived long enough. Exits of programs whose start was reported, or that
+    were running before the watch, are passed through.
+    """
+
+    def __init__(self, on_start, on_exit, min_lifetime=MIN_PROGRAM_LIFETIME, clock=time.monotonic):
+        self.on_start = on_start
+        self.on_exit = on_exit
+        self.min_lifetime = min_lifetime
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.pending = {}  # pid -> (name, clock() at exec)
+
+    def start(self, pid, name):
+        if name is None:
+            logging.debug(f"Process {pid} exited before its name could be read; not reported")
+            return
+        with self.lock:
+            self.pending[pid] = (name, self.clock())
+
+    def exit(self, pid, name):
+        with self.lock:
+            if self.pending.pop(pid, None) is not None:
+                return  # Too short-lived to report
+        self.on_exit(pid, name)
+
+    def flush(self):
+        """Reports the pending programs that have now run for min_lifetime."""
+        now = self.clock()
+        with self.lock:
+            due = [(pid, name) for pid, (name, started) in self.pending.items() if now - started >= self.min_lifetime]
+            for pid, _ in due:
+                del self.pending[pid]
+        for pid, name in due:
+            self.on_start(pid, name)
+
+    def run(self, stop_event):
+        while not stop_event.wait(self.min_lifetime / 2):
+            self.flush()
+
+def watch_with_scan(on_start, on_exit, period, stop_event=None):
+    """Diffs the process table every period seconds; processes that start and exit in between are missed."""
+    previous = {proc.pid: proc.info['name'] for proc in psutil.process_iter(['name'])}
+    while stop_event is None or not stop_event.is_set():
+        time.sleep(period)
+        current = {proc.pid: proc.info['name'] for proc in psutil.process_iter(['name'])}
+        for pid in current.keys() - previous.keys():
+            on_start(pid, current[pid])
+        for pid in previous.keys() - current.keys():
+            on_exit(pid, previous[pid])
+        previous = current
+
+def benchmark(count=BENCHMARK_PROCESSES, period=1):
+    """Spawns count short processes and reports how many of them each mode saw start with a name.
+
+    Without ShortLivedFilter, so this counts every start the connector could
+    report; starts whose name could not be read are not counted.
+    """
+    seen = {"scan": set(), "connector": set()}
+    stop_event = threading.Event()
+
+    def recorder(mode):
+        def on_start(pid, name):
+            if name is not None:
+                seen[mode].add(pid)
+        return on_start
+
+    watchers = [threading.Thread(target=watch_with_scan, daemon=True,
+                                 args=(recorder("scan"), lambda pid, _: None, period, stop_event))]
+    connector = open_proc_connector()
+    if connector is not None:
+        watchers.append(threading.Thread(target=watch_with_connector, daemon=True,
+                                         args=(connector, recorder("connector"), lambda pid, _: None, stop_event)))
+    for watcher in watchers:
+        watcher.start()
+    time.sleep(period)  # Let the scan take its first snapshot
+
+    spawned = set()
+    started = time.monotonic()
+    for _ in range(count):
+        child = subprocess.Popen(["true"])
+        spawned.add(child.pid)
+        child.wait()
+    elapsed = time.monotonic() - started
+    time.sleep(period * 2)  # Let both watchers catch up
+    stop_event.set()
+
+    print(f"Spawned {count} processes in {elapsed:.2f}s")
+    print(f"scan every {period}s: {len(seen['scan'] & spawned)}/{count} observed")
+    if connector is not None:
+        print(f"netlink connector: {len(seen['connector'] & spawned)}/{count} observed")
+        connector.close()
+    else:
+        print("netlink connector: unavailable (run as root to compare)")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else BENCHMARK_PROCESSES)
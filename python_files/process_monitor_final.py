@@ -1,8 +1,11 @@
+import sys
 import psutil
 import time
 import mysql.connector # type: ignore
 from datetime import datetime
+from collections import namedtuple
 from db_config import db_config
+from socket_index import SocketIndex
 
 # Ignore these system processes
 IGNORED_PROCESSES = {
@@ -15,6 +18,45 @@ IGNORED_PROCESSES = {
 # Ignore system users
 IGNORED_USERS = {"root", "dbus", "systemd-resolve", "avahi", "polkitd"}
 
+CPU_SAMPLE_INTERVAL = 1.0  # Seconds between the two CPU time readings of a cycle
+
+# One row of process_info; (pid, create_time) identifies a process even after its pid is reused
+ProcessRecord = namedtuple("ProcessRecord", "pid create_time process_name path ppid active_connections")
+
+def process_create_time(timestamp):
+    """psutil's create_time as the DATETIME(3) process_info stores, so snapshot keys match what is read back."""
+    created = datetime.fromtimestamp(timestamp)
+    return created.replace(microsecond=created.microsecond // 1000 * 1000)
+
+def diff_snapshots(previous, current):
+    """Returns (started or changed records, exited keys) between two {(pid, create_time): ProcessRecord} snapshots."""
+    upserts = [record for key, record in current.items() if previous.get(key) != record]
+    exits = [key for key in previous if key not in current]
+    return upserts, exits
+
+class ProcessTable:
+    """Keeps the last snapshot written to process_info and writes only what changed since.
+
+    Steady-state writes are proportional to process churn (starts, exits,
+    changed connection counts) instead of the number of processes. The first
+    snapshot is what process_info lists as running, so processes that exited
+    while the monitor was down are closed on the first cycle.
+    """
+
+    def __init__(self):
+        self.snapshot = None
+
+    def update(self, current):
+        if self.snapshot is None:
+            self.snapshot = load_process_snapshot()
+            if self.snapshot is None:
+                return  # Try again next cycle rather than re-inserting everything
+        upserts, exits = diff_snapshots(self.snapshot, current)
+        if not upserts and not exits:
+            return
+        if store_process_changes(upserts, exits):
+            self.snapshot = current  # On failure the same diff is retried next cycle
+
 def connect_db():
     """Establish a database connection."""
     try:
@@ -24,31 +66,59 @@ def connect_db():
         print(f"Database Connection Error: {err}")
         return None
 
-def store_process_info(process_data):
-    """Insert process static and dynamic info into process_info table."""
+def load_process_snapshot():
+    """Returns the processes process_info still lists as running, as a snapshot, or None if it cannot be read."""
     conn = connect_db()
     if not conn:
-        return
-    else : 
-        print("Connection established")
+        return None
 
     try:
         cursor = conn.cursor()
-        insert_query = """
-            INSERT INTO process_info 
-            (process_name, path, pid, ppid, active_connections, first_seen)
-            VALUES (%s, %s, %s, %s, %s, %s)
-            ON DUPLICATE KEY UPDATE
-            ppid = VALUES(ppid),
-            active_connections = VALUES(active_connections);
-        """  # Updates data if process name and path exist already
+        cursor.execute("""
+            SELECT pid, create_time, process_name, path, ppid, active_connections
+            FROM process_info WHERE exited_at IS NULL
+        """)
+        return {(row[0], row[1]): ProcessRecord(*row) for row in cursor.fetchall()}
 
-        cursor.executemany(insert_query, process_data)
+    except mysql.connector.Error as err:
+        print(f"Database Read Error: {err}")
+        return None
+
+    finally:
+        cursor.close()
+        conn.close()
+
+def store_process_changes(upserts, exits):
+    """Writes process start/change events and exits to process_info; returns False if nothing was written."""
+    conn = connect_db()
+    if not conn:
+        return False
+
+    try:
+        cursor = conn.cursor()
+        if upserts:
+            # first_seen is only set when the process is first inserted
+            cursor.executemany("""
+                INSERT INTO process_info
+                (pid, create_time, process_name, path, ppid, active_connections, first_seen)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                process_name = VALUES(process_name),
+                path = VALUES(path),
+                ppid = VALUES(ppid),
+                active_connections = VALUES(active_connections),
+                exited_at = NULL
+            """, [record + (datetime.now(),) for record in upserts])
+        if exits:
+            cursor.executemany("UPDATE process_info SET exited_at = %s WHERE pid = %s AND create_time = %s",
+                               [(datetime.now(), pid, create_time) for pid, create_time in exits])
         conn.commit()
-        print(f"{len(process_data)} process_info records inserted/updated successfully.")
+        print(f"process_info: {len(upserts)} started/changed, {len(exits)} exited.")
+        return True
 
     except mysql.connector.Error as err:
         print(f"Database Insert Error: {err}")
+        return False
 
     finally:
         cursor.close()
@@ -79,32 +149,54 @@ def store_process_resources(resource_data):
         cursor.close()
         conn.close()
 
-def get_process_activity():
-    """Fetch process details and store in the database."""
-    process_info_data = []
+def collect_process_samples(processes, interval=CPU_SAMPLE_INTERVAL, socket_index=None):
+    """Returns ({(pid, create_time): ProcessRecord}, process_resources rows) for the given psutil processes.
+
+    CPU usage is sampled in two phases: every process's CPU times are primed
+    first, then one sleep of interval, then every delta is read. A cycle
+    therefore costs one interval however many processes are running, where
+    cpu_percent(interval=...) per process would cost one interval each.
+    Connection counts come from one SocketIndex for the whole cycle (built
+    here unless given).
+    """
+    snapshot = {}
     process_resource_data = []
 
-    for proc in psutil.process_iter(['pid', 'ppid', 'name', 'exe', 'username']):
+    # Phase 1: pick the processes to watch and prime their CPU times
+    candidates = []
+    for proc in processes:
         try:
-            pid = proc.info['pid']
             name = proc.info['name']
             username = proc.info['username']
-            path = proc.info['exe'] or "Unknown"
 
             # Ignore system users and unnecessary processes
             if username in IGNORED_USERS or name in IGNORED_PROCESSES:
                 continue
 
-            # Process Information
-            active_connections = len(proc.net_connections(kind='inet'))  # Fixed deprecated function
+            proc.cpu_percent(interval=None)  # First call only records the CPU times
+            candidates.append(proc)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            continue  # Skip inaccessible processes
+
+    time.sleep(interval)
+    socket_index = socket_index or SocketIndex.build()
+
+    # Phase 2: read everything else, with CPU usage as the delta since phase 1
+    for proc in candidates:
+        try:
+            pid = proc.info['pid']
+            name = proc.info['name']
+            path = proc.info['exe'] or "Unknown"
+
+            # Process Information (None when the process's sockets cannot be read)
+            active_connections = socket_index.connection_count(pid)
 
             # Collect info for process_info table
-            process_info_data.append((
-                name, path, pid, proc.info['ppid'], active_connections, datetime.now()
-            ))
+            create_time = process_create_time(proc.info['create_time'])
+            snapshot[(pid, create_time)] = ProcessRecord(pid, create_time, name, path, proc.info['ppid'], active_connections)
 
             # Resource Usage
-            cpu_usage = proc.cpu_percent(interval=1.0)  # Ensures CPU usage is correctly measured
+            cpu_usage = proc.cpu_percent(interval=None)  # Usage over the shared interval
             ram_usage = proc.memory_percent()
 
             # Skip processes with CPU usage < 0.1%
@@ -125,19 +217,65 @@ def get_process_activity():
             process_resource_data.append((pid, cpu_usage, ram_usage, mb_sent, mb_received, resource_timestamp))
 
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-            continue  # Skip inaccessible processes
+            continue  # Skip processes that exited or became inaccessible during the interval
+
+    return snapshot, process_resource_data
 
-    # Batch insert into the database
-    if process_info_data:
-        store_process_info(process_info_data)
+def get_process_activity(process_table):
+    """Fetch process details and store in the database."""
+    snapshot, process_resource_data = collect_process_samples(
+        psutil.process_iter(['pid', 'ppid', 'name', 'exe', 'username', 'create_time']))
+
+    # Write process starts, changes and exits, then the resource samples
+    process_table.update(snapshot)
     if process_resource_data:
         store_process_resources(process_resource_data)
 
+class SyntheticProcess:
+    """Stands in for psutil.Process in benchmark(); cpu_percent(interval) blocks like the real one."""
+
+    def __init__(self, pid):
+        self.info = {'pid': pid, 'ppid': 1, 'name': f"synthetic-{pid}", 'exe': f"/usr/bin/synthetic-{pid}", 'username': "user",
+                     'create_time': time.time()}
+
+    def cpu_percent(self, interval=None):
+        if interval:
+            time.sleep(interval)
+        return 1.0
+
+    def memory_percent(self):
+        return 0.5
+
+    def io_counters(self):
+        raise psutil.AccessDenied(self.info['pid'])
+
+def benchmark(process_count=400, interval=0.05):
+    """Times one collection cycle over a synthetic process table against the old per-process interval."""
+    processes = [SyntheticProcess(pid) for pid in range(1000, 1000 + process_count)]
+    started = time.perf_counter()
+    collect_process_samples(processes, interval)
+    two_phase = time.perf_counter() - started
+
+    # The old loop called cpu_percent(interval=...) once per process; time a slice and scale it up
+    sample = processes[:min(process_count, 20)]
+    started = time.perf_counter()
+    for proc in sample:
+        proc.cpu_percent(interval=interval)
+    per_process = (time.perf_counter() - started) / len(sample) * process_count
+    print(f"{process_count} processes, {interval}s interval: two-phase {two_phase:.3f}s, "
+          f"per-process interval ~{per_process:.3f}s")
+
 def main():
     print("Monitoring Important Process Activity & Storing in Database...")
+    process_table = ProcessTable()
     while True:
-        get_process_activity()
+        get_process_activity(process_table)
         time.sleep(10)  # Refresh every 10 seconds
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        # process_monitor_final.py --benchmark [PROCESS_COUNT [INTERVAL]]
+        args = sys.argv[2:]
+        benchmark(int(args[0]) if args else 400, float(args[1]) if len(args) > 1 else 0.05)
+    else:
+        main()
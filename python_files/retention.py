@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import time
+import logging
+from datetime import datetime, timedelta
+import mysql.connector
+from mysql.connector import Error
+from db_config import db_config
+
+CONFIG_FILE = os.environ.get('CONFIG_FILE', 'config.json')  # Per-table overrides live under its "retention" key
+RETENTION_INTERVAL = 3600  # Seconds between maintenance passes
+PRECREATE_PERIODS = 3  # Future partitions kept ready ahead of the current one
+DELETE_BATCH = 10000  # Rows per DELETE for tables that could not be partitioned
+
+# Table -> policy. partition is "daily" or "monthly"; days is how long rows are
+# kept (None keeps them forever); column is the DATETIME or TIMESTAMP to range on.
+DEFAULT_POLICIES = {
+    "system_monitor": {"partition": "daily", "days": 30, "column": "timestamp"},
+    "system_metrics": {"partition": "daily", "days": 7, "column": "timestamp"},
+    "process_resources": {"partition": "daily", "days": 7, "column": "timestamp"},
+    "user_activity": {"partition": "monthly", "days": 365, "column": "timestamp"},
+    "ufw_logs": {"partition": "daily", "days": 90, "column": "timestamp"},
+    "anomalous_logs": {"partition": "monthly", "days": 365, "column": "timestamp"},
+    "open_ports": {"partition": "daily", "days": 30, "column": "timestamp"},
+}
+
+def load_policies(config_file=CONFIG_FILE):
+    """Returns the default policies with the "retention" section of config_file applied on top."""
+    policies = {table: dict(policy) for table, policy in DEFAULT_POLICIES.items()}
+    try:
+        with open(config_file, 'r') as f:
+            overrides = json.load(f).get("retention", {})
+    except FileNotFoundError:
+        overrides = {}
+    except json.JSONDecodeError as e:
+        logging.error(f"Invalid JSON in {config_file}, using default retention policies: {e}")
+        overrides = {}
+    for table, override in overrides.items():
+        if override is None:
+            policies.pop(table, None)  # "table": null turns retention off for it
+        else:
+            policies[table] = {**policies.get(table, {"partition": "daily", "days": None, "column": "timestamp"}), **override}
+    return policies
+
+def period_start(moment, granularity):
+    """Start of the daily or monthly period containing moment."""
+    start = datetime(moment.year, moment.month, moment.day)
+    return start.replace(day=1) if granularity == "monthly" else start
+
+def next_period(start, granularity):
+    if granularity == "monthly":
+        return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start + timedelta(days=1)
+
+def partition_name(start, granularity):
+    return f"p{start:%Y%m}" if granularity == "monthly" else f"p{start:%Y%m%d}"
+
+def range_value(bound, unix_timestamp):
+    """SQL literal for a partition's upper bound."""
+    literal = f"'{bound:%Y-%m-%d %H:%M:%S}'"
+    return f"UNIX_TIMESTAMP({literal})" if unix_timestamp else literal
+
+def parse_range_value(description):
+    """Upper bound of an existing partition from information_schema, or None for MAXVALUE."""
+    if description == "MAXVALUE":
+        return None
+    if description.startswith("'"):
+        return datetime.fromisoformat(description.strip("'"))
+    return datetime.fromtimestamp(int(description))
+
+def partition_definitions(first, until, granularity, unix_timestamp):
+    """PARTITION clauses for every period from first up to and including the one containing until."""
+    definitions = []
+    start = first
+    while start <= until:
+        end = next_period(start, granularity)
+        definitions.append(f"PARTITION {partition_name(start, granularity)} VALUES LESS THAN ({range_value(end, unix_timestamp)})")
+        start = end
+    return definitions
+
+def future_limit(now, granularity):
+    limit = period_start(now, granularity)
+    for _ in range(PRECREATE_PERIODS):
+        limit = next_period(limit, granularity)
+    return limit
+
+def get_partitions(cursor, table):
+    """Returns [(name, upper bound)] in order, [] for an unpartitioned table, or None if the table does not exist."""
+    cursor.execute(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s ORDER BY PARTITION_ORDINAL_POSITION",
+        (table,))
+    rows = cursor.fetchall()
+    if not rows:
+        return None
+    if rows[0][0] is None:
+        return []
+    return [(name, parse_range_value(description)) for name, description in rows]
+
+def uses_unix_timestamp(cursor, table, column):
+    """TIMESTAMP columns cannot be used with RANGE COLUMNS and are partitioned on UNIX_TIMESTAMP() instead."""
+    cursor.execute(
+        "SELECT DATA_TYPE FROM information_schema.COLUMNS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s",
+        (table, column))
+    row = cursor.fetchone()
+    return row is not None and row[0].lower() == "timestamp"
+
+def partition_table(cursor, table, policy, now):
+    """Converts an unpartitioned table to RANGE partitions on its timestamp column.
+
+    Rows older than the retention cutoff all go into partition p0, so the
+    next maintenance pass drops them in one step. This rebuilds the table
+    once; on a freshly created (empty) table it is instant.
+    """
+    granularity, column = policy["partition"], policy["column"]
+    unix_timestamp = uses_unix_timestamp(cursor, table, column)
+    first = period_start(now - timedelta(days=policy["days"]) if policy["days"] else now, granularity)
+    definitions = ([f"PARTITION p0 VALUES LESS THAN ({range_value(first, unix_timestamp)})"]
+                   + partition_definitions(first, future_limit(now, granularity), granularity, unix_timestamp)
+                   + ["PARTITION pmax VALUES LESS THAN (MAXVALUE)"])
+    expression = f"RANGE (UNIX_TIMESTAMP(`{column}`))" if unix_timestamp else f"RANGE COLUMNS(`{column}`)"
+    logging.info(f"Partitioning {table} {granularity} on {column} ({len(definitions)} partitions)")
+    cursor.execute(f"ALTER TABLE {table} PARTITION BY {expression} ({', '.join(definitions)})")
+
+def add_future_partitions(cursor, table, policy, partitions, now):
+    """Splits empty periods off pmax until PRECREATE_PERIODS future partitions exist."""
+    granularity = policy["partition"]
+    bounds = [bound for _, bound in partitions if bound is not None]
+    if not bounds or partitions[-1][1] is not None:
+        return
+    limit = future_limit(now, granularity)
+    if bounds[-1] > limit:
+        return
+    unix_timestamp = uses_unix_timestamp(cursor, table, policy["column"])
+    definitions = (partition_definitions(bounds[-1], limit, granularity, unix_timestamp)
+                   + ["PARTITION pmax VALUES LESS THAN (MAXVALUE)"])
+    logging.info(f"Adding {len(definitions) - 1} partitions to {table}")
+    cursor.execute(f"ALTER TABLE {table} REORGANIZE PARTITION pmax INTO ({', '.join(definitions)})")
+
+def drop_expired_partitions(cursor, table, policy, partitions, now):
+    """Drops every partition that only holds rows older than the retention cutoff."""
+    if not policy["days"]:
+        return
+    cutoff = now - timedelta(days=policy["days"])
+    expired = [name for name, bound in partitions if bound is not None and bound <= cutoff]
+    if expired:
+        logging.info(f"Dropping expired partitions of {table}: {expired}")
+        cursor.execute(f"ALTER TABLE {table} DROP PARTITION {', '.join(expired)}")
+
+def delete_expired_rows(connection, cursor, table, policy, now):
+    """Fallback for tables that cannot be partitioned: deletes expired rows in small batches."""
+    if not policy["days"]:
+        return
+    cutoff = now - timedelta(days=policy["days"])
+    deleted = 0
+    while True:
+        cursor.execute(f"DELETE FROM {table} WHERE `{policy['column']}` < %s LIMIT {DELETE_BATCH}", (cutoff,))
+        connection.commit()
+        deleted += cursor.rowcount
+        if cursor.rowcount < DELETE_BATCH:
+            break
+    if deleted:
+        logging.info(f"Deleted {deleted} expired rows from {table}")
+
+def maintain_table(connection, cursor, table, policy, now=None):
+    """Partitions table if needed, keeps future partitions ready and drops expired ones."""
+    now = now or datetime.now()
+    partitions = get_partitions(cursor, table)
+    if partitions is None:
+        logging.warning(f"Skipping retention for missing table {table}")
+        return
+    if not partitions:
+        try:
+            partition_table(cursor, table, policy, now)
+        except Error as e:
+            logging.error(f"Cannot partition {table}, deleting expired rows instead: {e}")
+            delete_expired_rows(connection, cursor, table, policy, now)
+            return
+        partitions = get_partitions(cursor, table)
+    add_future_partitions(cursor, table, policy, partitions, now)
+    drop_expired_partitions(cursor, table, policy, partitions, now)
+
+def maintain_all(connection, policies=None):
+    """Runs maintain_table() for every table with a policy; one failing table does not stop the others."""
+    policies = load_policies() if policies is None else policies
+    with connection.cursor(buffered=True) as cursor:
+        for table, policy in policies.items():
+            try:
+                maintain_table(connection, cursor, table, policy)
+            except Error as e:
+                logging.error(f"Error maintaining retention for {table}: {e}")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    while True:
+        try:
+            with mysql.connector.connect(**db_config) as connection:
+                maintain_all(connection)
+        except Error as e:
+            logging.error(f"Error connecting to MySQL: {e}")
+        if "--once" in sys.argv:
+            break
+        time.sleep(RETENTION_INTERVAL)
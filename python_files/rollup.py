@@ -0,0 +1,142 @@
+import sys
+import math
+import logging
+import mysql.connector
+from mysql.connector import Error
+from db_config import db_config
+
+ROLLUP_METRICS = ("cpu_usage", "gpu_usage", "ram_usage", "disk_usage", "kb_sent", "kb_received")  # system_monitor columns, in row order
+ROLLUP_TABLES = {
+    # Table -> number of leading characters of a 'YYYY-MM-DD HH:MM:SS' timestamp that identify its bucket
+    "system_monitor_1m": 16,
+    "system_monitor_1h": 13,
+    "system_monitor_1d": 10,
+}
+BUCKET_SUFFIX = {16: ":00", 13: ":00:00", 10: " 00:00:00"}
+BACKFILL_BATCH = 10000  # Raw rows read per fetch while backfilling
+
+def bucket_start(timestamp, prefix_length):
+    """Truncates a 'YYYY-MM-DD HH:MM:SS' timestamp (string or datetime) to the start of its bucket."""
+    timestamp = str(timestamp)
+    return timestamp[:prefix_length] + BUCKET_SUFFIX[prefix_length]
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    return sorted_values[max(math.ceil(fraction * len(sorted_values)) - 1, 0)]
+
+def summarize(bucket, samples):
+    """Returns the rollup row (bucket, sample_count, min/max/avg/p95 per metric) for the samples of one bucket."""
+    row = [bucket, len(samples)]
+    for index in range(len(ROLLUP_METRICS)):
+        values = sorted(sample[index] for sample in samples if sample[index] is not None)
+        if values:
+            row += [values[0], values[-1], sum(values) / len(values), percentile(values, 0.95)]
+        else:
+            row += [None, None, None, None]
+    return tuple(row)
+
+class RollupAggregator:
+    """Folds system_monitor rows into 1-minute, 1-hour and 1-day rollups as they arrive.
+
+    Only the open bucket of each table is kept in memory. Rows must arrive
+    in timestamp order; a bucket is emitted when the first row of the next
+    bucket shows up, or when flush_open() is called on shutdown.
+    """
+
+    def __init__(self, tables=ROLLUP_TABLES):
+        self.tables = tables
+        self.open_buckets = {table: (None, []) for table in tables}
+
+    def add(self, row):
+        """Adds a (timestamp, cpu, gpu, ram, disk, kb_sent, kb_received) row; returns {table: [closed rollup rows]}."""
+        closed = {}
+        for table, prefix_length in self.tables.items():
+            bucket = bucket_start(row[0], prefix_length)
+            current_bucket, samples = self.open_buckets[table]
+            if bucket != current_bucket:
+                if samples:
+                    closed.setdefault(table, []).append(summarize(current_bucket, samples))
+                samples = []
+                self.open_buckets[table] = (bucket, samples)
+            samples.append(row[1:])
+        return closed
+
+    def flush_open(self):
+        """Emits the partial open buckets, e.g. before the process exits."""
+        closed = {}
+        for table, (bucket, samples) in self.open_buckets.items():
+            if samples:
+                closed[table] = [summarize(bucket, samples)]
+            self.open_buckets[table] = (None, [])
+        return closed
+
+def rollup_upsert_query(table):
+    """Builds the INSERT ... ON DUPLICATE KEY UPDATE statement that merges rollup rows into table.
+
+    A bucket can be written more than once (a partial bucket flushed on
+    shutdown and completed after a restart, or a backfill over live data).
+    min and max merge exactly and avg is weighted by sample count. The exact
+    p95 of the union is not recoverable from two summaries, so the larger
+    p95 is kept.
+    """
+    columns = ["bucket", "sample_count"]
+    updates = []
+    for metric in ROLLUP_METRICS:
+        columns += [f"{metric}_min", f"{metric}_max", f"{metric}_avg", f"{metric}_p95"]
+        updates += [
+            f"{metric}_min = LEAST(COALESCE({metric}_min, VALUES({metric}_min)), COALESCE(VALUES({metric}_min), {metric}_min))",
+            f"{metric}_max = GREATEST(COALESCE({metric}_max, VALUES({metric}_max)), COALESCE(VALUES({metric}_max), {metric}_max))",
+            f"{metric}_avg = COALESCE(({metric}_avg * sample_count + VALUES({metric}_avg) * VALUES(sample_count))"
+            f" / (sample_count + VALUES(sample_count)), {metric}_avg, VALUES({metric}_avg))",
+            f"{metric}_p95 = GREATEST(COALESCE({metric}_p95, VALUES({metric}_p95)), COALESCE(VALUES({metric}_p95), {metric}_p95))",
+        ]
+    # Assignments are applied left to right, so sample_count has to change last
+    updates.append("sample_count = sample_count + VALUES(sample_count)")
+    return (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))}) "
+            f"ON DUPLICATE KEY UPDATE {', '.join(updates)}")
+
+def upsert_rollups(cursor, closed):
+    """Writes {table: [rollup rows]} with one multi-row statement per table; errors are left to the caller."""
+    for table, rows in closed.items():
+        if rows:
+            cursor.executemany(rollup_upsert_query(table), rows)
+
+def backfill(connection, since=None):
+    """Rebuilds the rollups from the raw system_monitor rows (newer than since, if given).
+
+    Run it once after creating the rollup tables; afterwards the monitor
+    keeps them up to date. Re-running over buckets that already exist would
+    count their samples twice, so clear those rows first.
+    """
+    aggregator = RollupAggregator()
+    query = ("SELECT id, timestamp, cpu_usage, gpu_usage, ram_usage, disk_usage, kb_sent, kb_received "
+             "FROM system_monitor WHERE timestamp >= %s AND (timestamp > %s OR id > %s) "
+             "ORDER BY timestamp, id LIMIT %s")
+    last_timestamp, last_id = since or "1970-01-01 00:00:00", 0
+    count = 0
+    with connection.cursor() as cursor:
+        while True:
+            # Keyset pagination, so reads and upserts can share the connection
+            cursor.execute(query, (last_timestamp, last_timestamp, last_id, BACKFILL_BATCH))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            closed = {}
+            for row in rows:
+                for table, table_rows in aggregator.add(row[1:]).items():
+                    closed.setdefault(table, []).extend(table_rows)
+            last_id, last_timestamp = rows[-1][0], rows[-1][1]
+            count += len(rows)
+            upsert_rollups(cursor, closed)
+            connection.commit()
+        upsert_rollups(cursor, aggregator.flush_open())
+    connection.commit()
+    logging.info(f"Backfilled rollups from {count} system_monitor rows")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        with mysql.connector.connect(**db_config) as connection:
+            backfill(connection, sys.argv[1] if len(sys.argv) > 1 else None)
+    except Error as e:
+        logging.error(f"Error backfilling rollups: {e}")
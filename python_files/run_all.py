@@ -167,7 +167,8 @@ scripts = [
     "process_monitor_final.py",
     "system_static_live.py",
     "user_activity_suraj.py",
-    "ufw.py"
+    "ufw.py",
+    "retention.py"
 ]
 
 VENV_PATH = "/home/cstg-ubuntu/Desktop/Threat_Erase_New/Souvik"
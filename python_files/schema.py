@@ -0,0 +1,546 @@
+import sys
+import time
+import logging
+from datetime import datetime, timedelta
+import mysql.connector
+from mysql.connector import Error
+from db_config import db_config
+
+SCHEMA_VERSION_TABLE = "schema_version"
+LOG_SCHEMA_VERSION_TABLE = "log_schema_version"  # The log tables are versioned on their own, see LOG_MIGRATIONS
+BENCHMARK_ROWS = 10_000_000  # Rows seeded per table by "schema.py benchmark"
+BENCHMARK_DATABASE_SUFFIX = "_schema_bench"  # The benchmark works on a scratch copy of the schema
+SCAN_ROWS_LIMIT = 10000  # A table or index scan expected to read more rows than this counts as a full scan
+
+# Latest definition of every table; create_tables() creates the missing ones
+TABLES = {}
+
+TABLES['Hardware_Change_Tracking'] = (
+    "CREATE TABLE Hardware_Change_Tracking ("
+    "  timestamp DATETIME NOT NULL,"
+    "  hw_id VARCHAR(255) NOT NULL,"
+    "  hw_type VARCHAR(255),"
+    "  hw_description TEXT,"
+    "  hw_status VARCHAR(50) NOT NULL,"
+    "  battery_percentage INT,"
+    "  power_source VARCHAR(50),"
+    "  PRIMARY KEY (timestamp, hw_id, hw_status)"
+    ")"
+)
+
+TABLES['Initial_Hardware_Config'] = (
+    "CREATE TABLE Initial_Hardware_Config ("
+    "  timestamp DATETIME NOT NULL,"
+    "  hw_id VARCHAR(255) NOT NULL,"
+    "  hw_type VARCHAR(255),"
+    "  hw_description TEXT,"
+    "  hw_status VARCHAR(50) NOT NULL,"
+    "  battery_percentage INT,"
+    "  power_source VARCHAR(50),"
+    "  PRIMARY KEY (timestamp, hw_id, hw_status)"
+    ")"
+)
+
+TABLES['anomalous_logs'] = (
+    "CREATE TABLE anomalous_logs ("
+    "  log_id BINARY(16) NOT NULL,"
+    "  timestamp DATETIME NOT NULL,"
+    "  pid VARCHAR(20),"
+    "  priority INT,"
+    "  description TEXT,"
+    "  file_name VARCHAR(255),"
+    "  matched_pattern VARCHAR(255),"
+    "  PRIMARY KEY (log_id, timestamp)"
+    ")"
+)
+
+TABLES['file_paths'] = (
+    "CREATE TABLE file_paths ("
+    "  file_name VARCHAR(255) NOT NULL,"
+    "  paths TEXT NOT NULL,"
+    "  last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,"
+    "  PRIMARY KEY (file_name)"
+    ")"
+)
+
+TABLES['installed_software'] = (
+    "CREATE TABLE installed_software ("
+    "  sw_id VARCHAR(255) NOT NULL,"
+    "  sw_name VARCHAR(255) NOT NULL,"
+    "  sw_privilege VARCHAR(50),"
+    "  path VARCHAR(255) NOT NULL,"
+    "  installation_timestamp DATETIME,"
+    "  libraries TEXT,"
+    "  version VARCHAR(100),"
+    "  PRIMARY KEY (sw_id, sw_name)"
+    ")"
+)
+
+TABLES['last_processed'] = (
+    "CREATE TABLE last_processed ("
+    "  file_name VARCHAR(255) NOT NULL,"
+    "  last_log_id BINARY(16),"
+    "  inode BIGINT UNSIGNED,"
+    "  device BIGINT UNSIGNED,"
+    "  byte_offset BIGINT UNSIGNED NOT NULL DEFAULT 0,"
+    "  partial_line MEDIUMBLOB,"
+    "  journal_cursor TEXT,"
+    "  PRIMARY KEY (file_name)"
+    ")"
+)
+
+TABLES['log_settings'] = (
+    "CREATE TABLE log_settings ("
+    "  name VARCHAR(64) NOT NULL,"
+    "  value VARCHAR(255) NOT NULL,"
+    "  PRIMARY KEY (name)"
+    ")"
+)
+
+TABLES['login_events'] = (
+    "CREATE TABLE login_events ("
+    "  id INT AUTO_INCREMENT PRIMARY KEY,"
+    "  event VARCHAR(255),"
+    "  timestamp DATETIME(3)"
+    ")"
+)
+
+TABLES['metric_series'] = (
+    "CREATE TABLE metric_series ("
+    "  id SMALLINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,"
+    "  entity_type VARCHAR(16) NOT NULL,"
+    "  entity VARCHAR(255) NOT NULL,"
+    "  metric VARCHAR(32) NOT NULL,"
+    "  UNIQUE KEY entity_metric (entity_type, entity, metric)"
+    ")"
+)
+
+TABLES['network_interfaces'] = (
+    "CREATE TABLE network_interfaces ("
+    "  timestamp DATETIME NOT NULL,"
+    "  interface_name VARCHAR(255) NOT NULL,"
+    "  status VARCHAR(50) NOT NULL,"
+    "  duplex VARCHAR(50),"
+    "  speed INT,"
+    "  mtu INT,"
+    "  ipv4_address VARCHAR(255),"
+    "  ipv4_netmask VARCHAR(255),"
+    "  ipv4_broadcast VARCHAR(255),"
+    "  ipv6_address VARCHAR(255),"
+    "  mac_address VARCHAR(255),"
+    "  PRIMARY KEY (timestamp, interface_name, status)"
+    ")"
+)
+
+TABLES['open_ports'] = (
+    "CREATE TABLE open_ports ("
+    "  id INT AUTO_INCREMENT,"
+    "  port_number INT NOT NULL,"
+    "  protocol VARCHAR(10) NOT NULL,"
+    "  process_name VARCHAR(255),"
+    "  pid INT,"
+    "  command_line TEXT,"
+    "  timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,"
+    "  PRIMARY KEY (id, timestamp)"
+    ")"
+)
+
+TABLES['patterns'] = (
+    "CREATE TABLE patterns ("
+    "  pattern VARCHAR(255) NOT NULL,"
+    "  file_name VARCHAR(255) NOT NULL,"
+    "  PRIMARY KEY (pattern, file_name)"
+    ")"
+)
+
+TABLES['process_info'] = (
+    "CREATE TABLE process_info ("
+    "  process_name VARCHAR(255) NOT NULL,"
+    "  path VARCHAR(255) NOT NULL,"
+    "  pid INT NOT NULL,"
+    "  create_time DATETIME(3) NOT NULL,"
+    "  ppid INT,"
+    "  active_connections INT,"
+    "  first_seen DATETIME,"
+    "  exited_at DATETIME,"
+    "  PRIMARY KEY (pid, create_time),"
+    "  KEY process_running (exited_at)"
+    ")"
+)
+
+TABLES['process_resources'] = (
+    "CREATE TABLE process_resources ("
+    "  pid INT NOT NULL,"
+    "  cpu_usage FLOAT,"
+    "  ram_usage FLOAT,"
+    "  data_sent_mb FLOAT,"
+    "  data_received_mb FLOAT,"
+    "  timestamp DATETIME(6) NOT NULL,"
+    "  PRIMARY KEY (pid, timestamp),"
+    "  KEY resources_time (timestamp)"
+    ")"
+)
+
+TABLES['software_monitor'] = (
+    "CREATE TABLE software_monitor ("
+    "  id INT AUTO_INCREMENT PRIMARY KEY,"
+    "  sw_id VARCHAR(255),"
+    "  sw_name TEXT,"
+    "  sw_privileges TEXT,"
+    "  sw_path TEXT,"
+    "  libraries TEXT,"
+    "  action TEXT,"
+    "  timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+    ")"
+)
+
+TABLES['system_details'] = (
+    "CREATE TABLE system_details ("
+    "  timestamp DATETIME NOT NULL PRIMARY KEY,"
+    "  host_name VARCHAR(255),"
+    "  interface_count INT,"
+    "  cpu_count INT,"
+    "  cpu_freq FLOAT,"
+    "  ram_size FLOAT,"
+    "  virtual_mem_size FLOAT,"
+    "  gpu_size FLOAT,"
+    "  os_type VARCHAR(50),"
+    "  os_details TEXT,"
+    "  os_release VARCHAR(50),"
+    "  system_arch VARCHAR(50),"
+    "  kernel_version VARCHAR(255),"
+    "  boot_time DATETIME"
+    ")"
+)
+
+TABLES['system_metrics'] = (
+    "CREATE TABLE system_metrics ("
+    "  id BIGINT UNSIGNED AUTO_INCREMENT,"
+    "  series_id SMALLINT UNSIGNED NOT NULL,"
+    "  timestamp DATETIME NOT NULL,"
+    "  value FLOAT,"
+    "  PRIMARY KEY (id, timestamp),"
+    "  KEY series_time (series_id, timestamp)"
+    ")"
+)
+
+TABLES['system_monitor'] = (
+    "CREATE TABLE system_monitor ("
+    "  id INT AUTO_INCREMENT,"
+    "  timestamp DATETIME NOT NULL,"
+    "  cpu_usage FLOAT,"
+    "  gpu_usage FLOAT,"
+    "  ram_usage FLOAT,"
+    "  disk_usage FLOAT,"
+    "  kb_sent FLOAT,"
+    "  kb_received FLOAT,"
+    "  PRIMARY KEY (id, timestamp),"
+    "  KEY monitor_time (timestamp, id)"
+    ")"
+)
+
+# 1-minute, 1-hour and 1-day rollups of system_monitor, kept up to date by
+# system_static_live.py and backfilled with rollup.py
+rollup_columns = "".join(
+    f"  {metric}_min FLOAT,  {metric}_max FLOAT,  {metric}_avg FLOAT,  {metric}_p95 FLOAT,"
+    for metric in ("cpu_usage", "gpu_usage", "ram_usage", "disk_usage", "kb_sent", "kb_received")
+)
+for rollup_table in ('system_monitor_1m', 'system_monitor_1h', 'system_monitor_1d'):
+    TABLES[rollup_table] = (
+        f"CREATE TABLE {rollup_table} ("
+        "  bucket DATETIME NOT NULL PRIMARY KEY,"
+        "  sample_count INT NOT NULL,"
+        f"{rollup_columns.rstrip(',')}"
+        ")"
+    )
+
+TABLES['ufw_logs'] = (
+    "CREATE TABLE ufw_logs ("
+    "  timestamp DATETIME NOT NULL,"
+    "  action VARCHAR(10),"
+    "  interface VARCHAR(50),"
+    "  src_ip VARCHAR(50) NOT NULL,"
+    "  dst_ip VARCHAR(50),"
+    "  protocol VARCHAR(10),"
+    "  src_port INT NOT NULL,"
+    "  dst_port INT NOT NULL,"
+    "  PRIMARY KEY (timestamp, src_ip, src_port, dst_port)"
+    ")"
+)
+
+TABLES['user_activity'] = (
+    "CREATE TABLE user_activity ("
+    "  id INT AUTO_INCREMENT,"
+    "  event_type VARCHAR(50),"
+    "  message TEXT,"
+    "  timestamp DATETIME NOT NULL,"
+    "  PRIMARY KEY (id, timestamp),"
+    "  KEY activity_event_time (event_type, timestamp),"
+    "  KEY activity_time (timestamp)"
+    ")"
+)
+
+# Tables the ingest package feeds. A database holding only ingested logs
+# (Threat_Erase_DB) has just these, set up by setup_log_tables() whenever the
+# ingest package starts feeding it, so they carry their own version.
+LOG_TABLES = ('anomalous_logs', 'file_paths', 'last_processed', 'log_settings', 'patterns')
+
+# (version, description, statements), applied in order by migrate(). A database
+# created from the current TABLES starts at the latest version; never edit a
+# migration that has shipped, add a new one instead. LOG_MIGRATIONS only touch
+# LOG_TABLES and are recorded in LOG_SCHEMA_VERSION_TABLE; MIGRATIONS cover
+# every other table and are recorded in SCHEMA_VERSION_TABLE.
+LOG_MIGRATIONS = [
+    (1, "Log read checkpoints, journal cursors and binary log ids", [
+        "ALTER TABLE last_processed"
+        "  ADD COLUMN IF NOT EXISTS inode BIGINT UNSIGNED,"
+        "  ADD COLUMN IF NOT EXISTS device BIGINT UNSIGNED,"
+        "  ADD COLUMN IF NOT EXISTS byte_offset BIGINT UNSIGNED NOT NULL DEFAULT 0,"
+        "  ADD COLUMN IF NOT EXISTS partial_line MEDIUMBLOB,"
+        "  ADD COLUMN IF NOT EXISTS journal_cursor TEXT",
+        "ALTER TABLE anomalous_logs"
+        "  ADD COLUMN IF NOT EXISTS matched_pattern VARCHAR(255)",
+        # Log ids went from 64-character hex SHA-256 strings to 16 raw bytes;
+        # old ids keep their first 16 bytes, which only the sha256 scheme
+        # reproduces, so the database is pinned to it. Otherwise entries read
+        # again after the upgrade would be stored a second time under new ids.
+        "INSERT INTO log_settings (name, value) VALUES ('log_id_scheme', 'sha256') "
+        "ON DUPLICATE KEY UPDATE value = VALUES(value)",
+        "ALTER TABLE anomalous_logs MODIFY log_id VARBINARY(64) NOT NULL",
+        "UPDATE anomalous_logs SET log_id = UNHEX(LEFT(log_id, 32)) WHERE LENGTH(log_id) = 64",
+        "ALTER TABLE anomalous_logs MODIFY log_id BINARY(16) NOT NULL",
+        "ALTER TABLE last_processed MODIFY last_log_id VARBINARY(64)",
+        "UPDATE last_processed SET last_log_id = UNHEX(LEFT(last_log_id, 32)) WHERE LENGTH(last_log_id) = 64",
+        "ALTER TABLE last_processed MODIFY last_log_id BINARY(16)",
+    ]),
+    (2, "Timestamp in the primary key of anomalous_logs", [
+        # Partitioned tables need the partitioning column in every unique key (see retention.py)
+        "ALTER TABLE anomalous_logs DROP PRIMARY KEY, ADD PRIMARY KEY (log_id, timestamp)",
+    ]),
+]
+
+MIGRATIONS = [
+    (1, "Timestamp in the primary key of partitioned tables", [
+        # Partitioned tables need the partitioning column in every unique key (see retention.py)
+        "ALTER TABLE open_ports DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp)",
+        "ALTER TABLE system_metrics DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp)",
+        "ALTER TABLE system_monitor DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp)",
+        # Rows without a timestamp cannot be placed in a partition; they are treated as expired
+        "UPDATE user_activity SET timestamp = '1970-01-01 00:00:00' WHERE timestamp IS NULL",
+        "ALTER TABLE user_activity MODIFY timestamp DATETIME NOT NULL, DROP PRIMARY KEY, ADD PRIMARY KEY (id, timestamp)",
+    ]),
+    (2, "Indexes for the dashboard's time-range queries", [
+        "ALTER TABLE system_monitor ADD INDEX IF NOT EXISTS monitor_time (timestamp, id)",
+        "ALTER TABLE user_activity"
+        "  ADD INDEX IF NOT EXISTS activity_event_time (event_type, timestamp),"
+        "  ADD INDEX IF NOT EXISTS activity_time (timestamp)",
+        "ALTER TABLE process_resources ADD INDEX IF NOT EXISTS resources_time (timestamp)",
+    ]),
+    (3, "process_info keyed by (pid, create_time) with exit times", [
+        # Rows keyed by name cannot be matched to processes; the monitor repopulates the table on its next cycle
+        "DELETE FROM process_info",
+        "ALTER TABLE process_info"
+        "  ADD COLUMN IF NOT EXISTS create_time DATETIME(3) NOT NULL AFTER pid,"
+        "  ADD COLUMN IF NOT EXISTS exited_at DATETIME,"
+        "  MODIFY pid INT NOT NULL,"
+        "  DROP PRIMARY KEY,"
+        "  ADD PRIMARY KEY (pid, create_time),"
+        "  ADD INDEX IF NOT EXISTS process_running (exited_at)",
+    ]),
+]
+
+# (endpoint, query, params) for the dashboard's time-range queries, as the ORM issues them
+def hot_queries(now=None):
+    now = now or datetime.now()
+    since = now - timedelta(hours=1)
+    return [
+        ("/system-info/ latest", "SELECT * FROM system_monitor ORDER BY timestamp DESC LIMIT 1", ()),
+        ("/system-info/ window", "SELECT * FROM system_monitor WHERE timestamp >= %s AND timestamp <= %s "
+         "ORDER BY timestamp", (since, now)),
+        ("/historical/ page", "SELECT id, timestamp FROM system_monitor WHERE timestamp < %s OR (timestamp = %s AND id < %s) "
+         "ORDER BY timestamp DESC, id DESC LIMIT 1000", (since, since, 2 ** 31 - 1)),
+        ("/historical/ span", "SELECT MIN(timestamp), MAX(timestamp) FROM system_monitor", ()),
+        ("app events", "SELECT * FROM user_activity WHERE event_type IN ('app_started', 'app_closed') AND timestamp > %s "
+         "ORDER BY timestamp", (since,)),
+        ("file events", "SELECT * FROM user_activity WHERE event_type IN ('created', 'deleted', 'modified', 'moved') "
+         "AND timestamp > %s ORDER BY timestamp", (since,)),
+        ("window events", "SELECT * FROM user_activity WHERE event_type = 'window_switch' AND timestamp > %s "
+         "ORDER BY timestamp", (since,)),
+        ("activity latest", "SELECT * FROM user_activity ORDER BY timestamp DESC LIMIT 1", ()),
+        ("hardware changes", "SELECT * FROM Hardware_Change_Tracking WHERE timestamp > %s ORDER BY timestamp", (since,)),
+        ("process resources", "SELECT * FROM process_resources ORDER BY timestamp DESC LIMIT 1000", ()),
+    ]
+
+def existing_tables(cursor):
+    cursor.execute("SELECT TABLE_NAME FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE()")
+    return {row[0] for row in cursor.fetchall()}
+
+def table_definition(table_name, description_column='description'):
+    """The CREATE TABLE statement of table_name; Threat_Erase_DB names the log description column `desc`."""
+    definition = TABLES[table_name]
+    if table_name == 'anomalous_logs':
+        definition = definition.replace("  description TEXT,", f"  `{description_column}` TEXT,")
+    return definition
+
+def create_tables(cursor, existing=None, tables=None, description_column='description'):
+    """Creates every table in tables (default: all of TABLES) that does not exist yet."""
+    existing = existing_tables(cursor) if existing is None else existing
+    for table_name in tables or TABLES:
+        if table_name in existing:
+            continue
+        try:
+            cursor.execute(table_definition(table_name, description_column))
+            logging.info(f"Created table {table_name}")
+        except Error as e:
+            logging.error(f"Failed to create table {table_name}: {e}")
+
+def current_version(cursor, version_table=SCHEMA_VERSION_TABLE):
+    cursor.execute(f"SELECT COALESCE(MAX(version), 0) FROM {version_table}")
+    return cursor.fetchone()[0]
+
+def record_version(cursor, version, description, version_table=SCHEMA_VERSION_TABLE):
+    cursor.execute(f"INSERT INTO {version_table} (version, description) VALUES (%s, %s)", (version, description))
+
+def migrate(cursor, migrations=MIGRATIONS, version_table=SCHEMA_VERSION_TABLE):
+    """Applies the pending migrations in order; returns the resulting version.
+
+    A migration is recorded only once all of its statements succeeded, so a
+    failing one stops the run and is retried from its start next time.
+    """
+    version = current_version(cursor, version_table)
+    for migration_version, description, statements in migrations:
+        if migration_version <= version:
+            continue
+        logging.info(f"Applying migration {migration_version} ({version_table}): {description}")
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+            record_version(cursor, migration_version, description, version_table)
+        except Error as e:
+            logging.error(f"Migration {migration_version} failed, staying at version {version} ({version_table}): {e}")
+            break
+        version = migration_version
+    return version
+
+def setup_tables(cursor, tables, migrations, version_table, description_column='description'):
+    """Creates the missing tables among tables and brings them up to the latest of migrations.
+
+    If none of tables exist yet they are created from TABLES and stamped
+    with the latest version; otherwise the pending migrations are applied.
+    """
+    existing = existing_tables(cursor)
+    fresh = not existing & set(tables)
+    create_tables(cursor, existing, tables, description_column)
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {version_table} ("
+        "  version INT NOT NULL PRIMARY KEY,"
+        "  description VARCHAR(255),"
+        "  applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+        ")"
+    )
+    if fresh and current_version(cursor, version_table) == 0:
+        version, description, _ = migrations[-1]
+        record_version(cursor, version, description, version_table)
+        return version
+    return migrate(cursor, migrations, version_table)
+
+def setup_log_tables(cursor, description_column='description'):
+    """Creates and migrates only LOG_TABLES, for a database the ingest package feeds."""
+    return setup_tables(cursor, LOG_TABLES, LOG_MIGRATIONS, LOG_SCHEMA_VERSION_TABLE, description_column)
+
+def setup(cursor):
+    """Creates missing tables and brings the log tables and all others up to their latest versions.
+
+    Returns the version of the tables other than LOG_TABLES.
+    """
+    logging.info(f"Log tables at schema version {setup_log_tables(cursor)}")
+    return setup_tables(cursor, [table for table in TABLES if table not in LOG_TABLES], MIGRATIONS, SCHEMA_VERSION_TABLE)
+
+def explain(cursor, query, params=()):
+    """Returns the EXPLAIN rows of query as dicts."""
+    cursor.execute(f"EXPLAIN {query}", params)
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def report_queries(cursor, queries=None):
+    """Logs the plan and run time of every hot query and returns the endpoints that scan a whole table or index."""
+    full_scans = []
+    for endpoint, query, params in queries or hot_queries():
+        plan = explain(cursor, query, params)
+        started = time.perf_counter()
+        cursor.execute(query, params)
+        row_count = len(cursor.fetchall())
+        elapsed = time.perf_counter() - started
+        for step in plan:
+            logging.info(f"{endpoint}: table={step['table']} type={step['type']} key={step['key']} "
+                         f"rows={step['rows']} extra={step['Extra']}")
+            # An index walk that stops at a LIMIT is fine; one over the whole table is not
+            if step["type"] in ("ALL", "index") and (step["rows"] or 0) > SCAN_ROWS_LIMIT:
+                full_scans.append(endpoint)
+        logging.info(f"{endpoint}: {row_count} rows in {elapsed * 1000:.1f} ms")
+    return full_scans
+
+def seed_benchmark_rows(cursor, rows):
+    """Fills the hot tables with rows one second apart, ending now, using MariaDB's sequence engine."""
+    statements = [
+        "INSERT INTO system_monitor (timestamp, cpu_usage, gpu_usage, ram_usage, disk_usage, kb_sent, kb_received) "
+        "SELECT NOW() - INTERVAL seq SECOND, RAND() * 100, RAND() * 100, RAND() * 100, RAND() * 100, RAND() * 1000, RAND() * 1000 "
+        f"FROM seq_1_to_{rows}",
+        "INSERT INTO user_activity (event_type, message, timestamp) "
+        "SELECT ELT(1 + seq % 8, 'app_started', 'app_closed', 'created', 'deleted', 'modified', 'moved', 'window_switch', 'login'), "
+        f"CONCAT('event ', seq), NOW() - INTERVAL seq SECOND FROM seq_1_to_{rows}",
+        "INSERT INTO Hardware_Change_Tracking (timestamp, hw_id, hw_type, hw_status) "
+        f"SELECT NOW() - INTERVAL seq SECOND, CONCAT('hw', seq % 16), 'usb', 'connected' FROM seq_1_to_{rows}",
+        "INSERT INTO process_resources (pid, cpu_usage, ram_usage, data_sent_mb, data_received_mb, timestamp) "
+        f"SELECT seq % 500, RAND() * 100, RAND() * 100, RAND(), RAND(), NOW(6) - INTERVAL seq SECOND FROM seq_1_to_{rows}",
+    ]
+    for statement in statements:
+        logging.info(f"Seeding: {statement[:60]}...")
+        cursor.execute(statement)
+    for table in ("system_monitor", "user_activity", "Hardware_Change_Tracking", "process_resources"):
+        cursor.execute(f"ANALYZE TABLE {table}")
+        cursor.fetchall()
+
+def benchmark(rows=BENCHMARK_ROWS):
+    """Builds a scratch database with rows rows per hot table and reports how each endpoint query is executed.
+
+    Returns the endpoints whose plan is a full table or index scan.
+    """
+    database = db_config["database"] + BENCHMARK_DATABASE_SUFFIX
+    config = {key: value for key, value in db_config.items() if key != "database"}
+    with mysql.connector.connect(**config) as connection:
+        with connection.cursor(buffered=True) as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS {database}")
+            cursor.execute(f"CREATE DATABASE {database}")
+            cursor.execute(f"USE {database}")
+            try:
+                setup(cursor)
+                seed_benchmark_rows(cursor, rows)
+                connection.commit()
+                full_scans = report_queries(cursor)
+            finally:
+                cursor.execute(f"DROP DATABASE IF EXISTS {database}")
+    if full_scans:
+        logging.warning(f"Full scans at {rows} rows: {full_scans}")
+    else:
+        logging.info(f"Every hot query uses an index at {rows} rows")
+    return full_scans
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    command = sys.argv[1] if len(sys.argv) > 1 else "migrate"
+    try:
+        if command == "benchmark":
+            sys.exit(1 if benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else BENCHMARK_ROWS) else 0)
+        with mysql.connector.connect(**db_config) as connection:
+            with connection.cursor(buffered=True) as cursor:
+                if command == "migrate":
+                    logging.info(f"Schema at version {setup(cursor)}")
+                elif command == "explain":
+                    report_queries(cursor)
+                else:
+                    sys.exit(f"Usage: {sys.argv[0]} [migrate | explain | benchmark [ROWS]]")
+            connection.commit()
+    except Error as e:
+        logging.error(f"Database error: {e}")
+        sys.exit(1)
@@ -0,0 +1,116 @@
+import os
+import socket
+from collections import defaultdict, namedtuple
+
+PROC_ROOT = "/proc"
+NET_TABLES = {
+    # /proc/net file -> (protocol, address family)
+    "tcp": ("tcp", socket.AF_INET),
+    "tcp6": ("tcp", socket.AF_INET6),
+    "udp": ("udp", socket.AF_INET),
+    "udp6": ("udp", socket.AF_INET6),
+}
+TCP_STATES = {
+    "01": "ESTABLISHED", "02": "SYN_SENT", "03": "SYN_RECV", "04": "FIN_WAIT1", "05": "FIN_WAIT2",
+    "06": "TIME_WAIT", "07": "CLOSE", "08": "CLOSE_WAIT", "09": "LAST_ACK", "0A": "LISTEN", "0B": "CLOSING",
+}  # Same names as psutil's CONN_* constants; UDP sockets have no state ("NONE")
+
+SocketEntry = namedtuple("SocketEntry", "inode protocol family local_ip local_port remote_ip remote_port status")
+
+def parse_address(address, family):
+    """Turns a /proc/net 'HEXIP:HEXPORT' pair into (ip, port); the IP words are in host (little-endian) order."""
+    hex_ip, hex_port = address.split(":")
+    raw = bytes.fromhex(hex_ip)
+    raw = b"".join(raw[i:i + 4][::-1] for i in range(0, len(raw), 4))
+    return socket.inet_ntop(family, raw), int(hex_port, 16)
+
+def read_sockets(proc_root=PROC_ROOT):
+    """Returns {inode: SocketEntry} for every TCP and UDP socket in /proc/net, over both address families."""
+    sockets = {}
+    for table, (protocol, family) in NET_TABLES.items():
+        try:
+            with open(os.path.join(proc_root, "net", table)) as f:
+                next(f, None)  # Header
+                for line in f:
+                    fields = line.split()
+                    inode = int(fields[9])
+                    if not inode:
+                        continue  # TIME_WAIT and other orphaned sockets belong to no process
+                    local_ip, local_port = parse_address(fields[1], family)
+                    remote_ip, remote_port = parse_address(fields[2], family)
+                    status = TCP_STATES.get(fields[3], "NONE") if protocol == "tcp" else "NONE"
+                    sockets[inode] = SocketEntry(inode, protocol, family, local_ip, local_port, remote_ip, remote_port, status)
+        except FileNotFoundError:
+            continue  # No IPv6, for instance
+    return sockets
+
+def iter_process_fds(proc_root=PROC_ROOT, unreadable=None):
+    """Yields (pid, fd, link target) for every open file descriptor of every process, in one pass over /proc.
+
+    Processes whose fd directory cannot be read (other users' without root)
+    are skipped and, if given, added to the unreadable set.
+    """
+    with os.scandir(proc_root) as entries:
+        pids = [int(entry.name) for entry in entries if entry.name.isdigit()]
+    for pid in pids:
+        fd_dir = os.path.join(proc_root, str(pid), "fd")
+        try:
+            with os.scandir(fd_dir) as fds:
+                for fd in fds:
+                    try:
+                        yield pid, int(fd.name), os.readlink(fd.path)
+                    except OSError:
+                        continue  # Closed between listing and readlink
+        except PermissionError:
+            if unreadable is not None:
+                unreadable.add(pid)
+        except (FileNotFoundError, ProcessLookupError, NotADirectoryError):
+            continue  # Exited
+
+class SocketIndex:
+    """Socket inode <-> pid index built from one pass over /proc/net and /proc/*/fd.
+
+    psutil's Process.net_connections() re-reads the /proc/net tables and the
+    process's fd directory on every call, so asking for every process costs
+    a table scan per process. Build one index per cycle and query it instead.
+    """
+
+    def __init__(self, sockets, pids_by_inode, unreadable_pids):
+        self.sockets = sockets  # Inode -> SocketEntry
+        self.pids_by_inode = pids_by_inode  # Inode -> [pids]; a socket is shared after fork()
+        self.inodes_by_pid = defaultdict(list)
+        for inode, pids in pids_by_inode.items():
+            for pid in pids:
+                self.inodes_by_pid[pid].append(inode)
+        self.unreadable_pids = unreadable_pids  # Pids whose sockets are unknown
+
+    @classmethod
+    def build(cls, proc_root=PROC_ROOT):
+        sockets = read_sockets(proc_root)
+        pids_by_inode = defaultdict(list)
+        unreadable = set()
+        for pid, _, target in iter_process_fds(proc_root, unreadable):
+            if target.startswith("socket:["):
+                inode = int(target[8:-1])
+                if inode in sockets:
+                    pids_by_inode[inode].append(pid)
+        return cls(sockets, pids_by_inode, unreadable)
+
+    def connections(self, pid):
+        """The TCP/UDP sockets open in pid, like psutil's net_connections(kind='inet')."""
+        return [self.sockets[inode] for inode in self.inodes_by_pid.get(pid, ())]
+
+    def connection_count(self, pid):
+        """Number of TCP/UDP sockets open in pid, or None if its file descriptors could not be read."""
+        if pid in self.unreadable_pids:
+            return None
+        return len(self.inodes_by_pid.get(pid, ()))
+
+    def listening_ports(self):
+        """Sorted (port, pid) pairs of listening TCP sockets; pid is None when the owner is unknown."""
+        ports = set()
+        for inode, entry in self.sockets.items():
+            if entry.status == "LISTEN":
+                for pid in self.pids_by_inode.get(inode) or [None]:
+                    ports.add((entry.local_port, pid))
+        return sorted(ports, key=lambda pair: (pair[0], pair[1] or 0))
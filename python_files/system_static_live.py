@@ -11,11 +11,26 @@ import socket
 import platform
 import logging
 import shutil  # Import shutil module
+import threading
+import queue
 from db_config import db_config
+from rollup import RollupAggregator, upsert_rollups
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+SAMPLE_INTERVAL = float(os.environ.get('SAMPLE_INTERVAL', 1.0))  # Seconds between samples (1 Hz by default)
+JITTER_REPORT_INTERVAL = 60  # Log tick jitter statistics this often (seconds)
+DISK_USAGE_PATH = '/'  # Filesystem reported as "Disk Usage (%)"
+EXCLUDED_DISK_PREFIXES = ("loop", "ram", "zram")  # Virtual block devices left out of the per-disk series
+SAMPLE_BATCH_ROWS = int(os.environ.get('SAMPLE_BATCH_ROWS', 30))  # Insert samples once this many are buffered...
+SAMPLE_BATCH_AGE = float(os.environ.get('SAMPLE_BATCH_AGE', 30))  # ...or once the oldest buffered sample is this old (seconds)
+SPILL_FILE = os.environ.get('SAMPLE_SPILL_FILE', 'system_monitor_spill.jsonl')  # Samples kept here while the database is down
+SPILL_MAX_BYTES = 64 * 1024 * 1024  # Stop spilling (and drop samples) beyond this size
+SPILL_REPLAY_CHUNK = 200  # Spilled samples inserted per transaction when replaying
+SERIES_IDS = {}  # (entity_type, entity, metric) -> metric_series.id, see get_series_ids()
+CONSOLE_OUTPUT = os.environ.get('SYSTEM_MONITOR_CONSOLE', 'off')  # 'json' (old indented dump), 'compact' or 'off'
+
 # Define a list of known system process names to exclude
 EXCLUDED_PROCESS_NAMES = [
     "systemd", "gnome-shell", "Xorg", "Xwayland", "ibus-x11",
@@ -92,61 +107,240 @@ def store_system_details_in_db(details):
     except Error as err:
         logging.error(f"Error updating system details: {err}")
 
-def get_network_usage_per_second():
-    """
-    Fetches network usage (KB sent and received) per second.
+class ProcSampler:
+    """Reads CPU, RAM, disk and network counters straight from /proc once per tick.
+
+    Rates and percentages are computed against the previous sample, so a tick
+    never has to sleep to measure anything and needs no subprocess. Besides
+    the host-wide values stored in system_monitor, each sample carries
+    per-core, per-mountpoint, per-disk and per-interface series as
+    (entity_type, entity, metric, value) tuples for system_metrics.
     """
-    # Measure network usage before and after a 1-second interval
-    interval = 1
-    
-    net_io_start = psutil.net_io_counters()
-    bytes_sent_start = net_io_start.bytes_sent
-    bytes_recv_start = net_io_start.bytes_recv
-    
-    time.sleep(interval)
-    
-    net_io_end = psutil.net_io_counters()
-    bytes_sent_end = net_io_end.bytes_sent
-    bytes_recv_end = net_io_end.bytes_recv
-    
-    bytes_sent_diff = bytes_sent_end - bytes_sent_start
-    bytes_recv_diff = bytes_recv_end - bytes_recv_start
-    
-    kb_sent_per_sec = round(bytes_sent_diff / 1024 / interval, 2)
-    kb_recv_per_sec = round(bytes_recv_diff / 1024 / interval, 2)
-
-    return {
-        "KB Sent Per Second": kb_sent_per_sec,
-        "KB Received Per Second": kb_recv_per_sec
-    }
 
-def get_system_utilization():
-    """Fetches CPU, GPU, RAM, and Disk percentage usage."""
-    try:
+    def __init__(self, disk_path=DISK_USAGE_PATH, gpu_monitor=None):
+        self.disk_path = disk_path
+        self.gpu_monitor = gpu_monitor
+        self.previous = self._read_counters()
+
+    @staticmethod
+    def _read_cpu_times():
+        """Returns {'cpu': (busy, total), 'cpu0': ...} from /proc/stat."""
+        times = {}
+        with open("/proc/stat", "rb") as f:
+            for line in f:
+                if not line.startswith(b"cpu"):
+                    break
+                fields = line.split()
+                values = [int(value) for value in fields[1:]]
+                # guest and guest_nice are already counted in user and nice
+                total = sum(values[:8])
+                idle = values[3] + (values[4] if len(values) > 4 else 0)  # idle + iowait
+                times[fields[0].decode()] = (total - idle, total)
+        return times
+
+    @staticmethod
+    def _read_meminfo():
+        """Returns (total, available) memory in kB from /proc/meminfo."""
+        total = available = None
+        with open("/proc/meminfo", "rb") as f:
+            for line in f:
+                if line.startswith(b"MemTotal:"):
+                    total = int(line.split()[1])
+                elif line.startswith(b"MemAvailable:"):
+                    available = int(line.split()[1])
+                    break
+        return total, available
+
+    @staticmethod
+    def _read_net_dev():
+        """Returns {interface: (bytes received, bytes sent)} from /proc/net/dev."""
+        interfaces = {}
+        with open("/proc/net/dev", "rb") as f:
+            for line in f.readlines()[2:]:
+                name, counters = line.split(b":", 1)
+                fields = counters.split()
+                interfaces[name.strip().decode()] = (int(fields[0]), int(fields[8]))
+        return interfaces
+
+    @staticmethod
+    def _read_diskstats():
+        """Returns {disk: (reads, sectors read, writes, sectors written)} for whole disks from /proc/diskstats."""
+        disks = {}
+        with open("/proc/diskstats", "rb") as f:
+            for line in f:
+                fields = line.split()
+                name = fields[2].decode()
+                if name.startswith(EXCLUDED_DISK_PREFIXES) or not os.path.exists(f"/sys/block/{name}"):
+                    continue  # Partitions are covered by their disk
+                disks[name] = (int(fields[3]), int(fields[5]), int(fields[7]), int(fields[9]))
+        return disks
+
+    @staticmethod
+    def _read_mountpoints():
+        """Returns the mountpoints of block-device filesystems from /proc/mounts, one per device."""
+        mountpoints = {}
+        with open("/proc/mounts", "rb") as f:
+            for line in f:
+                device, mountpoint = line.split()[:2]
+                if device.startswith(b"/dev/") and not device.startswith(b"/dev/loop") and device not in mountpoints:
+                    mountpoints[device] = mountpoint.decode().replace("\\040", " ")
+        return sorted(mountpoints.values())
+
+    def _read_counters(self):
         return {
-            "CPU Usage (%)": psutil.cpu_percent(interval=None),  # Instantaneous CPU usage
-            "CPU Per-Core Usage (%)": psutil.cpu_percent(percpu=True, interval=None),  # Instantaneous per-core usage
-            "GPU Usage (%)": get_gpu_utilization(),
-            "RAM Usage (%)": psutil.virtual_memory().percent,
-            "Disk Usage (%)": psutil.disk_usage('/').percent
+            "time": time.monotonic(),
+            "cpu": self._read_cpu_times(),
+            "net": self._read_net_dev(),
+            "disk": self._read_diskstats(),
         }
-    except Exception as e:
-        logging.error(f"Error fetching system utilization: {e}")
-        return {"Error": str(e)}
-
-def get_gpu_utilization():
-    """Fetches GPU utilization if an NVIDIA GPU is present."""
-    if not shutil.which('nvidia-smi'):
-        return "N/A"
-    try:
-        output = subprocess.check_output(
-            "nvidia-smi --query-gpu=utilization.gpu --format=csv,noheader,nounits",
-            shell=True, text=True
-        )
-        return int(output.strip())
-    except Exception as e:
-        logging.error(f"Error fetching GPU utilization: {e}")
-        return "N/A"
+
+    @staticmethod
+    def _used_percent(path):
+        stats = os.statvfs(path)
+        used = (stats.f_blocks - stats.f_bfree) * stats.f_frsize
+        available = stats.f_bavail * stats.f_frsize
+        return round(used / (used + available) * 100, 1) if used + available else 0.0
+
+    def sample(self):
+        """Returns (network_data, system_data, series) for the time since the previous call."""
+        current = self._read_counters()
+        previous, self.previous = self.previous, current
+        elapsed = current["time"] - previous["time"]
+        series = []
+
+        def rate(current_value, previous_value, scale=1):
+            return round(max(current_value - previous_value, 0) / scale / elapsed, 2) if elapsed > 0 else 0.0
+
+        cpu_percent = {}
+        for name, (busy, total) in current["cpu"].items():
+            previous_busy, previous_total = previous["cpu"].get(name, (busy, total))
+            total_delta = total - previous_total
+            cpu_percent[name] = round(max(busy - previous_busy, 0) / total_delta * 100, 1) if total_delta > 0 else 0.0
+        cpu_total = cpu_percent.pop("cpu", 0.0)
+        cores = sorted(cpu_percent, key=lambda name: int(name[3:]))
+        series.extend(("cpu", core, "usage_pct", cpu_percent[core]) for core in cores)
+
+        received = sent = 0
+        for interface, (interface_received, interface_sent) in current["net"].items():
+            previous_received, previous_sent = previous["net"].get(interface, (interface_received, interface_sent))
+            received += max(interface_received - previous_received, 0)
+            sent += max(interface_sent - previous_sent, 0)
+            series.append(("nic", interface, "kb_sent", rate(interface_sent, previous_sent, 1024)))
+            series.append(("nic", interface, "kb_received", rate(interface_received, previous_received, 1024)))
+
+        for disk, counters in current["disk"].items():
+            reads, sectors_read, writes, sectors_written = counters
+            previous_reads, previous_sectors_read, previous_writes, previous_sectors_written = previous["disk"].get(disk, counters)
+            series.append(("disk", disk, "read_iops", rate(reads, previous_reads)))
+            series.append(("disk", disk, "write_iops", rate(writes, previous_writes)))
+            # diskstats counts 512-byte sectors regardless of the device's sector size
+            series.append(("disk", disk, "read_kbps", rate(sectors_read, previous_sectors_read, 2)))
+            series.append(("disk", disk, "write_kbps", rate(sectors_written, previous_sectors_written, 2)))
+
+        for mountpoint in self._read_mountpoints():
+            try:
+                series.append(("mount", mountpoint, "used_pct", self._used_percent(mountpoint)))
+            except OSError:
+                continue  # Unmounted or not accessible since /proc/mounts was read
+
+        mem_total, mem_available = self._read_meminfo()
+        network_data = {
+            "KB Sent Per Second": round(sent / 1024 / elapsed, 2) if elapsed > 0 else 0.0,
+            "KB Received Per Second": round(received / 1024 / elapsed, 2) if elapsed > 0 else 0.0
+        }
+        system_data = {
+            "CPU Usage (%)": cpu_total,
+            "CPU Per-Core Usage (%)": [cpu_percent[core] for core in cores],
+            "GPU Usage (%)": self.gpu_monitor.utilization() if self.gpu_monitor else "N/A",
+            "RAM Usage (%)": round((mem_total - mem_available) / mem_total * 100, 1) if mem_total and mem_available is not None else "N/A",
+            "Disk Usage (%)": self._used_percent(self.disk_path)
+        }
+        return network_data, system_data, series
+
+class GpuMonitor:
+    """Keeps one `nvidia-smi -l` process running and remembers its latest GPU utilization.
+
+    Replaces spawning nvidia-smi through a shell on every tick; the sampler
+    only reads the last value the reader thread saw.
+    """
+
+    def __init__(self, loop_seconds=1):
+        self.value = "N/A"
+        self.process = None
+        if not shutil.which('nvidia-smi'):
+            return
+        try:
+            self.process = subprocess.Popen(
+                ["nvidia-smi", "--query-gpu=utilization.gpu", "--format=csv,noheader,nounits",
+                 "-i", "0", "-l", str(loop_seconds)],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+            )
+        except OSError as e:
+            logging.error(f"Error starting nvidia-smi: {e}")
+            return
+        reader = threading.Thread(target=self._read_output, daemon=True)
+        reader.start()
+
+    def _read_output(self):
+        for line in self.process.stdout:
+            try:
+                self.value = int(line.strip())
+            except ValueError:
+                self.value = "N/A"
+        self.value = "N/A"
+        logging.warning("nvidia-smi exited, GPU utilization is no longer reported.")
+
+    def utilization(self):
+        return self.value
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+
+class TickScheduler:
+    """Wakes up on a fixed cadence and measures how late each tick starts.
+
+    Ticks are scheduled from the start time rather than from the end of the
+    previous tick, so the time a sample takes does not drift the cadence.
+    If a tick overruns by a whole interval the missed ticks are skipped.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL, report_interval=JITTER_REPORT_INTERVAL):
+        self.interval = interval
+        self.report_interval = report_interval
+        self.next_tick = time.monotonic()
+        self.jitters = []
+        self.skipped = 0
+        self.last_report = self.next_tick
+
+    def wait(self):
+        """Sleeps until the next tick and returns its jitter in seconds."""
+        self.next_tick += self.interval
+        now = time.monotonic()
+        if now > self.next_tick + self.interval:
+            missed = int((now - self.next_tick) // self.interval)
+            self.skipped += missed
+            self.next_tick += missed * self.interval
+        delay = self.next_tick - now
+        if delay > 0:
+            time.sleep(delay)
+        jitter = time.monotonic() - self.next_tick
+        self.jitters.append(jitter)
+        self._report()
+        return jitter
+
+    def _report(self):
+        now = time.monotonic()
+        if now - self.last_report < self.report_interval:
+            return
+        jitters = sorted(self.jitters)
+        p99 = jitters[min(len(jitters) - 1, int(len(jitters) * 0.99))]
+        logging.info(f"Sampling every {self.interval}s: {len(jitters)} ticks, jitter mean "
+                     f"{sum(jitters) / len(jitters) * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms, "
+                     f"max {jitters[-1] * 1000:.2f} ms, {self.skipped} ticks skipped")
+        self.jitters = []
+        self.skipped = 0
+        self.last_report = now
 
 def create_db_connection():
     """Create and return a database connection."""
@@ -156,41 +350,261 @@ def create_db_connection():
         logging.error(f"Error connecting to MariaDB Platform: {e}")
         return None
 
-def insert_data_into_db(connection, data):
-    """Insert data into the database."""
-    try:
-        with connection.cursor() as cursor:
-            query = """INSERT INTO system_monitor (timestamp, cpu_usage, gpu_usage, ram_usage, disk_usage, kb_sent, kb_received)
-                       VALUES (%s, %s, %s, %s, %s, %s, %s)"""
-            formatted_data = (
-                data[0],  # timestamp
-                float(data[1]) if data[1] != "N/A" else None,  # cpu_usage
-                float(data[2]) if data[2] != "N/A" else None,  # gpu_usage
-                float(data[3]) if data[3] != "N/A" else None,  # ram_usage
-                float(data[4]) if data[4] != "N/A" else None,  # disk_usage
-                float(data[5]) if data[5] != "N/A" else None,  # kb_sent
-                float(data[6]) if data[6] != "N/A" else None   # kb_received
-            )
-            cursor.execute(query, formatted_data)
-            connection.commit()
-    except Error as e:
-        logging.error(f"Error inserting data into database: {e}")
+def format_sample_row(data):
+    """Converts a (timestamp, cpu, gpu, ram, disk, kb_sent, kb_received) sample into a system_monitor row."""
+    return (data[0],) + tuple(float(value) if value != "N/A" else None for value in data[1:])
+
+def get_series_ids(cursor, keys):
+    """Returns {(entity_type, entity, metric): metric_series.id}, registering unknown series."""
+    missing = [key for key in set(keys) if key not in SERIES_IDS]
+    if missing:
+        cursor.executemany("INSERT IGNORE INTO metric_series (entity_type, entity, metric) VALUES (%s, %s, %s)", missing)
+        cursor.execute("SELECT id, entity_type, entity, metric FROM metric_series")
+        for series_id, entity_type, entity, metric in cursor.fetchall():
+            SERIES_IDS[(entity_type, entity, metric)] = series_id
+    return SERIES_IDS
+
+def insert_rows_into_db(connection, samples, rollups=None):
+    """Inserts (system_monitor row, metric rows) samples with one multi-row statement per table and commits.
+
+    Metric rows are (timestamp, entity_type, entity, metric, value); rollups
+    is {table: [rollup rows]} from RollupAggregator and is written in the
+    same transaction. Errors are left to the caller, which keeps the samples
+    for a later retry.
+    """
+    with connection.cursor(buffered=True) as cursor:
+        query = """INSERT INTO system_monitor (timestamp, cpu_usage, gpu_usage, ram_usage, disk_usage, kb_sent, kb_received)
+                   VALUES (%s, %s, %s, %s, %s, %s, %s)"""
+        cursor.executemany(query, [row for row, _ in samples])
+        metric_rows = [metric_row for _, metric_rows in samples for metric_row in metric_rows]
+        if metric_rows:
+            series_ids = get_series_ids(cursor, [tuple(metric_row[1:4]) for metric_row in metric_rows])
+            missing = {tuple(metric_row[1:4]) for metric_row in metric_rows} - series_ids.keys()
+            if missing:
+                # The collation can fold a name onto an existing series, so its key never comes back as written
+                logging.warning(f"No metric_series id for {sorted(missing)}, skipping their values")
+            cursor.executemany("INSERT INTO system_metrics (series_id, timestamp, value) VALUES (%s, %s, %s)",
+                               [(series_ids[tuple(metric_row[1:4])], metric_row[0], metric_row[4])
+                                for metric_row in metric_rows if tuple(metric_row[1:4]) not in missing])
+        if rollups:
+            upsert_rollups(cursor, rollups)
+    connection.commit()
+
+class SampleWriter:
+    """Write-behind buffer for system_monitor and system_metrics rows.
+
+    The sampling loop only puts rows on a queue. A writer thread inserts
+    them every SAMPLE_BATCH_ROWS rows or SAMPLE_BATCH_AGE seconds, in one
+    transaction, over one reused connection. While the database is down the
+    rows are appended to SPILL_FILE as JSON lines. They are replayed, oldest
+    first, once a connection works again.
+
+    Every sample is also folded into the 1m/1h/1d rollups as it is dequeued.
+    Closed rollup buckets wait in memory and go out with the next successful
+    flush.
+    """
+
+    def __init__(self, max_rows=SAMPLE_BATCH_ROWS, max_age=SAMPLE_BATCH_AGE, spill_path=SPILL_FILE,
+                 spill_max_bytes=SPILL_MAX_BYTES):
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.spill_path = spill_path
+        self.spill_max_bytes = spill_max_bytes
+        self.queue = queue.Queue()
+        self.connection = None
+        self.aggregator = RollupAggregator()
+        self.pending_rollups = {}  # Closed rollup rows not yet committed, by table
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def add(self, data, series=()):
+        """Queues one sample and its (entity_type, entity, metric, value) series; never blocks on the database."""
+        self.queue.put((format_sample_row(data), [(data[0],) + tuple(item) for item in series]))
+
+    def close(self):
+        """Flushes what is still queued and closes the connection."""
+        self.queue.put(None)
+        self.thread.join()
+        if self.connection is not None and self.connection.is_connected():
+            self.connection.close()
+            logging.info("Database connection closed.")
+
+    def _run(self):
+        rows = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                row = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                row = False  # Batch age reached
+            try:
+                if row:
+                    if not rows:
+                        deadline = time.monotonic() + self.max_age
+                    rows.append(row)
+                    self._add_rollups(self.aggregator.add(row[0]))
+                    if len(rows) < self.max_rows:
+                        continue
+                if row is None:
+                    self._add_rollups(self.aggregator.flush_open())  # Keep the partial buckets, they are merged after a restart
+                self._flush(rows)
+            except Exception as e:
+                # If this thread died, samples would pile up in the queue and never be written
+                logging.exception(f"Unexpected error writing {len(rows)} samples, dropping them: {e}")
+                self.pending_rollups = {}
+            rows = []
+            deadline = None
+            if row is None:
+                return
+
+    def _add_rollups(self, closed):
+        for table, rollup_rows in closed.items():
+            self.pending_rollups.setdefault(table, []).extend(rollup_rows)
+
+    def _get_connection(self):
+        if self.connection is None or not self.connection.is_connected():
+            self.connection = create_db_connection()
+        return self.connection
+
+    def _flush(self, rows):
+        connection = self._get_connection()
+        if connection is not None:
+            try:
+                self._replay_spill(connection)
+                if rows or self.pending_rollups:
+                    insert_rows_into_db(connection, rows, self.pending_rollups)
+                    self.pending_rollups = {}
+                    logging.debug(f"Inserted {len(rows)} samples")
+                return
+            except Error as e:
+                logging.error(f"Error inserting data into database: {e}")
+                try:
+                    connection.rollback()
+                except Error:
+                    pass
+                self.connection = None
+            except Exception:
+                try:
+                    connection.rollback()
+                except Error:
+                    self.connection = None
+                raise
+        self._spill(rows)
+
+    def _spill(self, rows):
+        if not rows:
+            return
+        try:
+            if os.path.exists(self.spill_path) and os.path.getsize(self.spill_path) >= self.spill_max_bytes:
+                logging.error(f"Spill file {self.spill_path} is full, dropping {len(rows)} samples")
+                return
+            with open(self.spill_path, "a") as f:
+                for row in rows:
+                    f.write(json.dumps(row) + "\n")
+            logging.warning(f"Database unavailable, spilled {len(rows)} samples to {self.spill_path}")
+        except OSError as e:
+            logging.error(f"Error writing spill file {self.spill_path}: {e}")
+
+    @staticmethod
+    def _load_spilled(line):
+        """Parses one spill line, or returns None if it is not a sample (a line torn by a crash mid-append)."""
+        try:
+            item = json.loads(line)
+            if item and isinstance(item[0], list):
+                row, series = tuple(item[0]), [tuple(metric_row) for metric_row in item[1]]
+            else:
+                row, series = tuple(item), []  # Spilled before per-entity series were recorded
+        except (ValueError, TypeError, IndexError):
+            return None
+        if len(row) != 7 or any(len(metric_row) != 5 for metric_row in series):
+            return None
+        return row, series
+
+    def _quarantine(self, lines):
+        """Moves spill lines that cannot be inserted to SPILL_FILE.bad, so they do not block later replays."""
+        bad_path = self.spill_path + ".bad"
+        logging.error(f"Moving {len(lines)} unusable spilled samples to {bad_path}")
+        try:
+            with open(bad_path, "a") as f:
+                for line in lines:
+                    f.write(line.rstrip("\n") + "\n")
+        except OSError as e:
+            logging.error(f"Error writing {bad_path}: {e}")
+
+    def _replay_spill(self, connection):
+        """Inserts the spilled rows, removing the file once every chunk was committed."""
+        if not os.path.exists(self.spill_path):
+            return
+        spilled = []
+        unparsable = []
+        with open(self.spill_path) as f:
+            for line in f:
+                if line.strip():
+                    sample = self._load_spilled(line)
+                    if sample is None:
+                        unparsable.append(line)
+                    else:
+                        spilled.append(sample)
+        if unparsable:
+            self._quarantine(unparsable)
+        committed = 0
+        try:
+            for start in range(0, len(spilled), SPILL_REPLAY_CHUNK):
+                chunk = spilled[start:start + SPILL_REPLAY_CHUNK]
+                try:
+                    insert_rows_into_db(connection, chunk)
+                except Error:
+                    raise
+                except Exception as e:
+                    # Not a database outage, so the chunk would fail the same way on every retry
+                    logging.error(f"Error replaying spilled samples: {e}")
+                    connection.rollback()
+                    self._quarantine([json.dumps(row) for row in chunk])
+                committed = min(start + SPILL_REPLAY_CHUNK, len(spilled))
+        finally:
+            if committed < len(spilled):
+                # Keep only the rows that were not committed, so they are not inserted twice
+                with open(self.spill_path, "w") as f:
+                    for row in spilled[committed:]:
+                        f.write(json.dumps(row) + "\n")
+            else:
+                os.remove(self.spill_path)
+        logging.info(f"Replayed {len(spilled)} spilled samples from {self.spill_path}")
+
+def print_sample(timestamp, network_data, system_data):
+    """Prints a sample in the CONSOLE_OUTPUT format: 'json', 'compact' or nothing."""
+    if CONSOLE_OUTPUT == "json":
+        print(json.dumps({
+            "Timestamp": timestamp,
+            "Network Utilization (Per Second)": network_data,
+            "System Utilization": system_data
+        }, indent=4))
+    elif CONSOLE_OUTPUT == "compact":
+        print(f"{timestamp} cpu={system_data.get('CPU Usage (%)')}% gpu={system_data.get('GPU Usage (%)')} "
+              f"ram={system_data.get('RAM Usage (%)')}% disk={system_data.get('Disk Usage (%)')}% "
+              f"sent={network_data.get('KB Sent Per Second')}KB/s recv={network_data.get('KB Received Per Second')}KB/s")
 
 def store_data():
     """Fetch system data and store in MariaDB."""
-    connection = create_db_connection()
-    if connection is None:
-        return
-
     # Fetch and store system details initially
     system_details = get_system_details()
     store_system_details_in_db(system_details)
 
+    gpu_monitor = GpuMonitor()
+    sampler = ProcSampler(gpu_monitor=gpu_monitor)
+    scheduler = TickScheduler()
+    writer = SampleWriter()
+
     try:
         while True:
-            # Fetch per-second network usage
-            network_data = get_network_usage_per_second()
-            system_data = get_system_utilization()
+            # Sleep until the next tick, then read every counter once
+            scheduler.wait()
+            try:
+                network_data, system_data, series = sampler.sample()
+            except (OSError, ValueError) as e:
+                logging.error(f"Error sampling system utilization: {e}")
+                continue
             timestamp = get_timestamp()
 
             # Prepare data for database insertion (historical)
@@ -204,23 +618,15 @@ def store_data():
                 network_data.get("KB Received Per Second", "N/A")
             )
 
-            # Insert into MariaDB
-            insert_data_into_db(connection, db_data)
+            # Hand the row to the write-behind buffer
+            writer.add(db_data, series)
 
-            # Print output for real-time visibility
-            print(json.dumps({
-                "Timestamp": timestamp,
-                "Network Utilization (Per Second)": network_data,
-                "System Utilization": system_data
-            }, indent=4))
-
-            # time.sleep(1)  # Refresh every 1 second for real-time monitoring
+            print_sample(timestamp, network_data, system_data)
     except KeyboardInterrupt:
         logging.info("Monitoring stopped by user.")
     finally:
-        if connection.is_connected():
-            connection.close()
-            logging.info("Database connection closed.")
+        gpu_monitor.stop()
+        writer.close()
 
 # Start everything
 if __name__ == "__main__":
@@ -0,0 +1,58 @@
+import unittest
+from unittest import mock
+
+from ingest.dedup import LogDedupCache
+
+class LogDedupCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch("ingest.dedup.time")
+        patcher.start().monotonic.side_effect = lambda: self.now
+        self.addCleanup(patcher.stop)
+
+    def test_duplicate_within_window_is_rejected(self):
+        cache = LogDedupCache(window=100, bucket_count=4)
+        self.assertTrue(cache.add(b"a"))
+        self.now += 60
+        self.assertFalse(cache.add(b"a"))
+
+    def test_ids_expire_with_their_bucket(self):
+        cache = LogDedupCache(window=100, bucket_count=4)
+        cache.add(b"a")
+        self.now += 75  # Three buckets later "a" is still in the oldest one
+        self.assertFalse(cache.add(b"a"))
+        self.now += 25
+        self.assertTrue(cache.add(b"a"))
+        self.assertEqual(cache.size, 1)
+
+    def test_long_idle_clears_every_bucket(self):
+        cache = LogDedupCache(window=100, bucket_count=4)
+        cache.add(b"a")
+        cache.add(b"b")
+        self.now += 10000
+        self.assertTrue(cache.add(b"a"))
+        self.assertEqual(len(cache.buckets), 4)
+        self.assertEqual(cache.size, 1)
+
+    def test_max_entries_drops_the_oldest_buckets(self):
+        cache = LogDedupCache(window=100, bucket_count=4, max_entries=3)
+        cache.add(b"a")
+        self.now += 25
+        cache.add(b"b")
+        cache.add(b"c")
+        cache.add(b"d")
+        self.assertEqual(cache.size, 3)
+        self.assertTrue(cache.add(b"a"))  # Its bucket was dropped early
+        self.assertLessEqual(cache.size, 3)
+
+    def test_discard_accepts_the_ids_again(self):
+        cache = LogDedupCache(window=100, bucket_count=4)
+        cache.add(b"a")
+        cache.add(b"b")
+        cache.discard(log_id for log_id in (b"a", b"missing"))
+        self.assertEqual(cache.size, 1)
+        self.assertTrue(cache.add(b"a"))
+        self.assertFalse(cache.add(b"b"))
+
+if __name__ == "__main__":
+    unittest.main()
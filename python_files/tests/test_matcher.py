@@ -0,0 +1,51 @@
+import unittest
+from unittest import mock
+
+from ingest.matcher import KeywordMatcher
+from ingest.pipeline import Pipeline
+from ingest.sink import MySQLSink
+
+class KeywordMatcherTests(unittest.TestCase):
+    def test_case_insensitive_and_reports_the_stored_pattern(self):
+        matcher = KeywordMatcher(["Failed password", "segfault"])
+        self.assertEqual(matcher.match("sshd[42]: FAILED PASSWORD for root"), "Failed password")
+        self.assertEqual(matcher.match("app[7]: segfault at 0 ip 00007f"), "segfault")
+        self.assertIsNone(matcher.match("systemd[1]: Started Session 3"))
+
+    def test_longest_overlapping_keyword_wins(self):
+        matcher = KeywordMatcher(["error", "I/O error", "USB"])
+        self.assertEqual(matcher.match("kernel: blk_update_request: I/O error, dev sda"), "I/O error")
+
+    def test_keywords_are_literal_text(self):
+        matcher = KeywordMatcher(["sudo (root)", "a.b"])
+        self.assertEqual(matcher.match("pam_unix(sudo (root)): session opened"), "sudo (root)")
+        self.assertIsNone(matcher.match("axb"))
+
+    def test_no_keywords_matches_nothing(self):
+        self.assertIsNone(KeywordMatcher([]).match("anything"))
+
+class KeywordMatcherCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.patterns = {"auth.log": ["Failed password"], "journal": ["segfault"]}
+        self.pipeline = Pipeline(MySQLSink("Threat_Erase"))
+        self.pipeline.sink.fetch_keywords = mock.Mock(side_effect=lambda cursor, name: self.patterns[name])
+
+    def test_compiled_once_until_the_patterns_change(self):
+        first = self.pipeline.get_keyword_matcher(None, ("auth.log", "journal"))
+        self.assertEqual(first.keywords, {"Failed password", "segfault"})
+        self.assertIs(self.pipeline.get_keyword_matcher(None, ("auth.log", "journal")), first)
+
+        self.patterns["auth.log"].append("Invalid user")
+        second = self.pipeline.get_keyword_matcher(None, ("auth.log", "journal"))
+        self.assertIsNot(second, first)
+        self.assertEqual(second.match("Invalid user admin from 10.0.0.5"), "Invalid user")
+
+    def test_last_patterns_are_kept_while_the_database_is_down(self):
+        matcher = self.pipeline.get_keyword_matcher(None, ("auth.log",))
+        self.pipeline.sink.fetch_keywords.side_effect = None
+        self.pipeline.sink.fetch_keywords.return_value = None
+        self.assertIs(self.pipeline.get_keyword_matcher(None, ("auth.log",)), matcher)
+        self.assertIsNone(self.pipeline.get_keyword_matcher(None, ("kern.log",)).match("Failed password"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import mysql.connector
+
+from ingest.pipeline import Pipeline
+from ingest.sink import MySQLSink
+
+class BrokenConnectionTests(unittest.TestCase):
+    """A pooled connection that fails mid-pass must end the pass, not leak into later code."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, "kern.log")
+        with open(self.path, "w") as f:
+            f.write("2024-05-01T10:00:00.000000+00:00 host kernel: usb 1-1: new device\n")
+        self.connection = mock.Mock()
+        self.connection.cursor.side_effect = mysql.connector.errors.OperationalError("Lost connection")
+        self.sink = MySQLSink("Threat_Erase")
+        self.sink.get_pool = mock.Mock(return_value=mock.Mock(get_connection=mock.Mock(return_value=self.connection)))
+
+    def test_process_returns_false(self):
+        self.assertFalse(Pipeline(self.sink).process(self.path))
+        self.connection.close.assert_called_once()  # Handed back to the pool
+
+    def test_refresh_file_paths_returns_none(self):
+        self.assertIsNone(Pipeline(self.sink).refresh_file_paths())
+
+    def test_ensure_schema_returns_false(self):
+        self.assertFalse(self.sink.ensure_schema())
+
+    def test_errors_inside_the_block_reach_the_caller(self):
+        with self.assertRaises(mysql.connector.Error):
+            with self.sink.connection() as db_conn:
+                db_conn.cursor()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from unittest import mock
+
+import proc_connector
+from proc_connector import ShortLivedFilter, watch_with_connector
+
+class FakeConnector:
+    def __init__(self, events):
+        self._events = events
+
+    def events(self):
+        yield from self._events
+
+class WatchWithConnectorTests(unittest.TestCase):
+    def watch(self, events, running=None, names=None, on_fork=None):
+        started, exited = [], []
+        with mock.patch.object(proc_connector, "running_processes", side_effect=running or [{}]), \
+             mock.patch.object(proc_connector, "read_process_name", side_effect=lambda pid: (names or {}).get(pid)):
+            watch_with_connector(FakeConnector(events), lambda *event: started.append(event),
+                                 lambda *event: exited.append(event), on_fork=on_fork)
+        return started, exited
+
+    def test_fork_exec_exit(self):
+        forks = []
+        started, exited = self.watch([("fork", 20, 1), ("exec", 20, None), ("exit", 20, None)],
+                                     names={20: "firefox"}, on_fork=lambda *event: forks.append(event))
+        self.assertEqual(forks, [(20, 1)])
+        self.assertEqual(started, [(20, "firefox")])
+        self.assertEqual(exited, [(20, "firefox")])
+
+    def test_exec_ends_the_previous_program(self):
+        started, exited = self.watch([("exec", 20, None)], running=[{20: "bash"}], names={20: "vim"})
+        self.assertEqual(exited, [(20, "bash")])
+        self.assertEqual(started, [(20, "vim")])
+
+    def test_forked_child_that_never_execs_exits_without_a_name(self):
+        _, exited = self.watch([("fork", 21, 20), ("exit", 21, None)], running=[{20: "bash"}])
+        self.assertEqual(exited, [(21, None)])
+
+    def test_overrun_reports_the_difference(self):
+        started, exited = self.watch([("overrun", None, None)], running=[{10: "old"}, {11: "new"}])
+        self.assertEqual(exited, [(10, "old")])
+        self.assertEqual(started, [(11, "new")])
+
+class ShortLivedFilterTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.started, self.exited = [], []
+        self.filter = ShortLivedFilter(lambda *event: self.started.append(event), lambda *event: self.exited.append(event),
+                                       min_lifetime=1.0, clock=lambda: self.now)
+
+    def test_short_lived_program_is_not_reported(self):
+        self.filter.start(30, "ls")
+        self.now = 0.2
+        self.filter.exit(30, "ls")
+        self.now = 5
+        self.filter.flush()
+        self.assertEqual((self.started, self.exited), ([], []))
+
+    def test_long_lived_program_is_reported_once(self):
+        self.filter.start(31, "firefox")
+        self.now = 0.5
+        self.filter.flush()
+        self.assertEqual(self.started, [])
+        self.now = 1.0
+        self.filter.flush()
+        self.filter.flush()
+        self.assertEqual(self.started, [(31, "firefox")])
+        self.filter.exit(31, "firefox")
+        self.assertEqual(self.exited, [(31, "firefox")])
+
+    def test_unnamed_start_is_dropped(self):
+        with self.assertLogs(level="DEBUG"):
+            self.filter.start(32, None)
+        self.now = 5
+        self.filter.flush()
+        self.assertEqual(self.started, [])
+
+    def test_programs_running_before_the_watch_pass_their_exit_through(self):
+        self.filter.exit(33, "gedit")
+        self.assertEqual(self.exited, [(33, "gedit")])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+from unittest import mock
+from datetime import datetime
+
+import psutil
+
+import process_monitor_final
+from process_monitor_final import ProcessRecord, collect_process_samples, diff_snapshots, process_create_time
+
+def record(pid, create_time, connections=0, name="bash"):
+    return ProcessRecord(pid, create_time, name, f"/usr/bin/{name}", 1, connections)
+
+def snapshot(*records):
+    return {(r.pid, r.create_time): r for r in records}
+
+class DiffSnapshotsTests(unittest.TestCase):
+    started = datetime(2024, 5, 1, 10, 0, 0)
+
+    def test_unchanged_snapshot_writes_nothing(self):
+        processes = snapshot(record(10, self.started), record(11, self.started))
+        self.assertEqual(diff_snapshots(processes, dict(processes)), ([], []))
+
+    def test_starts_changes_and_exits(self):
+        previous = snapshot(record(10, self.started), record(11, self.started))
+        current = snapshot(record(10, self.started, connections=3), record(12, self.started))
+        upserts, exits = diff_snapshots(previous, current)
+        self.assertEqual(sorted(upserts), [record(10, self.started, connections=3), record(12, self.started)])
+        self.assertEqual(exits, [(11, self.started)])
+
+    def test_reused_pid_is_an_exit_and_a_start(self):
+        reused = datetime(2024, 5, 1, 11, 0, 0)
+        upserts, exits = diff_snapshots(snapshot(record(10, self.started)), snapshot(record(10, reused, name="sshd")))
+        self.assertEqual(upserts, [record(10, reused, name="sshd")])
+        self.assertEqual(exits, [(10, self.started)])
+
+    def test_create_time_is_truncated_to_milliseconds(self):
+        created = process_create_time(datetime(2024, 5, 1, 10, 0, 0, 123456).timestamp())
+        self.assertEqual(created, datetime(2024, 5, 1, 10, 0, 0, 123000))
+
+class FakeProcess:
+    """A psutil.Process whose cpu_percent() calls are written to a shared event list."""
+
+    def __init__(self, events, pid, cpu=5.0, username="alice", name="firefox", exits_during_interval=False):
+        self.events = events
+        self.info = {'pid': pid, 'ppid': 1, 'name': name, 'exe': f"/usr/bin/{name}", 'username': username,
+                     'create_time': datetime(2024, 5, 1, 10, 0, 0).timestamp()}
+        self.cpu = cpu
+        self.exits_during_interval = exits_during_interval
+        self.primed = False
+
+    def cpu_percent(self, interval=None):
+        assert interval is None, "cpu_percent must not block"
+        if self.primed and self.exits_during_interval:
+            raise psutil.NoSuchProcess(self.info['pid'])
+        self.events.append(("read" if self.primed else "prime", self.info['pid']))
+        self.primed = True
+        return self.cpu
+
+    def memory_percent(self):
+        return 2.0
+
+    def io_counters(self):
+        return mock.Mock(write_bytes=2 * 1024 * 1024, read_bytes=1024 * 1024)
+
+class SamplesTestCase(unittest.TestCase):
+    """collect_process_samples() with time.sleep() written to the event list instead of sleeping."""
+
+    def setUp(self):
+        self.events = []
+        patcher = mock.patch.object(process_monitor_final.time, "sleep", side_effect=lambda s: self.events.append(("sleep", s)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.sockets = mock.Mock(connection_count=mock.Mock(return_value=0))
+
+    def collect(self, processes):
+        return collect_process_samples(processes, interval=0.5, socket_index=self.sockets)
+
+class CollectProcessSamplesTests(SamplesTestCase):
+
+    def test_one_sleep_between_priming_and_reading_every_process(self):
+        self.collect([FakeProcess(self.events, pid) for pid in (10, 11, 12)])
+        self.assertEqual(self.events, [("prime", 10), ("prime", 11), ("prime", 12), ("sleep", 0.5),
+                                       ("read", 10), ("read", 11), ("read", 12)])
+
+    def test_ignored_processes_are_never_primed(self):
+        snapshot, _ = self.collect([FakeProcess(self.events, 10, username="root"),
+                                    FakeProcess(self.events, 11, name="pipewire"),
+                                    FakeProcess(self.events, 12)])
+        self.assertEqual([pid for kind, pid in self.events if kind == "prime"], [12])
+        self.assertEqual([pid for pid, _ in snapshot], [12])
+
+    def test_process_that_exits_during_the_interval_is_skipped(self):
+        snapshot, rows = self.collect([FakeProcess(self.events, 10, exits_during_interval=True),
+                                       FakeProcess(self.events, 11)])
+        self.assertEqual([row[0] for row in rows], [11])
+
+    def test_idle_process_is_recorded_without_a_resource_row(self):
+        snapshot, rows = self.collect([FakeProcess(self.events, 10, cpu=0.0), FakeProcess(self.events, 11, cpu=12.5)])
+        self.assertEqual(sorted(pid for pid, _ in snapshot), [10, 11])
+        self.assertEqual([row[:5] for row in rows], [(11, 12.5, 2.0, 2.0, 1.0)])
+
+class ConnectionCountTests(SamplesTestCase):
+    """Connection counts come from the cycle's SocketIndex, not from per-process psutil calls."""
+
+    def test_counts_are_looked_up_by_pid(self):
+        self.sockets.connection_count.side_effect = {10: 3, 11: None}.get  # 11's sockets are unreadable
+        snapshot, _ = self.collect([FakeProcess(self.events, 10), FakeProcess(self.events, 11)])
+        self.assertEqual({pid: record.active_connections for (pid, _), record in snapshot.items()}, {10: 3, 11: None})
+
+    def test_index_is_built_once_per_cycle_after_the_interval(self):
+        with mock.patch.object(process_monitor_final, "SocketIndex") as socket_index:
+            socket_index.build.side_effect = lambda: self.events.append(("build", None)) or self.sockets
+            collect_process_samples([FakeProcess(self.events, pid) for pid in (10, 11)], interval=0.5)
+        self.assertEqual([kind for kind, _ in self.events], ["prime", "prime", "sleep", "build", "read", "read"])
+        self.assertEqual(self.sockets.connection_count.call_count, 2)
+
+if __name__ == "__main__":
+    unittest.main()
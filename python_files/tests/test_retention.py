@@ -0,0 +1,88 @@
+import unittest
+from unittest import mock
+from datetime import datetime
+
+from retention import (period_start, next_period, partition_definitions, future_limit, parse_range_value,
+                       range_value, partition_table, add_future_partitions, drop_expired_partitions, PRECREATE_PERIODS)
+
+DAILY = {"partition": "daily", "days": 7, "column": "timestamp"}
+MONTHLY = {"partition": "monthly", "days": 365, "column": "timestamp"}
+
+def fake_cursor(data_type="datetime"):
+    cursor = mock.Mock()
+    cursor.fetchone.return_value = (data_type,)
+    return cursor
+
+class PeriodTests(unittest.TestCase):
+    def test_period_start(self):
+        moment = datetime(2024, 5, 17, 13, 45)
+        self.assertEqual(period_start(moment, "daily"), datetime(2024, 5, 17))
+        self.assertEqual(period_start(moment, "monthly"), datetime(2024, 5, 1))
+
+    def test_next_period_crosses_month_and_year_ends(self):
+        self.assertEqual(next_period(datetime(2024, 2, 29), "daily"), datetime(2024, 3, 1))
+        self.assertEqual(next_period(datetime(2024, 11, 1), "monthly"), datetime(2024, 12, 1))
+        self.assertEqual(next_period(datetime(2024, 12, 1), "monthly"), datetime(2025, 1, 1))
+
+    def test_future_limit(self):
+        now = datetime(2024, 12, 31, 23, 59)
+        self.assertEqual(future_limit(now, "daily"), datetime(2025, 1, PRECREATE_PERIODS))
+        self.assertEqual(future_limit(now, "monthly"), datetime(2025, PRECREATE_PERIODS, 1))
+
+class PartitionDefinitionTests(unittest.TestCase):
+    def test_each_period_ends_where_the_next_starts(self):
+        definitions = partition_definitions(datetime(2024, 12, 1), datetime(2025, 1, 15), "monthly", False)
+        self.assertEqual(definitions, [
+            "PARTITION p202412 VALUES LESS THAN ('2025-01-01 00:00:00')",
+            "PARTITION p202501 VALUES LESS THAN ('2025-02-01 00:00:00')",
+        ])
+
+    def test_timestamp_columns_use_unix_timestamp(self):
+        self.assertEqual(range_value(datetime(2024, 5, 2), True), "UNIX_TIMESTAMP('2024-05-02 00:00:00')")
+
+    def test_parse_range_value(self):
+        self.assertIsNone(parse_range_value("MAXVALUE"))
+        self.assertEqual(parse_range_value("'2024-05-02 00:00:00'"), datetime(2024, 5, 2))
+        self.assertEqual(parse_range_value(str(int(datetime(2024, 5, 2).timestamp()))), datetime(2024, 5, 2))
+
+class MaintenanceTests(unittest.TestCase):
+    now = datetime(2024, 5, 17, 13, 45)
+
+    def test_partition_table_puts_expired_rows_in_p0(self):
+        cursor = fake_cursor()
+        partition_table(cursor, "system_monitor", DAILY, self.now)
+        statement = cursor.execute.call_args[0][0]
+        self.assertIn("RANGE COLUMNS(`timestamp`)", statement)
+        self.assertIn("PARTITION p0 VALUES LESS THAN ('2024-05-10 00:00:00')", statement)
+        self.assertIn("PARTITION p20240510 VALUES LESS THAN ('2024-05-11 00:00:00')", statement)
+        self.assertIn("PARTITION p20240520 VALUES LESS THAN ('2024-05-21 00:00:00')", statement)
+        self.assertTrue(statement.endswith("PARTITION pmax VALUES LESS THAN (MAXVALUE))"))
+
+    def test_future_partitions_continue_from_the_last_bound(self):
+        cursor = fake_cursor()
+        partitions = [("p20240517", datetime(2024, 5, 18)), ("pmax", None)]
+        add_future_partitions(cursor, "system_monitor", DAILY, partitions, self.now)
+        statement = cursor.execute.call_args[0][0]
+        self.assertIn("REORGANIZE PARTITION pmax INTO (PARTITION p20240518 VALUES LESS THAN ('2024-05-19 00:00:00')", statement)
+        self.assertIn("PARTITION p20240520", statement)
+
+    def test_no_future_partitions_once_far_enough_ahead(self):
+        cursor = fake_cursor()
+        partitions = [("p20240521", datetime(2024, 5, 22)), ("pmax", None)]
+        add_future_partitions(cursor, "system_monitor", DAILY, partitions, self.now)
+        cursor.execute.assert_not_called()
+
+    def test_drops_only_partitions_entirely_before_the_cutoff(self):
+        cursor = fake_cursor()
+        partitions = [("p0", datetime(2024, 5, 10)), ("p20240510", datetime(2024, 5, 11)), ("pmax", None)]
+        drop_expired_partitions(cursor, "system_monitor", DAILY, partitions, self.now)
+        cursor.execute.assert_called_once_with("ALTER TABLE system_monitor DROP PARTITION p0")
+
+    def test_tables_kept_forever_are_never_dropped(self):
+        cursor = fake_cursor()
+        drop_expired_partitions(cursor, "user_activity", {**MONTHLY, "days": None},
+                                [("p202001", datetime(2020, 2, 1))], self.now)
+        cursor.execute.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
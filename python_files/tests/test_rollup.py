@@ -0,0 +1,55 @@
+import unittest
+from datetime import datetime
+
+from rollup import RollupAggregator, bucket_start, percentile, summarize
+
+def row(timestamp, cpu=1.0):
+    return (timestamp, cpu, None, 2.0, 3.0, 4.0, 5.0)
+
+class BucketStartTests(unittest.TestCase):
+    def test_truncates_to_each_resolution(self):
+        self.assertEqual(bucket_start("2024-05-01 10:17:42", 16), "2024-05-01 10:17:00")
+        self.assertEqual(bucket_start("2024-05-01 10:17:42", 13), "2024-05-01 10:00:00")
+        self.assertEqual(bucket_start("2024-05-01 10:17:42", 10), "2024-05-01 00:00:00")
+
+    def test_accepts_datetimes(self):
+        self.assertEqual(bucket_start(datetime(2024, 5, 1, 23, 59, 59, 999999), 16), "2024-05-01 23:59:00")
+
+class SummarizeTests(unittest.TestCase):
+    def test_nearest_rank_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.95), 95)
+        self.assertEqual(percentile([7], 0.95), 7)
+
+    def test_missing_metric_summarizes_to_none(self):
+        summary = summarize("2024-05-01 10:00:00", [row("t", 1.0)[1:], row("t", 3.0)[1:]])
+        self.assertEqual(summary[:6], ("2024-05-01 10:00:00", 2, 1.0, 3.0, 2.0, 3.0))
+        self.assertEqual(summary[6:10], (None, None, None, None))
+
+class RollupAggregatorTests(unittest.TestCase):
+    def test_minute_boundary_closes_only_the_minute(self):
+        aggregator = RollupAggregator()
+        self.assertEqual(aggregator.add(row("2024-05-01 10:00:59")), {})
+        closed = aggregator.add(row("2024-05-01 10:01:00"))
+        self.assertEqual(list(closed), ["system_monitor_1m"])
+        self.assertEqual(closed["system_monitor_1m"][0][:2], ("2024-05-01 10:00:00", 1))
+
+    def test_day_boundary_closes_every_resolution(self):
+        aggregator = RollupAggregator()
+        aggregator.add(row("2024-05-01 23:59:58"))
+        aggregator.add(row("2024-05-01 23:59:59"))
+        closed = aggregator.add(row("2024-05-02 00:00:00"))
+        self.assertEqual(closed["system_monitor_1m"][0][:2], ("2024-05-01 23:59:00", 2))
+        self.assertEqual(closed["system_monitor_1h"][0][:2], ("2024-05-01 23:00:00", 2))
+        self.assertEqual(closed["system_monitor_1d"][0][:2], ("2024-05-01 00:00:00", 2))
+
+    def test_flush_open_emits_partial_buckets_once(self):
+        aggregator = RollupAggregator()
+        aggregator.add(row("2024-05-01 10:00:00"))
+        closed = aggregator.flush_open()
+        self.assertEqual(sorted(closed), ["system_monitor_1d", "system_monitor_1h", "system_monitor_1m"])
+        self.assertEqual(aggregator.flush_open(), {})
+        self.assertEqual(aggregator.add(row("2024-05-01 10:00:01")), {})  # No empty bucket is closed
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from ingest.runner import IngestRunner, LogFileDispatcher
+
+class FakePipeline:
+    def __init__(self, name, paths):
+        self.name = name
+        self.log_files = set(paths)
+
+    def paths(self):
+        return set(self.log_files)
+
+    def watches(self, file_path):
+        return file_path in self.log_files
+
+class InotifyTests(unittest.TestCase):
+    """A real watchdog observer on a temporary log directory."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.log = os.path.join(self.directory, "auth.log")
+        with open(self.log, "w") as f:
+            f.write("first\n")
+        self.pipeline = FakePipeline("Threat_Erase", [self.log])
+        self.runner = IngestRunner([self.pipeline], max_workers=1)
+        self.runner.watch_log_files(self.pipeline.paths())
+        self.runner.observer.start()
+        self.addCleanup(self.runner.observer.join)
+        self.addCleanup(self.runner.observer.stop)
+
+    def wait_for_change(self):
+        self.assertTrue(self.runner.changed.wait(timeout=5), "no inotify event")
+        with self.runner.pending_lock:
+            pending, self.runner.pending = self.runner.pending, set()
+            self.runner.changed.clear()
+        return pending
+
+    def test_append_queues_the_file(self):
+        with open(self.log, "a") as f:
+            f.write("second\n")
+        self.assertEqual(self.wait_for_change(), {(self.pipeline, self.log)})
+
+    def test_rotation_queues_the_watched_path(self):
+        os.rename(self.log, self.log + ".1")
+        self.assertIn((self.pipeline, self.log), self.wait_for_change())
+        with open(self.log, "w") as f:  # The new generation
+            f.write("third\n")
+        self.assertEqual(self.wait_for_change(), {(self.pipeline, self.log)})
+
+    def test_other_files_in_the_directory_are_ignored(self):
+        with open(os.path.join(self.directory, "unrelated.txt"), "w") as f:
+            f.write("noise\n")
+        self.assertFalse(self.runner.changed.wait(timeout=0.5))
+
+    def test_only_pipelines_reading_the_file_are_queued(self):
+        other = FakePipeline("Threat_Erase_DB", [os.path.join(self.directory, "kern.log")])
+        self.runner.pipelines.append(other)
+        self.runner.mark_changed([self.log])
+        self.assertEqual(self.runner.pending, {(self.pipeline, self.log)})
+
+class RecordingPipeline:
+    """process() records each pass and waits at gate while it is cleared, like a slow file."""
+
+    name = "Threat_Erase"
+
+    def __init__(self, passes_with_more=0):
+        self.lock = threading.Lock()
+        self.active = {}  # file_path -> passes running now
+        self.overlaps = 0
+        self.passes = []
+        self.passes_with_more = passes_with_more
+        self.gate = threading.Event()
+        self.gate.set()
+        self.done = threading.Semaphore(0)
+
+    def process(self, file_path):
+        with self.lock:
+            self.active[file_path] = self.active.get(file_path, 0) + 1
+            self.overlaps += self.active[file_path] > 1
+            self.passes.append(file_path)
+            has_more = self.passes_with_more > 0
+            self.passes_with_more -= has_more
+        self.gate.wait(timeout=5)
+        with self.lock:
+            self.active[file_path] -= 1
+        self.done.release()
+        if file_path.endswith("broken.log"):
+            raise OSError("Input/output error")
+        return has_more
+
+class LogFileDispatcherTests(unittest.TestCase):
+    def setUp(self):
+        self.dispatcher = LogFileDispatcher(max_workers=4)
+        self.addCleanup(self.dispatcher.executor.shutdown)
+
+    def wait(self, pipeline, count):
+        for _ in range(count):
+            self.assertTrue(pipeline.done.acquire(timeout=5), "pass did not finish")
+        self.dispatcher.executor.shutdown(wait=True)
+
+    def test_changes_during_a_pass_coalesce_into_one_follow_up(self):
+        pipeline = RecordingPipeline()
+        pipeline.gate.clear()
+        self.dispatcher.submit(pipeline, "/var/log/auth.log")
+        for _ in range(10):
+            self.dispatcher.submit(pipeline, "/var/log/auth.log")
+        pipeline.gate.set()
+        self.wait(pipeline, 2)
+        self.assertEqual(pipeline.passes, ["/var/log/auth.log"] * 2)
+        self.assertEqual(pipeline.overlaps, 0)
+
+    def test_different_files_run_in_parallel(self):
+        pipeline = RecordingPipeline()
+        pipeline.gate.clear()
+        for name in ("auth.log", "kern.log", "dpkg.log"):
+            self.dispatcher.submit(pipeline, f"/var/log/{name}")
+        for _ in range(500):
+            if len(pipeline.passes) == 3:
+                break
+            time.sleep(0.01)
+        self.assertEqual(sum(pipeline.active.values()), 3)  # All held at the gate at the same time
+        pipeline.gate.set()
+        self.wait(pipeline, 3)
+
+    def test_file_with_more_data_is_resubmitted_until_drained(self):
+        pipeline = RecordingPipeline(passes_with_more=3)
+        self.dispatcher.submit(pipeline, "/var/log/syslog")
+        self.wait(pipeline, 4)
+        self.assertEqual(len(pipeline.passes), 4)
+        self.assertEqual(self.dispatcher.running, set())
+
+    def test_failing_pass_releases_the_file(self):
+        pipeline = RecordingPipeline()
+        with self.assertLogs(level="ERROR"):
+            self.dispatcher.submit(pipeline, "/var/log/broken.log")
+            self.wait(pipeline, 1)
+        self.assertEqual(self.dispatcher.running, set())
+
+if __name__ == "__main__":
+    unittest.main()
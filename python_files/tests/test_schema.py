@@ -0,0 +1,171 @@
+import os
+import re
+import sys
+import hashlib
+import unittest
+import subprocess
+from unittest import mock
+
+from mysql.connector import Error
+
+from schema import (setup, setup_log_tables, migrate, report_queries, hot_queries, TABLES, LOG_TABLES, MIGRATIONS,
+                    LOG_MIGRATIONS, SCHEMA_VERSION_TABLE, LOG_SCHEMA_VERSION_TABLE, SCAN_ROWS_LIMIT)
+from ingest.config import LOG_ID_SCHEME
+from ingest.dedup import generate_log_id
+from ingest.sink import MySQLSink
+
+class FakeCursor:
+    """Just enough of a MariaDB cursor for setup(): which tables exist, the version rows and every statement run."""
+
+    def __init__(self, tables=()):
+        self.tables = set(tables)
+        self.versions = {}
+        self.statements = []
+        self.result = []
+
+    def execute(self, statement, params=()):
+        self.statements.append(statement)
+        self.result = []
+        if "information_schema.TABLES" in statement:
+            self.result = [(table,) for table in self.tables]
+        elif match := re.match(r"CREATE TABLE (?:IF NOT EXISTS )?(\w+)", statement):
+            self.tables.add(match[1])
+        elif match := re.match(r"SELECT COALESCE\(MAX\(version\), 0\) FROM (\w+)", statement):
+            self.result = [(max(self.versions.get(match[1], ()), default=0),)]
+        elif match := re.match(r"INSERT INTO (\w+) \(version", statement):
+            self.versions.setdefault(match[1], []).append(params[0])
+
+    def fetchall(self):
+        return self.result
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def ran(self, fragment):
+        return any(fragment in statement for statement in self.statements)
+
+class SetupTests(unittest.TestCase):
+    def test_fresh_database_is_stamped_without_migrating(self):
+        cursor = FakeCursor()
+        self.assertEqual(setup(cursor), MIGRATIONS[-1][0])
+        self.assertTrue(set(TABLES) <= cursor.tables)
+        self.assertEqual(cursor.versions[LOG_SCHEMA_VERSION_TABLE], [LOG_MIGRATIONS[-1][0]])
+        self.assertFalse(cursor.ran("ALTER TABLE"))
+
+    def test_log_only_database_then_full_setup(self):
+        cursor = FakeCursor()
+        setup_log_tables(cursor, "desc")
+        self.assertEqual(cursor.tables - {LOG_SCHEMA_VERSION_TABLE}, set(LOG_TABLES))
+        self.assertTrue(cursor.ran("`desc` TEXT"))
+        self.assertNotIn(SCHEMA_VERSION_TABLE, cursor.versions)
+
+        # The other tables are still new, so they are created at the latest version rather than migrated
+        self.assertEqual(setup(cursor), MIGRATIONS[-1][0])
+        self.assertFalse(cursor.ran("ALTER TABLE"))
+        self.assertEqual(cursor.versions[LOG_SCHEMA_VERSION_TABLE], [LOG_MIGRATIONS[-1][0]])
+
+    def test_existing_database_applies_both_tracks(self):
+        cursor = FakeCursor(TABLES)
+        setup(cursor)
+        self.assertEqual(cursor.versions[LOG_SCHEMA_VERSION_TABLE], [version for version, _, _ in LOG_MIGRATIONS])
+        self.assertEqual(cursor.versions[SCHEMA_VERSION_TABLE], [version for version, _, _ in MIGRATIONS])
+
+    def test_log_setup_leaves_other_tables_alone(self):
+        cursor = FakeCursor(TABLES)
+        setup_log_tables(cursor)
+        for table in set(TABLES) - set(LOG_TABLES):
+            self.assertFalse(cursor.ran(f"ALTER TABLE {table} "), table)
+
+class MigrationTests(unittest.TestCase):
+    def test_fresh_tables_have_the_migrated_indexes(self):
+        # A fresh database is stamped at the latest version, so it never runs the ALTERs
+        for _, _, statements in MIGRATIONS:
+            for statement in statements:
+                table = statement.split()[2]
+                for name, columns in re.findall(r"ADD INDEX IF NOT EXISTS (\w+) (\([^)]*\))", statement):
+                    self.assertIn(f"KEY {name} {columns}", TABLES[table], name)
+
+    def test_failing_statement_stops_the_run_until_the_next_start(self):
+        cursor = FakeCursor(TABLES)
+        cursor.versions[SCHEMA_VERSION_TABLE] = [1]
+        execute = cursor.execute
+        failures = [Error("Lock wait timeout exceeded")]
+
+        def flaky_execute(statement, params=()):
+            if "resources_time" in statement and failures:
+                raise failures.pop()
+            execute(statement, params)
+
+        cursor.execute = flaky_execute
+        with self.assertLogs(level="ERROR"):
+            self.assertEqual(migrate(cursor), 1)
+        self.assertEqual(cursor.versions[SCHEMA_VERSION_TABLE], [1])
+        self.assertFalse(cursor.ran("ALTER TABLE process_info"))  # Nothing after the failed migration
+
+        cursor.statements = []
+        self.assertEqual(migrate(cursor), MIGRATIONS[-1][0])
+        self.assertTrue(cursor.ran("monitor_time"))  # Migration 2 is retried from its first statement
+        self.assertEqual(cursor.versions[SCHEMA_VERSION_TABLE], [1, 2, 3])
+
+class ReportQueriesTests(unittest.TestCase):
+    COLUMNS = ("id", "select_type", "table", "type", "key", "rows", "Extra")
+
+    def cursor(self, plans):
+        cursor = mock.Mock(description=[(column,) for column in self.COLUMNS])
+        cursor.fetchall.side_effect = lambda: plans.pop(0) if cursor.execute.call_args.args[0].startswith("EXPLAIN") else []
+        return cursor
+
+    def test_only_large_scans_are_reported(self):
+        queries = hot_queries()[:3]
+        plans = [
+            [(1, "SIMPLE", "system_monitor", "index", "monitor_time", 1, "")],  # Backward walk stopping at LIMIT 1
+            [(1, "SIMPLE", "system_monitor", "range", "monitor_time", 3600, "Using where")],
+            [(1, "SIMPLE", "system_monitor", "ALL", None, SCAN_ROWS_LIMIT + 1, "Using where; Using filesort")],
+        ]
+        with self.assertLogs(level="INFO"):
+            self.assertEqual(report_queries(self.cursor(plans), queries), ["/historical/ page"])
+
+class LogIdSchemeTests(unittest.TestCase):
+    V0_LOG_TABLES = ('anomalous_logs', 'file_paths', 'last_processed', 'patterns')  # Before log_settings existed
+
+    def test_upgraded_database_is_pinned_to_sha256(self):
+        cursor = FakeCursor(self.V0_LOG_TABLES)
+        setup_log_tables(cursor)
+        self.assertIn("log_settings", cursor.tables)
+        self.assertTrue(cursor.ran("VALUES ('log_id_scheme', 'sha256')"))
+
+    def test_fresh_database_keeps_the_default_scheme(self):
+        cursor = FakeCursor()
+        setup_log_tables(cursor)
+        self.assertFalse(cursor.ran("'log_id_scheme'"))
+
+    def test_migrated_hex_ids_match_the_sha256_scheme(self):
+        fields = ("2024-05-01 10:00:00", "42", "auth.log", "Failed password for root")
+        old_id = hashlib.sha256("".join(fields).encode('utf-8')).hexdigest()  # What logs_merge stored
+        migrated = bytes.fromhex(old_id[:32])  # UNHEX(LEFT(log_id, 32))
+        self.assertEqual(generate_log_id(*fields, "sha256"), migrated)
+        self.assertNotEqual(generate_log_id(*fields, "blake2b"), migrated)
+
+    def test_sink_reads_the_scheme_once(self):
+        sink = MySQLSink("Threat_Erase")
+        cursor = mock.Mock()
+        cursor.fetchone.return_value = ("sha256",)
+        self.assertEqual(sink.get_log_id_scheme(cursor), "sha256")
+        self.assertEqual(sink.get_log_id_scheme(cursor), "sha256")
+        cursor.execute.assert_called_once()
+
+    def test_sink_defaults_when_no_scheme_is_stored(self):
+        cursor = mock.Mock()
+        cursor.fetchone.return_value = None
+        self.assertEqual(MySQLSink("Threat_Erase").get_log_id_scheme(cursor), LOG_ID_SCHEME)
+
+class ImportTests(unittest.TestCase):
+    def test_importing_the_scripts_leaves_logging_alone(self):
+        # A fresh interpreter, since this one already imported them
+        code = "import logging, schema, rollup, retention, proc_connector; print(logging.getLogger().handlers)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(result.stdout.strip(), "[]")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from unittest import mock
+
+import mysql.connector
+
+from ingest.sink import MySQLSink, LogBatchWriter
+from ingest.sources import new_checkpoint
+
+def log_entry(n):
+    return {"timestamp": f"2024-05-01 10:00:{n:02d}", "pid": "42", "priority": 13,
+            "description": f"sshd: Failed password attempt {n}", "file_name": "auth.log"}
+
+class LogBatchWriterTests(unittest.TestCase):
+    def setUp(self):
+        self.connection = mock.MagicMock()
+        self.cursor = self.connection.cursor.return_value.__enter__.return_value
+        self.writer = LogBatchWriter(MySQLSink("Threat_Erase"), self.connection, "auth.log", max_rows=3, max_age=5)
+        self.checkpoint = dict(new_checkpoint(), offset=4096)
+
+    def test_flush_is_one_insert_and_the_checkpoint_in_one_transaction(self):
+        for n in range(3):
+            self.writer.add(log_entry(n), bytes([n]) * 16, "Failed password")
+        self.assertTrue(self.writer.flush(self.checkpoint))
+
+        self.cursor.executemany.assert_called_once()
+        insert, rows = self.cursor.executemany.call_args.args
+        self.assertIn("INSERT INTO anomalous_logs", insert)
+        self.assertEqual([row[0] for row in rows], [b"\x00" * 16, b"\x01" * 16, b"\x02" * 16])
+        checkpoint_params = self.cursor.execute.call_args.args[1]
+        self.assertEqual(checkpoint_params[:2], ("auth.log", b"\x02" * 16))  # Last log id of the batch
+        self.assertEqual(checkpoint_params[4], 4096)
+        self.connection.commit.assert_called_once()
+        self.assertEqual(self.writer.rows, [])
+
+    def test_failed_batch_is_rolled_back_and_kept(self):
+        self.writer.add(log_entry(1), b"\x01" * 16, "Failed password")
+        self.cursor.executemany.side_effect = mysql.connector.errors.OperationalError("Deadlock found")
+        with self.assertLogs(level="ERROR"):
+            self.assertFalse(self.writer.flush(self.checkpoint))
+        self.connection.rollback.assert_called_once()
+        self.connection.commit.assert_not_called()
+        self.assertEqual(len(self.writer.rows), 1)  # Nothing was stored, so nothing is forgotten
+
+    def test_empty_flush_still_moves_the_checkpoint(self):
+        self.assertTrue(self.writer.flush(self.checkpoint))
+        self.cursor.executemany.assert_not_called()
+        self.assertIsNone(self.cursor.execute.call_args.args[1][1])  # last_log_id left as it was
+
+    @mock.patch("ingest.sink.time")
+    def test_should_flush_on_size_or_age(self, clock):
+        clock.monotonic.return_value = 100.0
+        self.assertFalse(self.writer.should_flush())
+        self.writer.add(log_entry(1), b"\x01" * 16, "p")
+        clock.monotonic.return_value = 104.9
+        self.assertFalse(self.writer.should_flush())
+        clock.monotonic.return_value = 105.0
+        self.assertTrue(self.writer.should_flush())
+
+        clock.monotonic.return_value = 200.0
+        self.writer.rows = []
+        for n in range(3):
+            self.writer.add(log_entry(n), bytes([n]) * 16, "p")
+        self.assertTrue(self.writer.should_flush())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from socket_index import SocketIndex, parse_address
+from open_files import OpenFileIndex
+
+TCP_HEADER = "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+
+class FakeProc:
+    """A /proc directory with /proc/net tables and fd symlinks."""
+
+    def __init__(self):
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, "net"))
+        self.tables = {}
+
+    def socket(self, table, inode, local, remote=None, state="0A"):
+        remote = remote or "0" * local.index(":") + ":0000"
+        self.tables.setdefault(table, []).append(f"   0: {local} {remote} {state} 00000000:00000000 00:00000000 00000000  1000 0 {inode}\n")
+        with open(os.path.join(self.root, "net", table), "w") as f:
+            f.write(TCP_HEADER + "".join(self.tables[table]))
+
+    def process(self, pid, name, *targets):
+        fd_dir = os.path.join(self.root, str(pid), "fd")
+        os.makedirs(fd_dir)
+        with open(os.path.join(self.root, str(pid), "comm"), "w") as f:
+            f.write(name + "\n")
+        for fd, target in enumerate(targets, start=3):
+            os.symlink(target, os.path.join(fd_dir, str(fd)))
+
+class SocketIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.proc = FakeProc()
+        self.addCleanup(shutil.rmtree, self.proc.root)
+        self.proc.socket("tcp", 101, "0100007F:1F90")  # 127.0.0.1:8080 listening
+        self.proc.socket("tcp", 102, "0100007F:1F90", "0100007F:D431", state="01")
+        self.proc.socket("tcp6", 103, "00000000000000000000000000000000:0016")  # [::]:22 listening
+        self.proc.socket("udp", 104, "00000000:0044", state="07")
+        self.proc.socket("tcp", 0, "0100007F:1F91", state="06")  # TIME_WAIT, owned by nobody
+
+    def test_connection_counts(self):
+        self.proc.process(10, "nginx", "socket:[101]", "socket:[102]", "/var/log/nginx/access.log")
+        self.proc.process(11, "nginx", "socket:[101]")  # Inherited across fork()
+        self.proc.process(12, "sshd", "socket:[103]", "pipe:[900]")
+        self.proc.process(13, "dhclient", "socket:[104]", "socket:[999]")  # 999 is a unix socket
+        index = SocketIndex.build(self.proc.root)
+        self.assertEqual([index.connection_count(pid) for pid in (10, 11, 12, 13, 14)], [2, 1, 1, 1, 0])
+        self.assertEqual(index.connections(12)[0].local_ip, "::")
+        self.assertEqual(index.listening_ports(), [(22, 12), (8080, 10), (8080, 11)])
+
+    def test_unreadable_process_has_no_count(self):
+        self.proc.process(10, "nginx", "socket:[101]")
+        self.proc.process(20, "postgres", "socket:[102]")
+        forbidden = os.path.join(self.proc.root, "20", "fd")
+        real_scandir = os.scandir
+
+        def scandir(path):
+            if path == forbidden:
+                raise PermissionError(path)
+            return real_scandir(path)
+
+        with mock.patch("socket_index.os.scandir", side_effect=scandir):
+            index = SocketIndex.build(self.proc.root)
+        self.assertIsNone(index.connection_count(20))
+        self.assertEqual(index.listening_ports(), [(22, None), (8080, 10)])  # No readable process holds :22
+        self.assertEqual(index.connections(10)[0].status, "LISTEN")
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address("0100007F:1F90", 2), ("127.0.0.1", 8080))
+
+class OpenFileIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.proc = FakeProc()
+        self.addCleanup(shutil.rmtree, self.proc.root)
+        self.proc.process(30, "vim", "/home/user/notes.txt", "socket:[5]")
+        self.proc.process(31, "libreoffice", "/home/user/report.odt (deleted)")
+
+    def test_paths_map_to_their_process(self):
+        index = OpenFileIndex(proc_root=self.proc.root)
+        self.assertEqual(index.process_name("/home/user/notes.txt"), "vim")
+        self.assertEqual(index.process_name("/home/user/report.odt"), "libreoffice")
+        self.assertIsNone(index.process_name("/home/user/other.txt"))
+
+    def test_one_walk_serves_a_burst_of_lookups(self):
+        index = OpenFileIndex(refresh_interval=60, proc_root=self.proc.root)
+        with mock.patch("open_files.iter_process_fds", wraps=lambda root: iter([(30, 3, "/tmp/a")])) as walk:
+            for _ in range(1000):
+                index.lookup("/tmp/a")
+        self.assertEqual(walk.call_count, 1)
+
+    @mock.patch("open_files.time")
+    def test_stale_index_is_rebuilt(self, clock):
+        clock.monotonic.return_value = 100.0
+        index = OpenFileIndex(refresh_interval=2, proc_root=self.proc.root)
+        self.assertIsNone(index.lookup("/home/user/new.txt"))
+        self.proc.process(32, "gedit", "/home/user/new.txt")
+        clock.monotonic.return_value = 101.0
+        self.assertIsNone(index.lookup("/home/user/new.txt"))
+        clock.monotonic.return_value = 102.0
+        self.assertEqual(index.lookup("/home/user/new.txt"), 32)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from ingest.pipeline import Pipeline
+from ingest.sink import MySQLSink
+from ingest.sources import iter_new_lines, new_checkpoint, JournalSource
+
+class IterNewLinesTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "kern.log")
+        self.checkpoint = new_checkpoint()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def append(self, data, path=None):
+        with open(path or self.path, "ab") as f:
+            f.write(data)
+
+    def read(self, max_bytes=None):
+        return list(iter_new_lines(self.path, self.checkpoint, max_bytes))
+
+    def test_reads_only_appended_lines(self):
+        self.append(b"one\ntwo\n")
+        self.assertEqual(self.read(), ["one\n", "two\n"])
+        self.append(b"three\n")
+        self.assertEqual(self.read(), ["three\n"])
+        self.assertEqual(self.read(), [])
+        self.assertEqual(self.checkpoint["offset"], os.path.getsize(self.path))
+
+    def test_partial_line_waits_for_its_newline(self):
+        self.append(b"one\ntw")
+        self.assertEqual(self.read(), ["one\n"])
+        self.assertEqual(self.checkpoint["partial"], b"tw")
+        self.assertEqual(self.read(), [])
+        self.append(b"o\n")
+        self.assertEqual(self.read(), ["two\n"])
+        self.assertEqual(self.checkpoint["partial"], b"")
+
+    def test_rotation_drains_the_old_generation_first(self):
+        self.append(b"one\n")
+        self.read()
+        self.append(b"two\nthr")
+        os.rename(self.path, self.path + ".1")
+        self.append(b"four\n")
+        self.assertEqual(self.read(), ["two\n", "thr", "four\n"])
+        self.append(b"five\n")
+        self.assertEqual(self.read(), ["five\n"])
+
+    def test_replaced_file_is_read_from_the_start(self):
+        self.append(b"one\n")
+        self.read()
+        self.append(b"two\n", self.path + ".new")
+        os.replace(self.path + ".new", self.path)  # New inode, no .1 predecessor
+        self.assertEqual(self.read(), ["two\n"])
+
+    def test_truncation_restarts_at_the_beginning(self):
+        self.append(b"one\ntwo\nthr")
+        self.read()
+        with open(self.path, "wb") as f:  # copytruncate keeps the inode
+            f.write(b"new\n")
+        self.assertEqual(self.read(), ["new\n"])
+        self.assertEqual(self.checkpoint["offset"], 4)
+
+    def test_max_bytes_resumes_where_it_stopped(self):
+        line = b"x" * 99 + b"\n"
+        self.append(line * 30000)  # About 3 MB, several READ_CHUNK_SIZE reads
+        first = self.read(max_bytes=1)
+        self.assertTrue(0 < len(first) < 30000)
+        rest = self.read()
+        self.assertEqual(len(first) + len(rest), 30000)
+
+    def test_missing_file_yields_nothing(self):
+        self.assertEqual(self.read(), [])
+        self.assertIsNone(self.checkpoint["inode"])
+
+def journal_record(cursor, message, facility=None, transport="syslog"):
+    fields = {"__CURSOR": cursor, "MESSAGE": message, "__REALTIME_TIMESTAMP": "1714557600000000",
+              "_BOOT_ID": "0" * 32, "_PID": "7", "_TRANSPORT": transport}
+    if facility is not None:
+        fields["SYSLOG_FACILITY"] = str(facility)
+    return fields
+
+class LiveJournalTests(unittest.TestCase):
+    """The live journal next to rsyslog text logs that already hold some of its facilities."""
+
+    records = [journal_record("c1", "Failed password for root", facility=4),
+               journal_record("c2", "usb 1-1: new device", transport="kernel"),
+               journal_record("c3", "(root) CMD (backup.sh)", facility=9),
+               journal_record("c4", "Started Session 3", facility=3)]
+
+    def read(self, log_files):
+        pipeline = Pipeline(MySQLSink("Threat_Erase"))
+        pipeline.log_files = log_files
+        source = pipeline.get_source("journal")
+        checkpoint = new_checkpoint()
+        with mock.patch("ingest.sources.iter_journal_entries",
+                        return_value=((record["__CURSOR"], record) for record in self.records)):
+            entries = list(source.read_entries(checkpoint))
+        self.assertEqual(checkpoint["cursor"], "c4")  # Skipped records still advance the cursor
+        return [entry["file_name"] for entry in entries]
+
+    def test_facilities_with_a_text_log_are_skipped(self):
+        # rsyslog writes auth.log and kern.log; cron.log is commented out and only in the journal
+        log_files = {"auth.log": "/var/log/auth.log", "kern.log": "/var/log/kern.log", "journal": "journal",
+                     "dpkg.log": "/var/log/dpkg.log"}
+        self.assertEqual(self.read(log_files), ["cron.log", "syslog"])
+
+    def test_without_rsyslog_every_facility_is_read(self):
+        log_files = {"dpkg.log": "/var/log/dpkg.log", "journal": "journal"}
+        self.assertEqual(self.read(log_files), ["auth.log", "kern.log", "cron.log", "syslog"])
+
+    def test_export_files_are_not_filtered(self):
+        # An export may come from another host, whose auth records are not in the local auth.log
+        pipeline = Pipeline(MySQLSink("Threat_Erase"))
+        pipeline.log_files = {"auth.log": "/var/log/auth.log", "host.export": "/srv/host.export"}
+        source = pipeline.get_source("/srv/host.export")
+        self.assertIsInstance(source, JournalSource)
+        self.assertEqual(source.skipped_file_names, frozenset())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,227 @@
+import os
+import json
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+try:
+    import system_static_live
+    from system_static_live import ProcSampler, TickScheduler, SampleWriter, insert_rows_into_db
+except ImportError as e:  # GPUtil is only installed on machines with the collector's full requirements
+    raise unittest.SkipTest(f"system_static_live is not importable: {e}")
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+class SamplerTestCase(unittest.TestCase):
+    """ProcSampler with its /proc readers replaced by two consecutive readings."""
+
+    def sample(self, first, second, elapsed=2.0, meminfo=(8000, 2000)):
+        clock = FakeClock()
+        readers = {name: mock.Mock(side_effect=[first[name], second[name]]) for name in ("_read_cpu_times", "_read_net_dev", "_read_diskstats")}
+        with mock.patch.multiple(ProcSampler, **readers, _read_meminfo=mock.Mock(return_value=meminfo),
+                                 _read_mountpoints=mock.Mock(return_value=["/"]),
+                                 _used_percent=mock.Mock(return_value=42.0)), \
+             mock.patch.object(system_static_live, "time", clock):
+            sampler = ProcSampler()
+            clock.now += elapsed
+            return sampler.sample()
+
+    def counters(self, cpu, net=None, disk=None):
+        return {"_read_cpu_times": cpu, "_read_net_dev": net or {}, "_read_diskstats": disk or {}}
+
+class ProcSamplerTests(SamplerTestCase):
+
+    def test_utilization_is_computed_from_counter_deltas(self):
+        first = self.counters({"cpu": (100, 1000)}, {"eth0": (0, 0)})
+        second = self.counters({"cpu": (400, 2000)}, {"eth0": (4096, 10240)})
+        network_data, system_data, _ = self.sample(first, second)
+        self.assertEqual(system_data["CPU Usage (%)"], 30.0)
+        self.assertEqual(system_data["RAM Usage (%)"], 75.0)
+        self.assertEqual(system_data["Disk Usage (%)"], 42.0)
+        self.assertEqual(system_data["GPU Usage (%)"], "N/A")
+        self.assertEqual(network_data, {"KB Sent Per Second": 5.0, "KB Received Per Second": 2.0})
+
+    def test_counter_resets_do_not_go_negative(self):
+        # An interface that went down and came back restarts its counters at zero
+        first = self.counters({"cpu": (100, 1000)}, {"eth0": (50000, 50000)})
+        second = self.counters({"cpu": (100, 1000)}, {"eth0": (1024, 0)})
+        network_data, system_data, _ = self.sample(first, second)
+        self.assertEqual(network_data["KB Received Per Second"], 0.0)
+        self.assertEqual(system_data["CPU Usage (%)"], 0.0)  # No time passed on the CPU clock
+
+    def test_sampling_never_spawns_a_process(self):
+        counters = self.counters({"cpu": (100, 1000)})
+        with mock.patch("subprocess.Popen", side_effect=AssertionError("subprocess spawned")):
+            self.sample(counters, counters)
+
+class SeriesTests(SamplerTestCase):
+    """The per-core, per-disk, per-NIC and per-mount series of a sample."""
+
+    def test_one_series_per_entity(self):
+        first = self.counters({"cpu": (0, 0), "cpu0": (0, 0), "cpu10": (0, 0), "cpu2": (0, 0)},
+                              {"eth0": (0, 0), "lo": (0, 0)}, {"nvme0n1": (0, 0, 0, 0)})
+        second = self.counters({"cpu": (150, 300), "cpu0": (100, 100), "cpu10": (0, 100), "cpu2": (50, 100)},
+                               {"eth0": (2048, 0), "lo": (0, 4096)}, {"nvme0n1": (20, 4096, 10, 2048)})
+        _, system_data, series = self.sample(first, second)
+        self.assertEqual(system_data["CPU Per-Core Usage (%)"], [100.0, 50.0, 0.0])  # cpu0, cpu2, cpu10
+        self.assertEqual(sorted(series), sorted([
+            ("cpu", "cpu0", "usage_pct", 100.0), ("cpu", "cpu2", "usage_pct", 50.0), ("cpu", "cpu10", "usage_pct", 0.0),
+            ("nic", "eth0", "kb_sent", 0.0), ("nic", "eth0", "kb_received", 1.0),
+            ("nic", "lo", "kb_sent", 2.0), ("nic", "lo", "kb_received", 0.0),
+            ("disk", "nvme0n1", "read_iops", 10.0), ("disk", "nvme0n1", "write_iops", 5.0),
+            ("disk", "nvme0n1", "read_kbps", 1024.0), ("disk", "nvme0n1", "write_kbps", 512.0),
+            ("mount", "/", "used_pct", 42.0),
+        ]))
+
+    def test_new_entity_starts_at_zero(self):
+        first = self.counters({"cpu": (0, 0)}, {})
+        second = self.counters({"cpu": (0, 0)}, {"wlan0": (10 ** 9, 10 ** 9)})  # Hot-plugged adapter
+        _, _, series = self.sample(first, second)
+        self.assertIn(("nic", "wlan0", "kb_received", 0.0), series)
+
+class InsertSeriesTests(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.dict(system_static_live.SERIES_IDS, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.connection = mock.MagicMock()
+        self.cursor = self.connection.cursor.return_value.__enter__.return_value
+        # metric_series as stored: the collation folded "ETH0" onto eth0
+        self.cursor.fetchall.return_value = [(1, "cpu", "cpu0", "usage_pct"), (2, "nic", "eth0", "kb_sent")]
+
+    def test_values_go_to_their_series_id(self):
+        row = ("2024-05-01 10:00:00", 10.0, None, 50.0, 40.0, 1.0, 2.0)
+        metrics = [("2024-05-01 10:00:00", "cpu", "cpu0", "usage_pct", 12.5),
+                   ("2024-05-01 10:00:00", "nic", "eth0", "kb_sent", 3.0),
+                   ("2024-05-01 10:00:00", "nic", "ETH0", "kb_sent", 4.0)]
+        with self.assertLogs(level="WARNING"):
+            insert_rows_into_db(self.connection, [(row, metrics)])
+        inserts = {call.args[0].split()[2]: call.args[1] for call in self.cursor.executemany.call_args_list}
+        self.assertEqual(inserts["system_monitor"], [row])
+        self.assertEqual(inserts["system_metrics"], [(1, "2024-05-01 10:00:00", 12.5), (2, "2024-05-01 10:00:00", 3.0)])
+        self.connection.commit.assert_called_once()
+
+    def test_known_series_are_not_looked_up_again(self):
+        row = ("2024-05-01 10:00:00",) + (1.0,) * 6
+        metrics = [("2024-05-01 10:00:00", "cpu", "cpu0", "usage_pct", 1.0)]
+        insert_rows_into_db(self.connection, [(row, metrics)])
+        insert_rows_into_db(self.connection, [(row, metrics)])
+        self.assertEqual(self.cursor.fetchall.call_count, 1)
+
+def sample(second, cpu=10.0):
+    return (f"2024-05-01 10:00:{second:02d}", cpu, "N/A", 50.0, 40.0, 1.0, 2.0)
+
+class SampleWriterTests(unittest.TestCase):
+    """SampleWriter's thread against a fake database that can be taken down."""
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.spill_path = os.path.join(directory, "spill.jsonl")
+        self.database_up = True
+        self.inserted = []  # One list of system_monitor rows per transaction
+        for name, fake in (("create_db_connection", self.connect), ("insert_rows_into_db", self.insert)):
+            patcher = mock.patch.object(system_static_live, name, side_effect=fake)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def connect(self):
+        return mock.Mock(is_connected=mock.Mock(return_value=True)) if self.database_up else None
+
+    def insert(self, connection, samples, rollups=None):
+        self.inserted.append([row for row, _ in samples])
+
+    def writer(self, max_rows=3):
+        return SampleWriter(max_rows=max_rows, max_age=60, spill_path=self.spill_path)
+
+    def test_rows_are_written_in_batches(self):
+        writer = self.writer()
+        for second in range(4):
+            writer.add(sample(second), [("cpu", "cpu0", "usage_pct", 5.0)])
+        writer.close()  # Flushes the partial batch
+        self.assertEqual([len(batch) for batch in self.inserted], [3, 1])
+        self.assertEqual(self.inserted[0][0], ("2024-05-01 10:00:00", 10.0, None, 50.0, 40.0, 1.0, 2.0))
+
+    def test_outage_spills_and_the_next_flush_replays_first(self):
+        self.database_up = False
+        writer = self.writer()
+        for second in range(3):
+            writer.add(sample(second))
+        writer.close()
+        with open(self.spill_path) as f:
+            self.assertEqual(len(f.readlines()), 3)
+        self.assertEqual(self.inserted, [])
+
+        self.database_up = True
+        writer = self.writer()
+        writer.add(sample(3))
+        writer.close()
+        self.assertEqual([[row[0][-2:] for row in batch] for batch in self.inserted], [["00", "01", "02"], ["03"]])
+        self.assertFalse(os.path.exists(self.spill_path))
+
+    def test_torn_spill_line_is_quarantined(self):
+        with open(self.spill_path, "w") as f:
+            f.write(json.dumps([list(sample(0)), []]) + "\n")
+            f.write('["2024-05-01 10:00:01", 10.0, "N/\n')  # Cut off by a crash mid-append
+        writer = self.writer()
+        writer.add(sample(2))
+        with self.assertLogs(level="ERROR"):
+            writer.close()
+        self.assertEqual([len(batch) for batch in self.inserted], [1, 1])
+        with open(self.spill_path + ".bad") as f:
+            self.assertIn("10:00:01", f.read())
+
+    def test_unexpected_error_does_not_kill_the_writer(self):
+        failures = [KeyError("series")]
+
+        def insert(connection, samples, rollups=None):
+            if failures:
+                raise failures.pop()
+            self.insert(connection, samples, rollups)
+
+        writer = self.writer(max_rows=1)
+        with mock.patch.object(system_static_live, "insert_rows_into_db", side_effect=insert):
+            with self.assertLogs(level="ERROR"):
+                writer.add(sample(0))
+                writer.add(sample(1))
+                writer.close()
+        self.assertEqual(self.inserted[0], [sample(1)[:2] + (None,) + sample(1)[3:]])  # The sample after the failure
+
+class TickSchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch.object(system_static_live, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cadence_does_not_drift_with_sample_time(self):
+        scheduler = TickScheduler(interval=1.0, report_interval=3600)
+        for _ in range(3):
+            scheduler.wait()
+            self.clock.now += 0.25  # Time spent sampling
+        self.assertEqual(self.clock.sleeps, [1.0, 0.75, 0.75])
+        self.assertEqual(self.clock.now, 3.25)
+
+    def test_overrun_skips_the_missed_ticks(self):
+        scheduler = TickScheduler(interval=1.0, report_interval=3600)
+        scheduler.wait()
+        self.clock.now = 4.5  # A tick that took 3.5 s
+        jitter = scheduler.wait()
+        self.assertEqual(scheduler.skipped, 2)
+        self.assertEqual(jitter, 0.5)
+        scheduler.wait()
+        self.assertEqual(self.clock.now, 5.0)  # Back on the 1 s grid
+
+if __name__ == "__main__":
+    unittest.main()
@@ -21,6 +21,8 @@ import Xlib
 import json
 import logging
 from concurrent.futures import ThreadPoolExecutor
+from proc_connector import open_proc_connector, watch_with_connector, ShortLivedFilter
+from open_files import OpenFileIndex
 
 # Initialize colorama for colored terminal output
 init()
@@ -63,6 +65,7 @@ ignored_file_extensions = {".sqlite-wal", ".vscdb", ".vscdb-journal", ".tmp", ".
 ignored_file_prefixes = {".goutputstream-", "cache-", "tmp-"}
 ignored_directories = {"/.config/", "/.cache/", "/.mozilla/", "/snap/", "/var/log/"}
 PROCESS_MONITOR_PERIOD = 1
+PROCESS_EVENT_SOURCE = config.get("process_event_source", "auto")  # "auto" uses the netlink connector when root, "scan" never does
 window_monitor_period = 1
 initial_hardware_recorded = False
 
@@ -78,8 +81,8 @@ class ActivityMonitor:
         self.file_hashes = self._get_file_hashes()  # Initial file hashes
         self.aggregation_buffer = {}  # Buffer to hold aggregated messages
         self.aggregation_interval = AGGREGATION_INTERVAL  # Aggregate for 5 seconds
-        self.main_processes = {"bash", "python3", "systemd"}
         self.process_count = defaultdict(int)
+        self.open_files = OpenFileIndex()  # Attributes file events to the process holding the file open
         self.executor = ThreadPoolExecutor(max_workers=4)  # For managing threads
         self.db_conn = self._connect_db()
         self.stop_event = threading.Event()  # Signal threads to stop
@@ -161,19 +164,44 @@ class ActivityMonitor:
 
     def get_process_name_from_path(self, path):
         """Get the process name associated with a file path."""
-        try:
-            for process in psutil.process_iter(['pid', 'name', 'open_files']):
-                try:
-                    for file in process.info['open_files']:
-                        if file.path in path:
-                            return process.info['name']
-                except Exception:
-                    pass  # Handle exceptions like permission issues
-        except Exception:
-            pass
-        return "System"  # Default to "System" if no process is found
+        return self.open_files.process_name(path) or "System"  # Default to "System" if no process is found
+
+    def app_started(self, app_name):
+        if self.process_count[app_name] == 0 and app_name not in EXCLUDED_PROCESS_NAMES and not self.should_ignore_process(app_name):  # Exclude specific processes
+            self.process_count[app_name] = 1
+            self.print_app_activity(f"{app_name} started")
+            self._log_user_activity("app_start", f"{app_name} started")
+
+    def app_closed(self, app_name):
+        if self.process_count[app_name] == 1 and app_name not in EXCLUDED_PROCESS_NAMES and not self.should_ignore_process(app_name):  # Exclude specific processes
+            self.process_count[app_name] = 0
+            self.print_app_activity(f"{app_name} closed")
+            self._log_user_activity("app_closed", f"{app_name} closed")
+
+    def report_program_start(self, pid, name):
+        self.app_started(name)
+
+    def report_program_exit(self, pid, name):
+        if name:
+            self.app_closed(name)
 
     def monitor_applications(self):
+        # Exact start/exit events from the kernel when running as root, otherwise periodic scans
+        connector = open_proc_connector() if PROCESS_EVENT_SOURCE != "scan" else None
+        if connector is not None:
+            logging.info("Watching applications through the netlink process connector.")
+            try:
+                # Short-lived programs (a shell's ls or grep) are not reported, as a scan would miss them too
+                self.program_filter = ShortLivedFilter(self.report_program_start, self.report_program_exit)
+                threading.Thread(target=self.program_filter.run, args=(self.stop_event,), daemon=True).start()
+                watch_with_connector(connector, self.program_filter.start, self.program_filter.exit, self.stop_event)
+                return
+            except Exception as e:
+                logging.error(f"Process connector failed, falling back to scanning: {e}")
+            finally:
+                connector.close()
+            self.previous_processes = set(psutil.process_iter(['pid', 'name']))
+
         while not self.stop_event.is_set():  # Check stop signal
             cursor = None
             try:
@@ -184,12 +212,7 @@ class ActivityMonitor:
                 new_processes = current_processes - self.previous_processes
                 for process in new_processes:
                     try:
-                        app_name = process.info['name']
-                        app_pid = process.info['pid']
-                        if self.process_count[app_name] is 0 and app_name not in EXCLUDED_PROCESS_NAMES and not self.should_ignore_process(app_name):  # Exclude specific processes
-                            self.process_count[app_name] = 1
-                            self.print_app_activity(f"{app_name} started")
-                            self._log_user_activity("app_start", f"{app_name} started")
+                        self.app_started(process.info['name'])
                     except (psutil.NoSuchProcess, psutil.AccessDenied):
                         pass
 
@@ -197,12 +220,7 @@ class ActivityMonitor:
                 terminated_processes = self.previous_processes - current_processes
                 for process in terminated_processes:
                     try:
-                        app_pid = process.info['pid']
-                        app_name = process.info['name']
-                        if self.process_count[app_name] is 1 and app_name not in EXCLUDED_PROCESS_NAMES and not self.should_ignore_process(app_name):  # Exclude specific processes
-                            self.process_count[app_name] = 0
-                            self.print_app_activity(f"{app_name} closed")
-                            self._log_user_activity("app_closed", f"{app_name} closed")
+                        self.app_closed(process.info['name'])
                     except (psutil.NoSuchProcess, psutil.AccessDenied):
                         pass
 
@@ -217,19 +235,6 @@ class ActivityMonitor:
                 if self.db_conn and self.db_conn.is_connected() and cursor:
                     cursor.close()
 
-    def is_child_process(self, pid):
-        """Check if a process is a child of another running process."""
-        try:
-            proc = psutil.Process(pid)
-            while proc.ppid() != 0:  # Traverse up the parent tree
-                parent = psutil.Process(proc.ppid())
-                if parent.name().lower() in self.main_processes:
-                    return True  # It's a child of a main process
-                proc = parent
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            pass
-        return False
-
     def should_ignore_file(self, file_path):
         """Check if the file should be ignored based on known temp files, extensions, or paths."""
         filename = os.path.basename(file_path)
@@ -22,6 +22,9 @@ export interface PerformanceDetails {
 }
 
 
+// Upper bound on points per chart; the server downsamples with LTTB so spikes are kept
+const MAX_CHART_POINTS = 1000;
+
 const fetchMetrics = async (): Promise<SystemMetrics> => {
   const response = await fetch("http://127.0.0.1:8000/metrics/");
   if (!response.ok) {
@@ -33,7 +36,7 @@ const fetchMetrics = async (): Promise<SystemMetrics> => {
 };
 
 export const fetchHistoricalMetrics = async (period: string): Promise<PerformanceDetails[]> => {
-  const response = await fetch(`http://127.0.0.1:8000/system-info/?duration=${period}`);
+  const response = await fetch(`http://127.0.0.1:8000/system-info/?duration=${period}&max_points=${MAX_CHART_POINTS}`);
   if (!response.ok) {
     throw new Error(`Failed to fetch historical metrics for period: ${period}`);
   }